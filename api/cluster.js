@@ -0,0 +1,166 @@
+const cluster = require('cluster');
+const fs = require('fs');
+const os = require('os');
+
+// Cluster mode: CLUSTER_WORKERS=auto (satu worker per CPU yang tersedia untuk
+// container) atau angka tertentu. Default 1 = satu proses tanpa cluster.
+// Setiap worker punya pool Postgres dan koneksi Redis sendiri (PG_POOL_MAX per worker).
+const RESTART_WINDOW_MS = 60000;
+const MAX_RESTARTS_PER_WINDOW = 5;
+// Batas tunggu worker pengganti listening saat rolling restart
+const REPLACEMENT_LISTEN_TIMEOUT_MS = 30000;
+
+// CPU yang benar-benar boleh dipakai container (cgroup quota), bukan jumlah CPU host
+function availableCpus() {
+  const hostCpus = typeof os.availableParallelism === 'function' ? os.availableParallelism() : os.cpus().length;
+
+  try {
+    // cgroup v2: "<quota> <period>" atau "max <period>"
+    const [quota, period] = fs.readFileSync('/sys/fs/cgroup/cpu.max', 'utf8').trim().split(' ');
+    if (quota !== 'max') {
+      return Math.max(1, Math.min(hostCpus, Math.ceil(Number(quota) / Number(period))));
+    }
+  } catch (error) {
+    try {
+      // cgroup v1
+      const quota = Number(fs.readFileSync('/sys/fs/cgroup/cpu/cpu.cfs_quota_us', 'utf8'));
+      const period = Number(fs.readFileSync('/sys/fs/cgroup/cpu/cpu.cfs_period_us', 'utf8'));
+      if (quota > 0 && period > 0) {
+        return Math.max(1, Math.min(hostCpus, Math.ceil(quota / period)));
+      }
+    } catch (ignored) {
+      // Tidak ada cgroup limit, pakai jumlah CPU host
+    }
+  }
+  return hostCpus;
+}
+
+function workerCount() {
+  const setting = process.env.CLUSTER_WORKERS || '1';
+  if (setting === 'auto') return availableCpus();
+  return Math.max(1, Number.parseInt(setting, 10) || 1);
+}
+
+function log(message, fields = {}) {
+  process.stdout.write(JSON.stringify({
+    time: new Date().toISOString(),
+    level: 'info',
+    instance: process.env.INSTANCE_NAME,
+    message,
+    ...fields
+  }) + '\n');
+}
+
+function startPrimary(count) {
+  const baseName = process.env.INSTANCE_NAME || 'unknown';
+  const slots = new Map(); // worker.id -> slot (1..count), untuk INSTANCE_NAME yang stabil
+  const restarts = [];
+  let shuttingDown = false;
+
+  function fork(slot) {
+    const worker = cluster.fork({ INSTANCE_NAME: `${baseName}-w${slot}` });
+    slots.set(worker.id, slot);
+    return worker;
+  }
+
+  log('Starting cluster', { workers: count });
+  for (let slot = 1; slot <= count; slot++) {
+    fork(slot);
+  }
+
+  cluster.on('exit', (worker, code, signal) => {
+    const slot = slots.get(worker.id);
+    slots.delete(worker.id);
+    if (shuttingDown || worker.exitedAfterDisconnect || worker.replaced) return;
+
+    // Worker crash: fork pengganti, dengan jeda jika crash terus-menerus
+    const now = Date.now();
+    while (restarts.length && restarts[0] < now - RESTART_WINDOW_MS) restarts.shift();
+    restarts.push(now);
+    const delay = restarts.length > MAX_RESTARTS_PER_WINDOW ? 5000 : 0;
+
+    log('Worker exited, restarting', { worker: worker.id, slot, code, signal, delayMs: delay });
+    setTimeout(() => fork(slot), delay);
+  });
+
+  // Resolve saat worker listening; reject jika worker exit atau tidak listening
+  // dalam REPLACEMENT_LISTEN_TIMEOUT_MS
+  function waitForListening(worker) {
+    return new Promise((resolve, reject) => {
+      const timer = setTimeout(() => {
+        cleanup();
+        reject(new Error(`Worker ${worker.id} not listening after ${REPLACEMENT_LISTEN_TIMEOUT_MS}ms`));
+      }, REPLACEMENT_LISTEN_TIMEOUT_MS);
+      const onListening = () => {
+        cleanup();
+        resolve();
+      };
+      const onExit = (code, signal) => {
+        cleanup();
+        reject(new Error(`Worker ${worker.id} exited before listening (code ${code}, signal ${signal})`));
+      };
+      function cleanup() {
+        clearTimeout(timer);
+        worker.off('listening', onListening);
+        worker.off('exit', onExit);
+      }
+      worker.once('listening', onListening);
+      worker.once('exit', onExit);
+    });
+  }
+
+  // Rolling restart (SIGHUP): ganti worker satu per satu; worker lama baru
+  // dihentikan setelah penggantinya listening, jadi port tidak pernah kosong.
+  // Pengganti yang crash/timeout dibuang dan restart dihentikan; worker lama tetap melayani
+  async function rollingRestart() {
+    log('Rolling restart started');
+    for (const worker of Object.values(cluster.workers)) {
+      const slot = slots.get(worker.id);
+      const replacement = fork(slot);
+      // Sampai listening, exit pengganti tidak di-fork ulang: slot masih dilayani worker lama
+      replacement.replaced = true;
+      try {
+        await waitForListening(replacement);
+      } catch (error) {
+        if (!replacement.isDead()) replacement.process.kill('SIGKILL');
+        throw error;
+      }
+      replacement.replaced = false;
+
+      worker.replaced = true;
+      await new Promise((resolve) => {
+        worker.once('exit', resolve);
+        worker.process.kill('SIGTERM');
+      });
+    }
+    log('Rolling restart finished');
+  }
+
+  process.on('SIGHUP', () => {
+    rollingRestart().catch((error) => log('Rolling restart failed', { error: error.message }));
+  });
+
+  function shutdown(signal) {
+    shuttingDown = true;
+    log('Stopping cluster', { signal });
+    const workers = Object.values(cluster.workers);
+    if (workers.length === 0) process.exit(0);
+
+    cluster.on('exit', () => {
+      if (Object.keys(cluster.workers).length === 0) process.exit(0);
+    });
+    for (const worker of workers) {
+      worker.process.kill('SIGTERM');
+    }
+  }
+
+  process.on('SIGTERM', () => shutdown('SIGTERM'));
+  process.on('SIGINT', () => shutdown('SIGINT'));
+}
+
+const count = workerCount();
+if (cluster.isPrimary && count > 1) {
+  startPrimary(count);
+} else {
+  require('./server');
+}
@@ -4,96 +4,806 @@ const redis = require('redis');
 const cors = require('cors');
 const helmet = require('helmet');
 const rateLimit = require('express-rate-limit');
+const fs = require('fs');
+const os = require('os');
+const { AsyncLocalStorage } = require('async_hooks');
+const crypto = require('crypto');
+const util = require('util');
+const zlib = require('zlib');
 
 const app = express();
 const PORT = 3000;
 
+// Structured logger: JSON per baris, di-buffer di memory dan ditulis ke stdout
+// secara berkala dalam satu write, sehingga request tidak menunggu I/O log.
+// LOG_LEVEL=debug mengaktifkan detail; endpoint panas memakai sampling (LOG_SAMPLE_RATE).
+const LOG_LEVELS = { debug: 10, info: 20, warn: 30, error: 40 };
+
+const logger = {
+  levelName: LOG_LEVELS[process.env.LOG_LEVEL] ? process.env.LOG_LEVEL : 'info',
+  sampleRate: Number(process.env.LOG_SAMPLE_RATE ?? 0.01),
+  flushIntervalMs: Number(process.env.LOG_FLUSH_MS || 1000),
+  maxBufferBytes: 64 * 1024,
+  buffer: [],
+  bufferBytes: 0,
+
+  enabled(level) {
+    return LOG_LEVELS[level] >= LOG_LEVELS[this.levelName];
+  },
+
+  // true untuk sebagian kecil request saja; cek ini sebelum menyusun field log yang mahal
+  sampled(level, rate = this.sampleRate) {
+    return this.enabled(level) && Math.random() < rate;
+  },
+
+  log(level, message, fields = {}) {
+    if (!this.enabled(level)) return;
+
+    const line = JSON.stringify({
+      time: new Date().toISOString(),
+      level,
+      instance: process.env.INSTANCE_NAME,
+      message,
+      ...fields
+    }) + '\n';
+    this.buffer.push(line);
+    this.bufferBytes += line.length;
+
+    if (this.bufferBytes >= this.maxBufferBytes || level === 'error') {
+      this.flush();
+    }
+  },
+
+  flush() {
+    if (this.buffer.length === 0) return;
+    const chunk = this.buffer.join('');
+    this.buffer = [];
+    this.bufferBytes = 0;
+    process.stdout.write(chunk);
+  },
+
+  // Dipakai saat proses berhenti: tulis sisa buffer secara synchronous
+  flushSync() {
+    if (this.buffer.length === 0) return;
+    fs.writeSync(1, this.buffer.join(''));
+    this.buffer = [];
+    this.bufferBytes = 0;
+  },
+
+  debug(message, fields) { this.log('debug', message, fields); },
+  info(message, fields) { this.log('info', message, fields); },
+  warn(message, fields) { this.log('warn', message, fields); },
+  error(message, fields) { this.log('error', message, fields); }
+};
+
+setInterval(() => logger.flush(), logger.flushIntervalMs).unref();
+process.on('exit', () => logger.flushSync());
+
+function errorFields(error) {
+  return { error: error.message, stack: error.stack };
+}
+
+// Server-Timing: durasi per fase request (Redis, antrian pool, query, serialisasi)
+// dikumpulkan lewat AsyncLocalStorage, sehingga redisCall/preparedQuery tidak perlu
+// menerima req. Header ditulis tepat sebelum response headers dikirim.
+const requestTiming = new AsyncLocalStorage();
+
+const SERVER_TIMING_PHASES = {
+  ratelimit: 'Rate limit (Redis)',
+  reqseen: 'Request seen (Redis)',
+  cache: 'Cache lookup (Redis)',
+  pool: 'Pool acquire wait',
+  db: 'Database (incl. pool wait)',
+  serialize: 'Serialize',
+  total: 'Server total'
+};
+
+function elapsedMs(start) {
+  return Number(process.hrtime.bigint() - start) / 1e6;
+}
+
+// timing diambil saat operasi dimulai: callback pg-pool/node-redis bisa jalan
+// di async context request lain
+function addTiming(timing, phase, ms) {
+  if (timing) timing.phases[phase] = (timing.phases[phase] || 0) + ms;
+}
+
+function formatServerTiming(timing) {
+  const now = process.hrtime.bigint();
+  if (timing.serializeStart) {
+    addTiming(timing, 'serialize', Number(now - timing.serializeStart) / 1e6);
+  }
+  timing.phases.total = Number(now - timing.start) / 1e6;
+  return Object.entries(timing.phases)
+    .map(([phase, ms]) => `${phase};dur=${ms.toFixed(2)};desc="${SERVER_TIMING_PHASES[phase] || phase}"`)
+    .join(', ');
+}
+
+// Latency histogram per route (bucket dalam ms), kumulatif sejak proses start
+const LATENCY_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000];
+const routeLatency = new Map();
+
+function recordRouteLatency(req, ms) {
+  const route = req.route ? `${req.method} ${req.baseUrl}${req.route.path}` : `${req.method} (no route)`;
+  let histogram = routeLatency.get(route);
+  if (!histogram) {
+    histogram = { count: 0, sumMs: 0, maxMs: 0, buckets: new Array(LATENCY_BUCKETS_MS.length + 1).fill(0) };
+    routeLatency.set(route, histogram);
+  }
+
+  histogram.count++;
+  histogram.sumMs += ms;
+  histogram.maxMs = Math.max(histogram.maxMs, ms);
+  let bucket = 0;
+  while (bucket < LATENCY_BUCKETS_MS.length && ms > LATENCY_BUCKETS_MS[bucket]) bucket++;
+  histogram.buckets[bucket]++;
+}
+
+// Percentile dari histogram = batas atas bucket tempat percentile jatuh (bucket terakhir: max)
+function histogramPercentile(histogram, p) {
+  const rank = Math.ceil(histogram.count * p);
+  let seen = 0;
+  for (let i = 0; i < LATENCY_BUCKETS_MS.length; i++) {
+    seen += histogram.buckets[i];
+    if (seen >= rank) return LATENCY_BUCKETS_MS[i];
+  }
+  return histogram.maxMs;
+}
+
+function getRouteLatencyStats() {
+  const routes = {};
+  for (const [route, histogram] of routeLatency) {
+    routes[route] = {
+      count: histogram.count,
+      avgMs: histogram.sumMs / histogram.count,
+      maxMs: histogram.maxMs,
+      p50Ms: histogramPercentile(histogram, 0.50),
+      p95Ms: histogramPercentile(histogram, 0.95),
+      p99Ms: histogramPercentile(histogram, 0.99),
+      // Jumlah request per bucket (bukan kumulatif), key = batas atas dalam ms
+      buckets: Object.fromEntries(histogram.buckets.map((count, i) => [LATENCY_BUCKETS_MS[i] ?? '+Inf', count]))
+    };
+  }
+  return routes;
+}
+
+app.use((req, res, next) => {
+  const timing = { start: process.hrtime.bigint(), phases: {}, serializeStart: null };
+
+  const writeHead = res.writeHead;
+  res.writeHead = function (...args) {
+    if (!res.headersSent) res.setHeader('Server-Timing', formatServerTiming(timing));
+    return writeHead.apply(this, args);
+  };
+
+  // res.json: JSON.stringify + ETag dihitung sebelum writeHead, dicatat sebagai serialize
+  const json = res.json;
+  res.json = function (body) {
+    timing.serializeStart ??= process.hrtime.bigint();
+    return json.call(this, body);
+  };
+
+  res.on('finish', () => recordRouteLatency(req, elapsedMs(timing.start)));
+  requestTiming.run(timing, next);
+});
+
 // Security middleware
 app.use(helmet());
 app.use(cors());
 app.use(express.json({ limit: '10mb' }));
 
-// Rate limiting
+// Nginx ada di depan API: pakai X-Forwarded-For untuk IP client, tetapi hanya jika
+// koneksi datang dari jaringan internal (network docker). Dengan hop count saja,
+// client yang bisa menjangkau port API langsung dapat memalsukan X-Forwarded-For
+// dan mendapat bucket rate limit baru. TRUST_PROXY: daftar subnet/nama (format
+// Express) atau jumlah hop untuk deployment yang port API-nya tidak terekspos.
+const TRUST_PROXY = process.env.TRUST_PROXY || 'loopback,linklocal,uniquelocal';
+app.set('trust proxy', /^\d+$/.test(TRUST_PROXY) ? Number(TRUST_PROXY) : TRUST_PROXY.split(',').map((value) => value.trim()));
+
+// Rate limiting dengan counter bersama di Redis (sliding window), sehingga
+// limit berlaku untuk seluruh cluster, bukan per replica
+const RATE_LIMIT_WINDOW_MS = Number(process.env.RATE_LIMIT_WINDOW_MS || 15 * 60 * 1000); // 15 menit
+const RATE_LIMIT_MAX = Number(process.env.RATE_LIMIT_MAX || 100); // maksimal 100 request per IP
+const RATE_LIMIT_ALLOWLIST = new Set((process.env.RATE_LIMIT_ALLOWLIST || '').split(',').map((ip) => ip.trim()).filter(Boolean));
+const RATE_LIMIT_BYPASS_TOKEN = process.env.RATE_LIMIT_BYPASS_TOKEN || '';
+// Probe dan metrics tidak dibatasi: tanpa round trip Redis, dan tetap cepat saat Redis degraded
+const RATE_LIMIT_EXEMPT_PATHS = new Set(['/health', '/live', '/ready', '/metrics']);
+
+// Sliding window log: satu sorted set per client berisi timestamp request.
+// Waktu diambil dari Redis (TIME) supaya semua replica memakai jam yang sama.
+// Request yang ditolak (sudah di limit) tidak dicatat, supaya client yang terus
+// mengirim tetap bisa lolos lagi setelah window bergeser dan set tidak membesar.
+const SLIDING_WINDOW_SCRIPT = `
+local time = redis.call('time')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local window = tonumber(ARGV[1])
+local limit = tonumber(ARGV[3])
+redis.call('zremrangebyscore', KEYS[1], 0, now - window)
+local hits = redis.call('zcard', KEYS[1])
+if hits < limit then
+  redis.call('zadd', KEYS[1], now, now .. '-' .. ARGV[2])
+  redis.call('pexpire', KEYS[1], window)
+end
+local oldest = redis.call('zrange', KEYS[1], 0, 0, 'WITHSCORES')
+local resetAt = oldest[2] and tonumber(oldest[2]) + window or now + window
+return { hits + 1, resetAt }`;
+
+const redisRateLimitStore = {
+  prefix: 'ratelimit:',
+  localKeys: false,
+  windowMs: RATE_LIMIT_WINDOW_MS,
+  limit: RATE_LIMIT_MAX,
+
+  init(options) {
+    this.windowMs = options.windowMs;
+    this.limit = options.limit ?? this.limit;
+  },
+
+  // Redis lambat: error dari redisCall membuat request lolos (passOnStoreError).
+  // Selama Redis degraded request langsung lolos tanpa error log per request.
+  async increment(key) {
+    if (!redisAvailable()) {
+      return { totalHits: 0, resetTime: undefined };
+    }
+    const [totalHits, resetAt] = await redisCall('rate limit', () => redisClient.eval(SLIDING_WINDOW_SCRIPT, {
+      keys: [this.prefix + key],
+      arguments: [String(this.windowMs), `${process.pid}-${Math.random()}`, String(this.limit)]
+    }), { phase: 'ratelimit' });
+    return { totalHits, resetTime: new Date(resetAt) };
+  },
+
+  // Dipanggil dari event finish response: error cukup di-log, tidak di-throw
+  async decrement(key) {
+    if (!redisAvailable()) {
+      return;
+    }
+    try {
+      await redisCall('rate limit decrement', () => redisClient.zPopMax(this.prefix + key), { phase: 'ratelimit' });
+    } catch (error) {
+      if (logger.sampled('warn')) logger.warn('Rate limit decrement failed', { error: error.message });
+    }
+  },
+
+  async resetKey(key) {
+    await redisCall('rate limit reset', () => redisClient.del(this.prefix + key), { force: true, phase: 'ratelimit' });
+  }
+};
+
 const limiter = rateLimit({
-  windowMs: 15 * 60 * 1000, // 15 menit
-  max: 100 // maksimal 100 request per IP
+  windowMs: RATE_LIMIT_WINDOW_MS,
+  limit: RATE_LIMIT_MAX,
+  store: redisRateLimitStore,
+  // Redis tidak tersedia: jangan blokir request
+  passOnStoreError: true,
+  // Probe/metrics, load generator internal: IP di allowlist atau header bypass token
+  skip: (req) => RATE_LIMIT_EXEMPT_PATHS.has(req.path) || RATE_LIMIT_ALLOWLIST.has(req.ip) ||
+    (RATE_LIMIT_BYPASS_TOKEN !== '' && req.get('X-RateLimit-Bypass') === RATE_LIMIT_BYPASS_TOKEN)
 });
 app.use(limiter);
 
-// PostgreSQL connection
+// Retry accounting: nginx (proxy_next_upstream) bisa mengirim request yang sama
+// ke beberapa replica. Jika client mengirim X-Request-ID, hitung berapa kali ID
+// itu dieksekusi di seluruh cluster (Redis) dan kembalikan lewat X-Request-Seen.
+const REQUEST_SEEN_TTL_SECONDS = 300;
+const MAX_REQUEST_ID_LENGTH = 128;
+
+app.use(async (req, res, next) => {
+  const requestId = req.get('X-Request-ID');
+  if (!requestId || requestId.length > MAX_REQUEST_ID_LENGTH || !redisAvailable()) {
+    return next();
+  }
+
+  try {
+    const key = `reqseen:${requestId}`;
+    const [seen] = await redisCall('request seen', () => redisClient.multi()
+      .incr(key)
+      .expire(key, REQUEST_SEEN_TTL_SECONDS)
+      .exec(), { phase: 'reqseen' });
+    res.set('X-Request-Seen', String(seen));
+  } catch (error) {
+    logger.warn('Request seen counter failed', errorFields(error));
+  }
+  next();
+});
+
+// PostgreSQL connection (ukuran pool dan timeout bisa diatur per environment)
 const pool = new Pool({
   user: process.env.DB_USER,
   host: process.env.DB_HOST,
   database: process.env.DB_NAME,
   password: process.env.DB_PASSWORD,
-  port: 5432,
+  port: Number(process.env.DB_PORT || 5432),
+  max: Number(process.env.PG_POOL_MAX || 10),
+  idleTimeoutMillis: Number(process.env.PG_IDLE_TIMEOUT_MS || 10000),
+  connectionTimeoutMillis: Number(process.env.PG_CONNECTION_TIMEOUT_MS || 0),
+  statement_timeout: Number(process.env.PG_STATEMENT_TIMEOUT_MS || 0),
 });
 
+// Pool metrics: waktu tunggu mendapatkan client dari pool (acquire wait).
+// Counter kumulatif sejak proses start (pembaca /metrics menghitung delta sendiri,
+// membaca /metrics tidak mengubah apa pun); max terbaru dari slot per detik
+const POOL_WAIT_WINDOW_SECONDS = 60;
+const poolMetrics = {
+  acquireCount: 0,
+  acquireErrors: 0,
+  acquireWaitTotalMs: 0,
+  acquireWaitMaxMs: 0, // maksimum sejak proses start
+  recentWaitMax: Array.from({ length: POOL_WAIT_WINDOW_SECONDS }, () => ({ second: -1, maxMs: 0 }))
+};
+
+function recordPoolWait(waitMs) {
+  const second = Math.floor(Date.now() / 1000);
+  const slot = poolMetrics.recentWaitMax[second % POOL_WAIT_WINDOW_SECONDS];
+  if (slot.second !== second) {
+    slot.second = second;
+    slot.maxMs = 0;
+  }
+  slot.maxMs = Math.max(slot.maxMs, waitMs);
+  poolMetrics.acquireWaitMaxMs = Math.max(poolMetrics.acquireWaitMaxMs, waitMs);
+}
+
+function recentPoolWaitMax() {
+  const oldest = Math.floor(Date.now() / 1000) - POOL_WAIT_WINDOW_SECONDS;
+  return poolMetrics.recentWaitMax.reduce((max, slot) => (slot.second > oldest ? Math.max(max, slot.maxMs) : max), 0);
+}
+
+// pool.query() memakai pool.connect() di dalamnya, jadi cukup connect yang diukur
+const poolConnect = pool.connect.bind(pool);
+pool.connect = (callback) => {
+  const start = process.hrtime.bigint();
+  const timing = requestTiming.getStore();
+  const record = (error) => {
+    const waitMs = elapsedMs(start);
+    addTiming(timing, 'pool', waitMs);
+    poolMetrics.acquireCount++;
+    poolMetrics.acquireWaitTotalMs += waitMs;
+    recordPoolWait(waitMs);
+    if (error) poolMetrics.acquireErrors++;
+  };
+
+  if (callback) {
+    return poolConnect((error, client, release) => {
+      record(error);
+      callback(error, client, release);
+    });
+  }
+  return poolConnect().then(
+    (client) => {
+      record();
+      return client;
+    },
+    (error) => {
+      record(error);
+      throw error;
+    }
+  );
+};
+
+// Named prepared statements: Postgres cukup parse/plan sekali per koneksi.
+// PG_PREPARED_STATEMENTS=false mengembalikan ke unnamed query (untuk perbandingan).
+const USE_PREPARED_STATEMENTS = process.env.PG_PREPARED_STATEMENTS !== 'false';
+
+// Load shedding: jika antrian pool sudah sepanjang PG_MAX_WAITING, query baru
+// langsung ditolak (503 + Retry-After) daripada menunggu dan menambah tail latency.
+// Cache hit tidak memakai pool sehingga tetap dilayani. PG_MAX_WAITING=0 = tanpa batas.
+const PG_MAX_WAITING = Number(process.env.PG_MAX_WAITING ?? pool.options.max * 2);
+
+class PoolSaturatedError extends Error {}
+
+function preparedQuery(name, text, values = []) {
+  if (PG_MAX_WAITING > 0 && pool.waitingCount >= PG_MAX_WAITING) {
+    dependencyMetrics.poolShed++;
+    return Promise.reject(new PoolSaturatedError(`Database pool queue full (${pool.waitingCount} waiting)`));
+  }
+  const start = process.hrtime.bigint();
+  const timing = requestTiming.getStore();
+  return pool.query(USE_PREPARED_STATEMENTS ? { name, text, values } : { text, values })
+    .finally(() => addTiming(timing, 'db', elapsedMs(start)));
+}
+
+function getPoolStats() {
+  return {
+    max: pool.options.max,
+    total: pool.totalCount,
+    idle: pool.idleCount,
+    waiting: pool.waitingCount,
+    acquire: {
+      count: poolMetrics.acquireCount,
+      errors: poolMetrics.acquireErrors,
+      totalWaitMs: poolMetrics.acquireWaitTotalMs,
+      avgWaitMs: poolMetrics.acquireCount ? poolMetrics.acquireWaitTotalMs / poolMetrics.acquireCount : 0,
+      maxWaitMs: poolMetrics.acquireWaitMaxMs,
+      recentMaxWaitMs: recentPoolWaitMax(),
+      recentWindowSeconds: POOL_WAIT_WINDOW_SECONDS
+    }
+  };
+}
+
 // Redis connection
 let redisClient;
-(async () => {
+let redisSubscriber;
+const redisConnected = (async () => {
   redisClient = redis.createClient({
     socket: {
       host: process.env.REDIS_HOST,
-      port: 6379
+      port: Number(process.env.REDIS_PORT || 6379)
     }
   });
   
-  redisClient.on('error', (err) => console.log('Redis Client Error', err));
+  redisClient.on('error', (err) => logger.error('Redis Client Error', errorFields(err)));
   await redisClient.connect();
-  console.log('Connected to Redis');
+  logger.info('Connected to Redis');
+
+  // Koneksi terpisah untuk subscribe (mode subscriber tidak bisa dipakai untuk command lain)
+  redisSubscriber = redisClient.duplicate();
+  redisSubscriber.on('error', (err) => logger.error('Redis Subscriber Error', errorFields(err)));
+  await redisSubscriber.connect();
+  await redisSubscriber.subscribe(CACHE_INVALIDATION_CHANNEL, () => l1Cache.clear());
+  logger.info('Subscribed to cache invalidation channel');
 })();
 
-// Health check endpoint
-app.get('/health', async (req, res) => {
-  const health = {
-    status: 'healthy',
-    instance: process.env.INSTANCE_NAME || 'unknown',
-    timestamp: new Date().toISOString(),
-    uptime: process.uptime(),
-    memory: process.memoryUsage(),
-    checks: {
-      database: 'unknown',
-      redis: 'unknown'
-    }
-  };
+// Dependency timeouts: Redis yang lambat tidak boleh menahan request. Setiap command
+// dibatasi REDIS_TIMEOUT_MS; setelah timeout/error, Redis dianggap degraded selama
+// REDIS_RETRY_AFTER_MS dan read langsung ke Postgres (read-through) tanpa menunggu Redis.
+const REDIS_TIMEOUT_MS = Number(process.env.REDIS_TIMEOUT_MS || 200);
+const REDIS_RETRY_AFTER_MS = Number(process.env.REDIS_RETRY_AFTER_MS || 1000);
+
+const dependencyMetrics = {
+  redisTimeouts: 0,
+  redisErrors: 0,
+  redisSkipped: 0, // command tidak dikirim karena Redis sedang degraded
+  poolShed: 0      // query ditolak karena antrian pool penuh
+};
 
+let redisDegradedUntil = 0;
+
+class DependencyTimeoutError extends Error {}
+
+// Promise.race dengan timeout. Operasi aslinya tidak dibatalkan; hasilnya diabaikan.
+async function withTimeout(pending, ms, message) {
+  let timer;
+  const timeout = new Promise((resolve, reject) => {
+    timer = setTimeout(() => reject(new DependencyTimeoutError(message)), ms);
+  });
+  pending.catch(() => {});
   try {
-    // Check database connection
-    const dbResult = await pool.query('SELECT 1');
-    health.checks.database = 'healthy';
-  } catch (error) {
-    health.checks.database = 'unhealthy';
-    health.status = 'unhealthy';
+    return await Promise.race([pending, timeout]);
+  } finally {
+    clearTimeout(timer);
+  }
+}
+
+function redisAvailable() {
+  return Boolean(redisClient?.isReady) && Date.now() >= redisDegradedUntil;
+}
+
+// command: fungsi yang mengirim command Redis. force = tetap kirim walau degraded
+// (invalidation dan release lock), tetapi request tetap hanya menunggu sampai timeout.
+// node-redis tidak membatalkan command yang sudah terkirim; hasilnya diabaikan.
+async function redisCall(label, command, { force = false, phase = 'cache' } = {}) {
+  if (!force && !redisAvailable()) {
+    dependencyMetrics.redisSkipped++;
+    throw new Error(`Redis degraded, skipped ${label}`);
   }
 
+  const start = process.hrtime.bigint();
+  const timing = requestTiming.getStore();
   try {
-    // Check Redis connection
-    if (redisClient && redisClient.isOpen) {
-      await redisClient.ping();
-      health.checks.redis = 'healthy';
+    return await withTimeout(command(), REDIS_TIMEOUT_MS, `Redis ${label} timed out after ${REDIS_TIMEOUT_MS}ms`);
+  } catch (error) {
+    if (error instanceof DependencyTimeoutError) {
+      dependencyMetrics.redisTimeouts++;
     } else {
-      health.checks.redis = 'unhealthy';
-      health.status = 'unhealthy';
+      dependencyMetrics.redisErrors++;
     }
+    redisDegradedUntil = Date.now() + REDIS_RETRY_AFTER_MS;
+    throw error;
+  } finally {
+    addTiming(timing, phase, elapsedMs(start));
+  }
+}
+
+// Penanda read Redis yang gagal (beda dengan key yang memang kosong)
+const REDIS_FAILED = Symbol('redis-failed');
+
+// Read cache: gagal/timeout diperlakukan sebagai cache miss
+async function cacheRead(label, command, fallback = null) {
+  try {
+    return await redisCall(label, command);
+  } catch (error) {
+    if (logger.sampled('warn')) logger.warn('Redis read failed, using database', { command: label, error: error.message });
+    return fallback;
+  }
+}
+
+// Write cache: data sudah commit di Postgres, jadi kegagalan Redis tidak menggagalkan request
+async function cacheWrite(label, command, options) {
+  try {
+    await redisCall(label, command, options);
   } catch (error) {
-    health.checks.redis = 'unhealthy';
-    health.status = 'unhealthy';
+    if (logger.sampled('warn')) logger.warn('Redis write failed', { command: label, error: error.message });
   }
+}
+
+function sendOverloaded(res) {
+  res.set('Retry-After', '1');
+  return res.status(503).json({ error: 'Service overloaded, retry later' });
+}
+
+function getDependencyStats() {
+  return {
+    redis: {
+      degraded: Date.now() < redisDegradedUntil,
+      timeoutMs: REDIS_TIMEOUT_MS,
+      timeouts: dependencyMetrics.redisTimeouts,
+      errors: dependencyMetrics.redisErrors,
+      skipped: dependencyMetrics.redisSkipped
+    },
+    pool: {
+      maxWaiting: PG_MAX_WAITING,
+      shed: dependencyMetrics.poolShed
+    }
+  };
+}
+
+// In-process L1 cache: menyimpan response yang sudah diserialisasi (Buffer)
+// sehingga cache hit tidak perlu round trip ke Redis maupun JSON.parse/stringify.
+// Entry juga menyimpan versi data (untuk ETag) dan varian terkompresi (gzip/br).
+// L1_CACHE_TTL_MS=0 mematikan L1 cache.
+const l1Cache = {
+  ttlMs: Number(process.env.L1_CACHE_TTL_MS ?? 5000),
+  maxEntries: Number(process.env.L1_CACHE_MAX_ENTRIES ?? 100),
+  maxBytes: Number(process.env.L1_CACHE_MAX_BYTES ?? 32 * 1024 * 1024),
+  entries: new Map(), // urutan insert Map dipakai sebagai urutan LRU
+  bytes: 0,
+  generation: 0,
+
+  get(key) {
+    const entry = this.entries.get(key);
+    if (!entry) return null;
+    if (entry.expiresAt <= Date.now()) {
+      this.delete(key);
+      return null;
+    }
+    // Pindahkan ke posisi paling baru (LRU)
+    this.entries.delete(key);
+    this.entries.set(key, entry);
+    return entry;
+  },
+
+  set(key, body, generation = this.generation, version = null) {
+    // Ada invalidation sejak data ini dibaca: jangan simpan
+    if (this.ttlMs <= 0 || generation !== this.generation || body.length > this.maxBytes) return;
+
+    this.delete(key);
+    this.entries.set(key, { key, body, version, encoded: {}, bytes: body.length, expiresAt: Date.now() + this.ttlMs });
+    this.bytes += body.length;
+    this.evict();
+  },
+
+  // Simpan varian terkompresi di entry yang masih ada di cache
+  setEncoded(entry, encoding, body) {
+    if (this.entries.get(entry.key) !== entry) return;
+
+    entry.encoded[encoding] = body;
+    entry.bytes += body.length;
+    this.bytes += body.length;
+    this.evict();
+  },
+
+  // Eviction: buang entry paling lama sampai batas jumlah dan ukuran terpenuhi
+  evict() {
+    while (this.entries.size > this.maxEntries || this.bytes > this.maxBytes) {
+      this.delete(this.entries.keys().next().value);
+    }
+  },
+
+  delete(key) {
+    const entry = this.entries.get(key);
+    if (entry) {
+      this.bytes -= entry.bytes;
+      this.entries.delete(key);
+    }
+  },
+
+  clear() {
+    this.entries.clear();
+    this.bytes = 0;
+    this.generation++;
+  }
+};
+
+const CACHE_INVALIDATION_CHANNEL = 'cache:invalidate';
+
+// Susun body response todos dari JSON string tanpa parse ulang
+function buildTodosBody(source, dataJson) {
+  const head = JSON.stringify({ source, instance: process.env.INSTANCE_NAME });
+  return Buffer.from(`${head.slice(0, -1)},"data":${dataJson}}`);
+}
+
+// Kompresi list todos dilakukan di API (bukan nginx) supaya hasilnya bisa
+// disimpan di L1; kompresi berjalan di threadpool libuv.
+const gzipAsync = util.promisify(zlib.gzip);
+const brotliAsync = util.promisify(zlib.brotliCompress);
+
+function negotiateEncoding(req) {
+  const encoding = req.acceptsEncodings('br', 'gzip', 'identity');
+  return encoding === 'br' || encoding === 'gzip' ? encoding : 'identity';
+}
+
+function compressBody(body, encoding) {
+  if (encoding === 'br') {
+    // Quality default brotli (11) terlalu lambat untuk response dinamis
+    return brotliAsync(body, {
+      params: {
+        [zlib.constants.BROTLI_PARAM_QUALITY]: 4,
+        [zlib.constants.BROTLI_PARAM_SIZE_HINT]: body.length
+      }
+    });
+  }
+  return gzipAsync(body, { level: 6 });
+}
+
+// Weak ETag dari versi data (readTodosVersion): data sama, tetapi field instance dan
+// source berbeda per replica/response sehingga bytes tidak identik. Tetap dibedakan
+// per encoding supaya cache perantara tidak mencampur varian terkompresi.
+function todosEtag(version, encoding) {
+  return encoding === 'identity' ? `W/"todos-${version}"` : `W/"todos-${version}-${encoding}"`;
+}
+
+// Versi untuk ETag = epoch acak + todos:version. Jika Redis kehilangan data (restart
+// atau flush) counter mulai lagi dari 0; epoch baru mencegah ETag lama yang pernah
+// dipegang client cocok lagi dengan versi baru yang kebetulan sama angkanya.
+// null jika Redis degraded (versi tidak diketahui).
+async function readTodosVersion() {
+  const values = await cacheRead('get todos:version', () => redisClient.mGet(['todos:epoch', 'todos:version']), REDIS_FAILED);
+  if (values === REDIS_FAILED) return null;
+
+  let [epoch, version] = values;
+  if (!epoch) {
+    // Replica lain bisa membuat epoch bersamaan: SET NX lalu baca pemenangnya
+    const candidate = crypto.randomBytes(6).toString('hex');
+    const result = await cacheRead('init todos:epoch', () => redisClient.multi()
+      .set('todos:epoch', candidate, { NX: true })
+      .get('todos:epoch')
+      .exec(), REDIS_FAILED);
+    if (result === REDIS_FAILED) return null;
+    epoch = result[1] || candidate;
+  }
+  return `${epoch}.${version || 0}`;
+}
+
+// entry: { body, version } atau entry L1; version null = tanpa ETag
+async function sendTodosBody(req, res, entry, encoding) {
+  const timing = requestTiming.getStore();
+  if (timing) timing.serializeStart ??= process.hrtime.bigint();
+
+  if (entry.version !== null) {
+    res.set('ETag', todosEtag(entry.version, encoding));
+    if (req.fresh) return res.status(304).end();
+  }
+
+  let body = entry.body;
+  if (encoding !== 'identity') {
+    body = entry.encoded?.[encoding];
+    if (!body) {
+      body = await compressBody(entry.body, encoding);
+      if (entry.encoded) l1Cache.setEncoded(entry, encoding, body);
+    }
+    res.set('Content-Encoding', encoding);
+  }
+  res.type('application/json');
+
+  if (entry.version === null) {
+    // res.send membuat ETag sendiri (setting etag Express) dari bytes body; versi
+    // tidak diketahui = tanpa ETag, jadi body dikirim langsung lewat res.end
+    res.set('Content-Length', String(body.length));
+    return res.end(req.method === 'HEAD' ? undefined : body);
+  }
+  res.send(body);
+}
+
+// Dependency checks dijalankan di background dan hasilnya disimpan di memory,
+// sehingga /health tidak memakai koneksi database/Redis di setiap probe
+const HEALTH_CHECK_INTERVAL_MS = Number(process.env.HEALTH_CHECK_INTERVAL_MS || 5000);
+// Dependency yang menggantung dianggap unhealthy setelah timeout ini
+const HEALTH_CHECK_TIMEOUT_MS = Number(process.env.HEALTH_CHECK_TIMEOUT_MS || 2000);
+
+let dependencyHealth = null;
+let pendingDependencyCheck = null;
+
+// Satu check dalam satu waktu: /health?deep=1 yang bersamaan memakai check yang sama
+function checkDependencies() {
+  if (!pendingDependencyCheck) {
+    pendingDependencyCheck = runDependencyChecks().finally(() => {
+      pendingDependencyCheck = null;
+    });
+  }
+  return pendingDependencyCheck;
+}
+
+async function runDependencyChecks() {
+  // Database dan Redis dicek paralel: total waktu check <= HEALTH_CHECK_TIMEOUT_MS
+  const [database, redisPing] = await Promise.allSettled([
+    withTimeout(pool.query('SELECT 1'), HEALTH_CHECK_TIMEOUT_MS,
+      `Database check timed out after ${HEALTH_CHECK_TIMEOUT_MS}ms`),
+    redisClient && redisClient.isOpen
+      ? withTimeout(redisClient.ping(), HEALTH_CHECK_TIMEOUT_MS, `Redis check timed out after ${HEALTH_CHECK_TIMEOUT_MS}ms`)
+      : Promise.reject(new Error('Redis not connected'))
+  ]);
+  const checks = {
+    database: database.status === 'fulfilled' ? 'healthy' : 'unhealthy',
+    redis: redisPing.status === 'fulfilled' ? 'healthy' : 'unhealthy'
+  };
+
+  dependencyHealth = {
+    status: checks.database === 'healthy' && checks.redis === 'healthy' ? 'healthy' : 'unhealthy',
+    checks,
+    checkedAt: new Date().toISOString()
+  };
+  return dependencyHealth;
+}
+
+function refreshDependencies() {
+  // Check sebelumnya masih berjalan (dependency lambat): lewati tick ini
+  if (pendingDependencyCheck) return;
+  checkDependencies().catch((error) => logger.error('Error checking dependencies', errorFields(error)));
+}
+
+// Background check dimulai setelah Redis terkoneksi; check yang lebih awal akan
+// menyimpan redis: unhealthy dan /health menjawab 503 sampai tick berikutnya.
+// Sebelum itu dependencyHealth masih null sehingga /health mengecek langsung.
+redisConnected.then(() => {
+  refreshDependencies();
+  setInterval(refreshDependencies, HEALTH_CHECK_INTERVAL_MS).unref();
+});
+
+// Health check endpoint (?deep=1 untuk cek dependency secara synchronous)
+app.get('/health', async (req, res) => {
+  const deep = req.query.deep === '1' || req.query.deep === 'true';
+  const dependencies = deep || !dependencyHealth ? await checkDependencies() : dependencyHealth;
+
+  const health = {
+    status: dependencies.status,
+    instance: process.env.INSTANCE_NAME || 'unknown',
+    hostname: os.hostname(),
+    pid: process.pid,
+    timestamp: new Date().toISOString(),
+    uptime: process.uptime(),
+    memory: process.memoryUsage(),
+    checks: dependencies.checks,
+    checkedAt: dependencies.checkedAt,
+    deep
+  };
 
   const statusCode = health.status === 'healthy' ? 200 : 503;
   res.status(statusCode).json(health);
 });
 
-// Readiness probe endpoint
+// Metrics endpoint (pool saturation)
+app.get('/metrics', (req, res) => {
+  res.json({
+    instance: process.env.INSTANCE_NAME || 'unknown',
+    timestamp: new Date().toISOString(),
+    pool: getPoolStats(),
+    dependencies: getDependencyStats(),
+    routes: getRouteLatencyStats(),
+    preparedStatements: USE_PREPARED_STATEMENTS,
+    logLevel: logger.levelName
+  });
+});
+
+// Readiness probe endpoint (hostname/pid membedakan replica Swarm, lihat /live)
 app.get('/ready', async (req, res) => {
   try {
     // Check if database is ready
-    await pool.query('SELECT 1');
+    await withTimeout(pool.query('SELECT 1'), HEALTH_CHECK_TIMEOUT_MS,
+      `Database check timed out after ${HEALTH_CHECK_TIMEOUT_MS}ms`);
     
     // Check if Redis is ready
     if (redisClient && redisClient.isOpen) {
-      await redisClient.ping();
+      await withTimeout(redisClient.ping(), HEALTH_CHECK_TIMEOUT_MS,
+        `Redis check timed out after ${HEALTH_CHECK_TIMEOUT_MS}ms`);
     } else {
       return res.status(503).json({ status: 'not ready', reason: 'Redis not connected' });
     }
@@ -101,6 +811,8 @@ app.get('/ready', async (req, res) => {
     res.status(200).json({ 
       status: 'ready',
       instance: process.env.INSTANCE_NAME || 'unknown',
+      hostname: os.hostname(),
+      pid: process.pid,
       timestamp: new Date().toISOString()
     });
   } catch (error) {
@@ -108,101 +820,560 @@ app.get('/ready', async (req, res) => {
       status: 'not ready', 
       reason: error.message,
       instance: process.env.INSTANCE_NAME || 'unknown',
+      hostname: os.hostname(),
+      pid: process.pid,
       timestamp: new Date().toISOString()
     });
   }
 });
 
 // Liveness probe endpoint (simpler check)
+// memoryUsage murah (tanpa cek dependency), dipakai tests/memory_trend.py untuk
+// deteksi leak per replica; hostname = container id, membedakan replica Swarm
+// yang berbagi INSTANCE_NAME
 app.get('/live', (req, res) => {
   res.status(200).json({ 
     status: 'alive',
     instance: process.env.INSTANCE_NAME || 'unknown',
+    hostname: os.hostname(),
+    pid: process.pid,
     timestamp: new Date().toISOString(),
-    uptime: process.uptime()
+    uptime: process.uptime(),
+    memory: process.memoryUsage()
   });
 });
 
 async function getAllTodos() {
-  const result = await pool.query('SELECT * FROM todos ORDER BY created_at DESC');
+  const result = await preparedQuery('todos-get-all', 'SELECT * FROM todos ORDER BY created_at DESC');
   return result.rows;
 }
 
-// Get all todos (dengan caching)
-app.get('/todos', async (req, res) => {
+// Cache stampede protection
+const CACHE_LOCK_TTL_MS = 5000;   // lock otomatis lepas jika holder crash
+const CACHE_LOCK_WAIT_MS = 50;    // interval polling cache saat menunggu holder
+const CACHE_LOCK_MAX_WAITS = 40;  // total tunggu ~2 detik sebelum fallback ke DB
+
+const RELEASE_LOCK_SCRIPT = `
+if redis.call('get', KEYS[1]) == ARGV[1] then
+  return redis.call('del', KEYS[1])
+end
+return 0`;
+
+// Single-flight per instance: request bersamaan berbagi satu promise
+const inflightLoads = new Map();
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// Cache miss todos:all: hanya satu request per instance (single-flight) dan
+// satu instance di seluruh cluster (Redis lock) yang menjalankan query;
+// sisanya menunggu cache terisi.
+async function loadAllTodosCoalesced() {
+  if (inflightLoads.has('todos:all')) {
+    const { json } = await inflightLoads.get('todos:all');
+    return { source: 'coalesced', json };
+  }
+
+  const load = loadAllTodosWithLock();
+  inflightLoads.set('todos:all', load);
   try {
-    // Cek cache terlebih dahulu
-    const cached = await redisClient.get('todos:all');
+    return await load;
+  } finally {
+    inflightLoads.delete('todos:all');
+  }
+}
+
+async function loadAllTodosWithLock() {
+  const lockKey = 'todos:all:lock';
+  const token = `${process.env.INSTANCE_NAME || 'unknown'}:${process.pid}:${Date.now()}:${Math.random()}`;
+  const acquired = await cacheRead('acquire todos:all lock',
+    () => redisClient.set(lockKey, token, { NX: true, PX: CACHE_LOCK_TTL_MS }), REDIS_FAILED);
+
+  // Redis lambat/tidak tersedia: read-through ke Postgres tanpa lock dan tanpa mengisi cache
+  if (acquired === REDIS_FAILED) {
+    return { source: 'database', json: JSON.stringify(await getAllTodos()) };
+  }
+
+  if (acquired) {
+    try {
+      const versionBefore = await cacheRead('get todos:version', () => redisClient.get('todos:version'), REDIS_FAILED);
+      const todos = await getAllTodos();
+      const serializeStart = process.hrtime.bigint();
+      const json = JSON.stringify(todos);
+      addTiming(requestTiming.getStore(), 'serialize', elapsedMs(serializeStart));
+
+      if (versionBefore !== REDIS_FAILED) {
+        await cacheWrite('store todos', () => storeCachedTodos(todos, json, versionBefore));
+      }
+      return { source: 'database', json };
+    } finally {
+      await cacheWrite('release todos:all lock',
+        () => redisClient.eval(RELEASE_LOCK_SCRIPT, { keys: [lockKey], arguments: [token] }), { force: true });
+    }
+  }
+
+  // Instance lain sedang mengisi cache, tunggu hasilnya (berhenti jika Redis degraded)
+  for (let i = 0; i < CACHE_LOCK_MAX_WAITS && redisAvailable(); i++) {
+    await sleep(CACHE_LOCK_WAIT_MS);
+    const cached = await readCachedTodos();
     if (cached) {
-      return res.json({
-        source: 'cache',
-        instance: process.env.INSTANCE_NAME,
-        data: JSON.parse(cached)
-      });
+      return { source: 'cache', json: cached };
     }
+  }
 
-    // Jika tidak ada di cache, ambil dari database
-    const todos = await getAllTodos();
-    
-    // Simpan ke cache selama 60 detik
-    await redisClient.setEx('todos:all', 60, JSON.stringify(todos));
-    
-    res.json({
-      source: 'database',
+  // Holder terlalu lama atau cache langsung di-invalidate lagi: ambil sendiri
+  const json = JSON.stringify(await getAllTodos());
+  return { source: 'database', json };
+}
+
+// Cache mode untuk list todos:
+// - invalidate     : todos:all (JSON utuh) dihapus setiap ada write
+// - write-through  : sorted set todos:index (score = created_at) + key todo:<id>
+//                    per todo, di-update langsung oleh setiap write
+const CACHE_MODE = process.env.CACHE_MODE === 'write-through' ? 'write-through' : 'invalidate';
+
+// Index write-through dibangun ulang dari database setelah TTL ini (rekonsiliasi berkala).
+// Key todo:<id> memakai TTL yang sama, supaya key yang terlewat invalidation tidak menetap.
+const CACHE_INDEX_TTL_SECONDS = Number(process.env.CACHE_INDEX_TTL_SECONDS || 300);
+
+// Baca seluruh index dalam satu round trip; nil jika index belum siap atau ada
+// key todo:<id> yang sudah expire (list tidak lengkap = cache miss, index dibangun ulang)
+const READ_INDEX_SCRIPT = `
+if redis.call('exists', KEYS[2]) == 0 then
+  return false
+end
+local ids = redis.call('zrevrange', KEYS[1], 0, -1)
+local todos = {}
+for i, id in ipairs(ids) do
+  local todo = redis.call('get', 'todo:' .. id)
+  if not todo then
+    return false
+  end
+  todos[#todos + 1] = todo
+end
+return todos`;
+
+// Bangun ulang index hanya jika todos:version tidak berubah sejak snapshot diambil;
+// write yang terjadi setelahnya akan menerapkan perubahannya sendiri ke index
+const REBUILD_INDEX_SCRIPT = `
+if (redis.call('get', KEYS[1]) or '') ~= ARGV[1] then
+  return 0
+end
+redis.call('del', KEYS[2])
+for i = 3, #ARGV, 3 do
+  redis.call('zadd', KEYS[2], ARGV[i], ARGV[i + 1])
+  redis.call('set', 'todo:' .. ARGV[i + 1], ARGV[i + 2], 'EX', ARGV[2])
+end
+redis.call('setex', KEYS[3], ARGV[2], '1')
+return 1`;
+
+// Simpan todos:all hanya jika todos:version belum berubah; cek dan set dalam satu
+// script supaya write yang bersamaan tidak bisa menyelip di antaranya
+const STORE_IF_VERSION_SCRIPT = `
+if (redis.call('get', KEYS[1]) or '') ~= ARGV[1] then
+  return 0
+end
+redis.call('setex', KEYS[2], ARGV[2], ARGV[3])
+return 1`;
+
+// Ambil list todos dari Redis sebagai JSON string (null jika cache kosong)
+async function readCachedTodos() {
+  if (CACHE_MODE !== 'write-through') {
+    return cacheRead('get todos:all', () => redisClient.get('todos:all'));
+  }
+
+  const todos = await cacheRead('read todos:index', () => redisClient.eval(READ_INDEX_SCRIPT, {
+    keys: ['todos:index', 'todos:index:ready']
+  }));
+  return todos ? `[${todos.join(',')}]` : null;
+}
+
+// Simpan hasil query ke Redis, kecuali ada write selama query (data sudah basi)
+async function storeCachedTodos(todos, json, versionBefore) {
+  if (CACHE_MODE !== 'write-through') {
+    await redisClient.eval(STORE_IF_VERSION_SCRIPT, {
+      keys: ['todos:version', 'todos:all'],
+      arguments: [versionBefore || '', '60', json]
+    });
+    return;
+  }
+
+  const args = [versionBefore || '', String(CACHE_INDEX_TTL_SECONDS)];
+  for (const todo of todos) {
+    args.push(String(new Date(todo.created_at).getTime()), String(todo.id), JSON.stringify(todo));
+  }
+  await redisClient.eval(REBUILD_INDEX_SCRIPT, {
+    keys: ['todos:version', 'todos:index', 'todos:index:ready'],
+    arguments: args
+  });
+}
+
+// Terapkan write ke cache. Mode invalidate menghapus cache; mode
+// write-through meng-update index sehingga read berikutnya tetap hit.
+async function applyTodoWrite(operation, todo) {
+  return applyTodoWrites(operation, [todo]);
+}
+
+// Versi batch: satu invalidation / satu MULTI untuk banyak todo sekaligus.
+// L1 lokal selalu dikosongkan; update Redis tetap dikirim walau Redis degraded
+// (supaya cache tidak basi), tetapi response tidak menunggu lebih dari REDIS_TIMEOUT_MS.
+async function applyTodoWrites(operation, todos) {
+  l1Cache.clear();
+  await cacheWrite(`${operation} cache update`, () => writeTodosToCache(operation, todos), { force: true });
+}
+
+async function writeTodosToCache(operation, todos) {
+  await updateStatsCounters(operation, todos);
+
+  if (CACHE_MODE !== 'write-through') {
+    return invalidateTodosCache();
+  }
+
+  const multi = redisClient.multi();
+  for (const todo of todos) {
+    if (operation === 'delete') {
+      multi.zRem('todos:index', String(todo.id));
+      multi.del(`todo:${todo.id}`);
+    } else {
+      const { previous_completed, ...row } = todo;
+      multi.zAdd('todos:index', { score: new Date(row.created_at).getTime(), value: String(row.id) });
+      multi.setEx(`todo:${row.id}`, CACHE_INDEX_TTL_SECONDS, JSON.stringify(row));
+    }
+  }
+  multi.incr('todos:version');
+  multi.publish(CACHE_INVALIDATION_CHANNEL, 'todos');
+  await multi.exec();
+}
+
+// Pagination settings
+const DEFAULT_PAGE_SIZE = 50;
+const MAX_PAGE_SIZE = 200;
+
+// Cursor = posisi (created_at, id) dari item terakhir di halaman sebelumnya.
+// created_at disimpan sebagai text dari Postgres supaya presisi mikrodetik tidak hilang.
+function encodeCursor(createdAt, id) {
+  return Buffer.from(`${createdAt}|${id}`).toString('base64url');
+}
+
+function decodeCursor(cursor) {
+  const [createdAt, id] = Buffer.from(cursor, 'base64url').toString().split('|');
+  if (!createdAt || !/^\d+$/.test(id || '') || Number.isNaN(Date.parse(createdAt))) {
+    return null;
+  }
+  return { createdAt, id: Number(id) };
+}
+
+// Keyset pagination di atas idx_todos_created_at (dan idx_todos_completed untuk filter)
+async function getTodosPage({ limit, cursor, completed }) {
+  const conditions = [];
+  const params = [];
+
+  if (completed !== undefined) {
+    params.push(completed);
+    conditions.push(`completed = $${params.length}`);
+  }
+  if (cursor) {
+    params.push(cursor.createdAt, cursor.id);
+    conditions.push(`(created_at, id) < ($${params.length - 1}::timestamp, $${params.length}::int)`);
+  }
+
+  params.push(limit + 1);
+  const where = conditions.length ? `WHERE ${conditions.join(' AND ')}` : '';
+  // Satu prepared statement per kombinasi filter (maksimal 4 variasi)
+  const result = await preparedQuery(
+    `todos-page${completed !== undefined ? '-completed' : ''}${cursor ? '-cursor' : ''}`,
+    `SELECT *, created_at::text AS cursor_created_at FROM todos ${where} ORDER BY created_at DESC, id DESC LIMIT $${params.length}`,
+    params
+  );
+
+  // Ambil limit + 1 baris untuk tahu apakah masih ada halaman berikutnya
+  const hasMore = result.rows.length > limit;
+  const rows = result.rows.slice(0, limit);
+  const last = rows[rows.length - 1];
+  const nextCursor = hasMore ? encodeCursor(last.cursor_created_at, last.id) : null;
+
+  return {
+    data: rows.map(({ cursor_created_at, ...todo }) => todo),
+    nextCursor
+  };
+}
+
+// Semua page cache memakai versi ini di key-nya; write cukup menaikkan versi
+// dan page lama akan expire sendiri lewat TTL. L1 cache di semua replica
+// dikosongkan lewat pub/sub.
+async function invalidateTodosCache() {
+  l1Cache.clear();
+  // INCR dulu dalam satu MULTI: loader yang memeriksa versi (STORE_IF_VERSION_SCRIPT)
+  // tidak bisa menyelip di antara DEL dan INCR lalu menyimpan snapshot lama
+  await redisClient.multi()
+    .incr('todos:version')
+    .del('todos:all')
+    .publish(CACHE_INVALIDATION_CHANNEL, 'todos')
+    .exec();
+}
+
+// Get todos per halaman: GET /todos?limit=50&cursor=...&completed=true
+async function getPaginatedTodos(req, res) {
+  const limit = req.query.limit === undefined ? DEFAULT_PAGE_SIZE : Number(req.query.limit);
+  if (!Number.isInteger(limit) || limit < 1 || limit > MAX_PAGE_SIZE) {
+    return res.status(400).json({ error: `limit must be an integer between 1 and ${MAX_PAGE_SIZE}` });
+  }
+
+  let completed;
+  if (req.query.completed !== undefined) {
+    if (req.query.completed !== 'true' && req.query.completed !== 'false') {
+      return res.status(400).json({ error: 'completed must be true or false' });
+    }
+    completed = req.query.completed === 'true';
+  }
+
+  let cursor = null;
+  if (req.query.cursor) {
+    cursor = decodeCursor(String(req.query.cursor));
+    if (!cursor) {
+      return res.status(400).json({ error: 'Invalid cursor' });
+    }
+  }
+
+  // Versi tidak terbaca (Redis degraded): langsung ke database tanpa cache halaman
+  const storedVersion = await cacheRead('get todos:version', () => redisClient.get('todos:version'), REDIS_FAILED);
+  const version = storedVersion === REDIS_FAILED ? null : storedVersion || '0';
+  const cacheKey = `todos:v${version}:page:${completed ?? 'all'}:${limit}:${req.query.cursor || 'first'}`;
+
+  const cached = version === null ? null : await cacheRead('get page', () => redisClient.get(cacheKey));
+  if (cached) {
+    const page = JSON.parse(cached);
+    return res.json({
+      source: 'cache',
       instance: process.env.INSTANCE_NAME,
-      data: todos
+      data: page.data,
+      pagination: { limit, nextCursor: page.nextCursor }
     });
+  }
+
+  const page = await getTodosPage({ limit, cursor, completed });
+  if (version !== null) {
+    await cacheWrite('store page', () => redisClient.setEx(cacheKey, 60, JSON.stringify(page)));
+  }
+
+  res.json({
+    source: 'database',
+    instance: process.env.INSTANCE_NAME,
+    data: page.data,
+    pagination: { limit, nextCursor: page.nextCursor }
+  });
+}
+
+// Get all todos (dengan caching)
+app.get('/todos', async (req, res) => {
+  try {
+    // Pakai pagination jika client mengirim parameter halaman/filter
+    const { limit, cursor, completed } = req.query;
+    if (limit !== undefined || cursor !== undefined || completed !== undefined) {
+      return await getPaginatedTodos(req, res);
+    }
+
+    const encoding = negotiateEncoding(req);
+    res.vary('Accept-Encoding');
+    res.set('X-Cache-Mode', CACHE_MODE);
+
+    // Cek L1 cache (memory) terlebih dahulu: response sudah dalam bentuk bytes
+    const l1Entry = l1Cache.get('todos:all');
+    if (l1Entry) {
+      return await sendTodosBody(req, res, l1Entry, encoding);
+    }
+
+    // Catat generation sebelum ke Redis supaya invalidation di tengah jalan
+    // tidak membuat L1 menyimpan data basi
+    const generation = l1Cache.generation;
+
+    // Versi dibaca sebelum data, jadi data yang dikirim minimal sebaru ETag-nya.
+    // Client dengan ETag versi ini langsung dapat 304 tanpa membaca data.
+    // Redis degraded: versi tidak diketahui, response dikirim tanpa ETag.
+    const version = await readTodosVersion();
+    if (version !== null) {
+      res.set('ETag', todosEtag(version, encoding));
+      if (req.fresh) {
+        return res.status(304).end();
+      }
+    }
+
+    // Cek Redis cache
+    const cached = await readCachedTodos();
+    if (cached) {
+      l1Cache.set('todos:all', buildTodosBody('memory', cached), generation, version);
+      return await sendTodosBody(req, res, { body: buildTodosBody('cache', cached), version }, encoding);
+    }
+
+    // Jika tidak ada di cache, ambil dari database (dengan proteksi stampede)
+    const { source, json } = await loadAllTodosCoalesced();
+
+    // Load yang di-join (coalesced) bisa dimulai sebelum versi dibaca: tanpa ETag
+    const loadedVersion = source === 'coalesced' ? null : version;
+    l1Cache.set('todos:all', buildTodosBody('memory', json), generation, loadedVersion);
+    await sendTodosBody(req, res, { body: buildTodosBody(source, json), version: loadedVersion }, encoding);
   } catch (error) {
-    console.error('Error fetching todos:', error);
+    if (error instanceof PoolSaturatedError) return sendOverloaded(res);
+    logger.error('Error fetching todos', errorFields(error));
     res.status(500).json({ error: 'Internal server error' });
   }
 });
 
 // Create new todo
 app.post('/todos', async (req, res) => {
-  console.log('POST /todos request received');
-  console.log('Request body:', req.body);
-  console.log('Request headers:', req.headers);
-  
+  // Endpoint panas: detail request hanya di-log untuk sebagian request (sampling)
+  const debugSample = logger.sampled('debug');
+
   try {
     const { title, completed, description = '' } = req.body;
     
-    console.log('Parsed data:', { title, completed, description, titleType: typeof title, completedType: typeof completed });
+    if (debugSample) {
+      logger.debug('POST /todos request received', {
+        body: req.body,
+        titleType: typeof title,
+        completedType: typeof completed
+      });
+    }
     
     if (!title) {
-      console.log('Title validation failed');
+      if (debugSample) logger.debug('Title validation failed');
       return res.status(400).json({ error: 'Title is required' });
     }
 
-    console.log('Creating todo...');
-    const result = await pool.query(
+    const result = await preparedQuery(
+      'todos-insert',
       'INSERT INTO todos (title, completed, description, created_at, updated_at) VALUES ($1, $2, $3, NOW(), NOW()) RETURNING *',
       [title, Boolean(completed), description]
     );
-    console.log('Todo created:', result.rows[0]);
+    if (debugSample) logger.debug('Todo created', { todo: result.rows[0] });
 
-    // Invalidate cache
-    await redisClient.del('todos:all');
+    // Update cache
+    await applyTodoWrite('create', result.rows[0]);
 
     res.status(201).json({
       instance: process.env.INSTANCE_NAME,
       data: result.rows[0]
     });
   } catch (error) {
-    console.error('Error creating todo:', error);
-    console.error('Error stack:', error.stack);
+    if (error instanceof PoolSaturatedError) return sendOverloaded(res);
+    logger.error('Error creating todo', errorFields(error));
     res.status(500).json({ error: 'Internal server error', details: error.message });
   }
 });
 
+// Batas jumlah item per request bulk
+const MAX_BULK_SIZE = 1000;
+
+function validateBulkItems(items) {
+  if (!Array.isArray(items) || items.length === 0) {
+    return 'Request body must contain a non-empty todos array';
+  }
+  if (items.length > MAX_BULK_SIZE) {
+    return `At most ${MAX_BULK_SIZE} todos per request`;
+  }
+  return null;
+}
+
+// Bulk create: POST /todos/bulk { todos: [{ title, completed, description }, ...] }
+// Satu INSERT multi-row (via unnest) dan satu cache invalidation untuk seluruh batch
+app.post('/todos/bulk', async (req, res) => {
+  try {
+    const items = Array.isArray(req.body) ? req.body : req.body?.todos;
+    const validationError = validateBulkItems(items);
+    if (validationError) {
+      return res.status(400).json({ error: validationError });
+    }
+
+    const invalidIndex = items.findIndex((item) => !item || !item.title);
+    if (invalidIndex !== -1) {
+      return res.status(400).json({ error: `Title is required (item ${invalidIndex})` });
+    }
+
+    const result = await preparedQuery(
+      'todos-bulk-insert',
+      `INSERT INTO todos (title, completed, description, created_at, updated_at)
+       SELECT title, completed, description, NOW(), NOW()
+       FROM unnest($1::varchar[], $2::boolean[], $3::text[]) AS t(title, completed, description)
+       RETURNING *`,
+      [
+        items.map((item) => item.title),
+        items.map((item) => Boolean(item.completed)),
+        items.map((item) => item.description ?? '')
+      ]
+    );
+
+    // Update cache
+    await applyTodoWrites('create', result.rows);
+
+    res.status(201).json({
+      instance: process.env.INSTANCE_NAME,
+      count: result.rows.length,
+      data: result.rows
+    });
+  } catch (error) {
+    if (error instanceof PoolSaturatedError) return sendOverloaded(res);
+    logger.error('Error bulk creating todos', errorFields(error));
+    res.status(500).json({ error: 'Internal server error' });
+  }
+});
+
+// Bulk update: PATCH /todos/bulk { todos: [{ id, completed }, ...] }
+app.patch('/todos/bulk', async (req, res) => {
+  try {
+    const items = Array.isArray(req.body) ? req.body : req.body?.todos;
+    const validationError = validateBulkItems(items);
+    if (validationError) {
+      return res.status(400).json({ error: validationError });
+    }
+
+    const invalidIndex = items.findIndex((item) => !item || !Number.isInteger(Number(item.id)) || typeof item.completed !== 'boolean');
+    if (invalidIndex !== -1) {
+      return res.status(400).json({ error: `Integer id and boolean completed are required (item ${invalidIndex})` });
+    }
+
+    const ids = items.map((item) => Number(item.id));
+    const result = await preparedQuery(
+      'todos-bulk-update',
+      `UPDATE todos SET completed = t.completed, updated_at = NOW()
+       FROM unnest($1::int[], $2::boolean[]) AS t(id, completed),
+            (SELECT id, completed FROM todos WHERE id = ANY($1::int[]) FOR UPDATE) AS previous
+       WHERE todos.id = t.id AND previous.id = t.id
+       RETURNING todos.*, previous.completed AS previous_completed`,
+      [ids, items.map((item) => item.completed)]
+    );
+
+    // Update cache
+    if (result.rows.length > 0) {
+      await applyTodoWrites('update', result.rows);
+    }
+
+    const todos = result.rows.map(({ previous_completed, ...todo }) => todo);
+    const updatedIds = new Set(todos.map((todo) => todo.id));
+    res.json({
+      instance: process.env.INSTANCE_NAME,
+      count: todos.length,
+      notFound: ids.filter((id) => !updatedIds.has(id)),
+      data: todos
+    });
+  } catch (error) {
+    if (error instanceof PoolSaturatedError) return sendOverloaded(res);
+    logger.error('Error bulk updating todos', errorFields(error));
+    res.status(500).json({ error: 'Internal server error' });
+  }
+});
+
 // Update todo status
 app.patch('/todos/:id', async (req, res) => {
   try {
     const { id } = req.params;
     const { completed } = req.body;
 
-    const result = await pool.query(
-      'UPDATE todos SET completed = $1, updated_at = NOW() WHERE id = $2 RETURNING *',
+    // previous_completed dipakai untuk meng-update counter /stats
+    const result = await preparedQuery(
+      'todos-update-completed',
+      `UPDATE todos SET completed = $1, updated_at = NOW()
+       FROM (SELECT id, completed FROM todos WHERE id = $2 FOR UPDATE) AS previous
+       WHERE todos.id = previous.id
+       RETURNING todos.*, previous.completed AS previous_completed`,
       [completed, id]
     );
 
@@ -210,15 +1381,17 @@ app.patch('/todos/:id', async (req, res) => {
       return res.status(404).json({ error: 'Todo not found' });
     }
 
-    // Invalidate cache
-    await redisClient.del('todos:all');
+    // Update cache
+    const { previous_completed, ...todo } = result.rows[0];
+    await applyTodoWrite('update', { ...todo, previous_completed });
 
     res.json({
       instance: process.env.INSTANCE_NAME,
-      data: result.rows[0]
+      data: todo
     });
   } catch (error) {
-    console.error('Error updating todo:', error);
+    if (error instanceof PoolSaturatedError) return sendOverloaded(res);
+    logger.error('Error updating todo', errorFields(error));
     res.status(500).json({ error: 'Internal server error' });
   }
 });
@@ -228,46 +1401,153 @@ app.delete('/todos/:id', async (req, res) => {
   try {
     const { id } = req.params;
 
-    const result = await pool.query('DELETE FROM todos WHERE id = $1 RETURNING *', [id]);
+    const result = await preparedQuery('todos-delete', 'DELETE FROM todos WHERE id = $1 RETURNING *', [id]);
 
     if (result.rows.length === 0) {
       return res.status(404).json({ error: 'Todo not found' });
     }
 
-    // Invalidate cache
-    await redisClient.del('todos:all');
+    // Update cache
+    await applyTodoWrite('delete', result.rows[0]);
 
     res.json({
       instance: process.env.INSTANCE_NAME,
       message: 'Todo deleted successfully'
     });
   } catch (error) {
-    console.error('Error deleting todo:', error);
+    if (error instanceof PoolSaturatedError) return sendOverloaded(res);
+    logger.error('Error deleting todo', errorFields(error));
     res.status(500).json({ error: 'Internal server error' });
   }
 });
 
+// Statistics: counter di Redis hash todos:stats di-update setiap write,
+// dan direkonsiliasi dengan COUNT(*) secara berkala
+const STATS_RECONCILE_MS = Number(process.env.STATS_RECONCILE_MS || 60000);
+
+// Hanya increment jika hash sudah ada; jika belum, /stats akan mengisinya dari database
+const INCREMENT_STATS_SCRIPT = `
+if redis.call('exists', KEYS[1]) == 0 then
+  return 0
+end
+redis.call('hincrby', KEYS[1], 'total', ARGV[1])
+redis.call('hincrby', KEYS[1], 'completed', ARGV[2])
+redis.call('hincrby', KEYS[1], 'pending', ARGV[3])
+return 1`;
+
+async function queryStats() {
+  const result = await preparedQuery('todos-stats', `
+    SELECT 
+      COUNT(*) as total,
+      COUNT(*) FILTER (WHERE completed = true) as completed,
+      COUNT(*) FILTER (WHERE completed = false) as pending
+    FROM todos
+  `);
+  return result.rows[0];
+}
+
+function statsBucket(completed) {
+  if (completed === true) return 'completed';
+  if (completed === false) return 'pending';
+  return null; // completed NULL tidak dihitung di completed maupun pending
+}
+
+async function updateStatsCounters(operation, todos) {
+  const delta = { total: 0, completed: 0, pending: 0 };
+
+  for (const todo of todos) {
+    if (operation === 'create') {
+      delta.total++;
+      if (statsBucket(todo.completed)) delta[statsBucket(todo.completed)]++;
+    } else if (operation === 'delete') {
+      delta.total--;
+      if (statsBucket(todo.completed)) delta[statsBucket(todo.completed)]--;
+    } else if (operation === 'update') {
+      if (statsBucket(todo.previous_completed)) delta[statsBucket(todo.previous_completed)]--;
+      if (statsBucket(todo.completed)) delta[statsBucket(todo.completed)]++;
+    }
+  }
+
+  if (delta.total === 0 && delta.completed === 0 && delta.pending === 0) return;
+
+  await redisClient.eval(INCREMENT_STATS_SCRIPT, {
+    keys: ['todos:stats'],
+    arguments: [String(delta.total), String(delta.completed), String(delta.pending)]
+  });
+}
+
+// Rekonsiliasi berkala; lock memastikan hanya satu replica per interval yang menjalankan COUNT(*)
+async function reconcileStats() {
+  if (!redisClient || !redisClient.isOpen) return;
+
+  const acquired = await redisClient.set('todos:stats:reconcile', process.env.INSTANCE_NAME || 'unknown', {
+    NX: true,
+    PX: STATS_RECONCILE_MS
+  });
+  if (!acquired) return;
+
+  await redisClient.hSet('todos:stats', await queryStats());
+}
+
+setInterval(() => {
+  reconcileStats().catch((error) => logger.error('Error reconciling stats', errorFields(error)));
+}, STATS_RECONCILE_MS).unref();
+
 // Statistics endpoint
 app.get('/stats', async (req, res) => {
   try {
-    const result = await pool.query(`
-      SELECT 
-        COUNT(*) as total,
-        COUNT(*) FILTER (WHERE completed = true) as completed,
-        COUNT(*) FILTER (WHERE completed = false) as pending
-      FROM todos
-    `);
+    const cached = await cacheRead('get todos:stats', () => redisClient.hGetAll('todos:stats'));
+    if (cached?.total !== undefined) {
+      return res.json({
+        source: 'cache',
+        instance: process.env.INSTANCE_NAME,
+        stats: { total: cached.total, completed: cached.completed, pending: cached.pending }
+      });
+    }
+
+    const stats = await queryStats();
+    await cacheWrite('store todos:stats', () => redisClient.hSet('todos:stats', stats));
 
     res.json({
+      source: 'database',
       instance: process.env.INSTANCE_NAME,
-      stats: result.rows[0]
+      stats
     });
   } catch (error) {
-    console.error('Error fetching stats:', error);
+    if (error instanceof PoolSaturatedError) return sendOverloaded(res);
+    logger.error('Error fetching stats', errorFields(error));
     res.status(500).json({ error: 'Internal server error' });
   }
 });
 
-app.listen(PORT, () => {
-  console.log(`${process.env.INSTANCE_NAME} running on port ${PORT}`);
+const server = app.listen(PORT, () => {
+  logger.info(`${process.env.INSTANCE_NAME} running on port ${PORT}`);
 });
+
+// Graceful shutdown: berhenti menerima koneksi baru, selesaikan request yang
+// sedang berjalan, lalu tutup koneksi Postgres/Redis. Dipakai juga oleh
+// cluster.js saat rolling restart worker.
+const SHUTDOWN_TIMEOUT_MS = Number(process.env.SHUTDOWN_TIMEOUT_MS || 10000);
+let shuttingDown = false;
+
+function shutdown(signal) {
+  if (shuttingDown) return;
+  shuttingDown = true;
+  logger.info('Shutting down', { signal });
+
+  // Paksa keluar jika masih ada request yang menggantung
+  setTimeout(() => process.exit(1), SHUTDOWN_TIMEOUT_MS).unref();
+
+  server.close(async () => {
+    await Promise.allSettled([
+      pool.end(),
+      redisSubscriber && redisSubscriber.isOpen ? redisSubscriber.quit() : null,
+      redisClient && redisClient.isOpen ? redisClient.quit() : null
+    ]);
+    process.exit(0);
+  });
+  server.closeIdleConnections();
+}
+
+process.on('SIGTERM', () => shutdown('SIGTERM'));
+process.on('SIGINT', () => shutdown('SIGINT'));
@@ -8,18 +8,24 @@ import time
 from concurrent.futures import ThreadPoolExecutor
 import random
 
-def test_api_direct(thread_id, results, port=3000):
+def test_api_direct(thread_id, results, port=3000, path="/health"):
     """Test API directly on port"""
     try:
         start = time.time()
-        response = requests.get(f"http://localhost:{port}/health", timeout=3)
+        response = requests.get(f"http://localhost:{port}{path}", timeout=3)
         end = time.time()
         
+        try:
+            instance = response.json().get("instance", "unknown")
+        except ValueError:
+            instance = "unknown"
+        
         results.append({
             "thread": thread_id,
             "status": response.status_code,
             "response_time": end - start,
-            "server": response.headers.get('Server', 'Unknown')
+            "server": response.headers.get('Server', 'Unknown'),
+            "instance": instance
         })
     except Exception as e:
         results.append({
@@ -28,22 +34,24 @@ def test_api_direct(thread_id, results, port=3000):
             "error": str(e)
         })
 
-def run_direct_test(concurrent_requests=20, port=3000):
+def run_direct_test(concurrent_requests=20, port=3000, path="/health"):
     """Run direct API test"""
     print(f"🚀 Direct API Test - {concurrent_requests} requests")
-    print(f"   Target: http://localhost:{port}/health")
+    print(f"   Target: http://localhost:{port}{path}")
     print("-" * 40)
     
     results = []
     
+    test_start = time.time()
     with ThreadPoolExecutor(max_workers=concurrent_requests) as executor:
         futures = []
         for i in range(concurrent_requests):
-            future = executor.submit(test_api_direct, i, results, port)
+            future = executor.submit(test_api_direct, i, results, port, path)
             futures.append(future)
         
         for future in futures:
             future.result()
+    wall_time = time.time() - test_start
     
     # Analyze results
     successful = sum(1 for r in results if r.get("status") == 200)
@@ -62,6 +70,7 @@ def run_direct_test(concurrent_requests=20, port=3000):
     print(f"   Total Requests: {len(results)}")
     print(f"   Successful: {successful} ({successful/len(results)*100:.1f}%)")
     print(f"   Failed: {failed} ({failed/len(results)*100:.1f}%)")
+    print(f"   Throughput: {successful/wall_time:.1f} req/s")
     print(f"   Response Time - Avg: {avg_time:.3f}s")
     print(f"   Response Time - Min: {min_time:.3f}s") 
     print(f"   Response Time - Max: {max_time:.3f}s")
@@ -69,13 +78,65 @@ def run_direct_test(concurrent_requests=20, port=3000):
     
     return results
 
+def run_sustained_test(concurrency=20, duration=10, port=3000, path="/health"):
+    """Kirim request tanpa jeda selama duration detik, hitung throughput per replica"""
+    results = []
+    end_time = time.time() + duration
+    
+    def worker(thread_id):
+        while time.time() < end_time:
+            test_api_direct(thread_id, results, port, path)
+    
+    test_start = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(worker, i) for i in range(concurrency)]:
+            future.result()
+    wall_time = time.time() - test_start
+    
+    per_instance = {}
+    for r in results:
+        if r.get("status") == 200:
+            per_instance.setdefault(r["instance"], []).append(r["response_time"])
+    
+    successful = sum(len(times) for times in per_instance.values())
+    print(f"   {path}: {successful/wall_time:.1f} req/s total, "
+          f"{len(results) - successful} failed")
+    for instance, times in sorted(per_instance.items()):
+        print(f"     {instance}: {len(times)/wall_time:.1f} req/s | "
+              f"Avg: {sum(times)/len(times)*1000:.1f}ms")
+    
+    return successful / wall_time
+
+def compare_health_modes(concurrency=20, duration=10, port=3000):
+    """Bandingkan /health (cached dependency checks) dengan /health?deep=1"""
+    print(f"🩺 Health Throughput Benchmark - {concurrency} concurrent, {duration}s per mode")
+    print(f"   Target: http://localhost:{port}")
+    print("-" * 40)
+    
+    cached_rps = run_sustained_test(concurrency, duration, port, "/health")
+    deep_rps = run_sustained_test(concurrency, duration, port, "/health?deep=1")
+    
+    if deep_rps > 0:
+        print(f"   Cached vs deep: {cached_rps/deep_rps:.1f}x throughput")
+    print("-" * 40)
+
 if __name__ == "__main__":
     print("🐳 Direct API Load Test")
     print("=" * 40)
+    print("1. Burst Test")
+    print("2. Health Throughput Benchmark (cached vs deep)")
+    print("=" * 40)
     
     try:
-        requests_num = int(input("Number of concurrent requests (default 20): ") or "20")
-        run_direct_test(requests_num)
+        choice = input("Select option (1-2, default 1): ").strip() or "1"
+        
+        if choice == "2":
+            concurrency = int(input("Concurrent workers (default 20): ") or "20")
+            duration = int(input("Duration per mode in seconds (default 10): ") or "10")
+            compare_health_modes(concurrency, duration)
+        else:
+            requests_num = int(input("Number of concurrent requests (default 20): ") or "20")
+            run_direct_test(requests_num)
         
     except KeyboardInterrupt:
         print("\n⏹️  Test interrupted")
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Generator Capacity Benchmark - batas kemampuan load generator sendiri
+Menjalankan request path setiap tester (tanpa think time) terhadap mock API
+in-process di localhost, lalu melaporkan RPS maksimum dan CPU client per request.
+Tidak butuh Docker stack.
+
+    python generator_benchmark.py --duration 5 --concurrency 1,4,16,32
+    python generator_benchmark.py --save before.json
+    python generator_benchmark.py --baseline before.json
+"""
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import direct_load_test
+import quick_load_test
+from load_test import LoadTester
+from mock_api_server import MockTodoAPI
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_tests_module(name):
+    """Import script dari tests/ (nama load_test bentrok dengan load_test.py di root)"""
+    # Script di tests/ meng-import modul sebelahnya (mis. fault_proxy)
+    tests_dir = os.path.join(ROOT, "tests")
+    if tests_dir not in sys.path:
+        sys.path.append(tests_dir)
+    spec = importlib.util.spec_from_file_location(f"tests_{name}", os.path.join(ROOT, "tests", f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def build_engines(api):
+    """Request path tiap tester, masing-masing satu request per panggilan"""
+    tests_load = load_tests_module("load_test")
+    tests_stress = load_tests_module("stress_test")
+
+    load_tester = LoadTester(base_url="http://127.0.0.1", port=api.port)
+    todo_load_tester = tests_load.TodoLoadTester(base_url=api.base_url)
+    stress_tester = tests_stress.TodoStressTester(base_url=api.base_url)
+    quick_results = []
+    direct_results = []
+
+    return {
+        "LoadTester.get_todos": load_tester.get_todos,
+        "LoadTester.create_todo": load_tester.create_todo,
+        "LoadTester.health_check": load_tester.health_check,
+        "TodoLoadTester GET /todos": lambda: todo_load_tester.make_request("GET", "/todos"),
+        "TodoStressTester GET /todos": lambda: stress_tester.make_request("GET", "/todos"),
+        "quick_health_test": lambda: quick_health(quick_results, api),
+        "test_api_direct": lambda: direct_load_test.test_api_direct(0, direct_results, api.port),
+    }
+
+
+def quick_health(results, api):
+    quick_load_test.quick_health_test(0, results, api.base_url)
+
+
+def run_engine(api, request, concurrency, duration):
+    """Jalankan request tanpa jeda dari `concurrency` thread selama `duration` detik"""
+    # Data mock di-reset supaya ukuran GET /todos sama untuk setiap engine
+    api.reset()
+    counts = [0] * concurrency
+    end_time = time.time() + duration
+
+    def worker(index):
+        while time.time() < end_time:
+            request()
+            counts[index] += 1
+
+    cpu_start = time.process_time()
+    mock_cpu_start = api.cpu_seconds
+    wall_start = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(worker, i) for i in range(concurrency)]:
+            future.result()
+    wall = time.time() - wall_start
+
+    # CPU proses dikurangi CPU thread handler mock = CPU yang dipakai client
+    client_cpu = time.process_time() - cpu_start - (api.cpu_seconds - mock_cpu_start)
+    total = sum(counts)
+    return {
+        "requests": total,
+        "rps": total / wall if wall > 0 else 0,
+        "cpu_ms_per_request": client_cpu / total * 1000 if total else 0
+    }
+
+
+def run_benchmark(duration=5, concurrency_levels=(1, 4, 16, 32), latency_ms=0.0, error_rate=0.0, engines=None):
+    print(f"🏎️  GENERATOR CAPACITY BENCHMARK")
+    print(f"   Duration per run: {duration}s | Concurrency: {', '.join(map(str, concurrency_levels))}")
+    print(f"   Mock latency: {latency_ms}ms | Mock error rate: {error_rate:.1%}")
+    print("-" * 70)
+
+    summary = {}
+    with MockTodoAPI(latency_ms=latency_ms, error_rate=error_rate) as api:
+        available = build_engines(api)
+        for name in engines or available:
+            runs = {}
+            for concurrency in concurrency_levels:
+                run = run_engine(api, available[name], concurrency, duration)
+                runs[concurrency] = run
+                print(f"   {name:28s} x{concurrency:<3d}: {run['rps']:8.1f} req/s | "
+                      f"{run['cpu_ms_per_request']:6.2f}ms CPU/request")
+
+            best = max(runs, key=lambda c: runs[c]["rps"])
+            summary[name] = {
+                "max_rps": runs[best]["rps"],
+                "best_concurrency": best,
+                "cpu_ms_per_request": runs[best]["cpu_ms_per_request"]
+            }
+            print()
+
+    print(f"📋 GENERATOR CEILING:")
+    for name, result in summary.items():
+        print(f"   {name:28s}: max {result['max_rps']:8.1f} req/s (x{result['best_concurrency']}) | "
+              f"{result['cpu_ms_per_request']:6.2f}ms CPU/request")
+    print("-" * 70)
+    return summary
+
+
+def compare_with_baseline(summary, baseline_file):
+    """Bandingkan dengan hasil benchmark sebelumnya (mis. sebelum perubahan tester)"""
+    with open(baseline_file) as f:
+        baseline = json.load(f)
+
+    print(f"📊 VS BASELINE ({baseline_file}):")
+    for name, result in summary.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]
+        change = (result["max_rps"] - before["max_rps"]) / before["max_rps"] * 100 if before["max_rps"] else 0
+        print(f"   {name:28s}: {before['max_rps']:8.1f} -> {result['max_rps']:8.1f} req/s ({change:+.1f}%) | "
+              f"CPU {before['cpu_ms_per_request']:.2f} -> {result['cpu_ms_per_request']:.2f}ms/request")
+    print("-" * 70)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the load generators against an in-process mock API')
+    parser.add_argument('--duration', type=float, default=5,
+                       help='Seconds per engine and concurrency level (default: 5)')
+    parser.add_argument('--concurrency', default='1,4,16,32',
+                       help='Comma-separated thread counts (default: 1,4,16,32)')
+    parser.add_argument('--latency-ms', type=float, default=0,
+                       help='Latency injected by the mock API (default: 0)')
+    parser.add_argument('--error-rate', type=float, default=0,
+                       help='Fraction of mock responses that are HTTP 500 (default: 0)')
+    parser.add_argument('--engine', action='append',
+                       help='Only run this engine (repeatable, default: all)')
+    parser.add_argument('--save',
+                       help='Save the summary to a JSON file')
+    parser.add_argument('--baseline',
+                       help='Compare against a summary saved earlier with --save')
+
+    args = parser.parse_args()
+
+    summary = run_benchmark(
+        duration=args.duration,
+        concurrency_levels=[int(c) for c in args.concurrency.split(',')],
+        latency_ms=args.latency_ms,
+        error_rate=args.error_rate,
+        engines=args.engine
+    )
+
+    if args.baseline:
+        compare_with_baseline(summary, args.baseline)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"Summary saved to: {args.save}")
+
+
+if __name__ == "__main__":
+    main()
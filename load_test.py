@@ -5,7 +5,12 @@ import time
 import random
 from concurrent.futures import ThreadPoolExecutor
 from collections import defaultdict
+import glob
 import json
+import os
+import uuid
+from nginx_log_parser import NginxLogTailer, print_latency_breakdown
+from tests.server_timing import parse_server_timing, print_phase_breakdown
 
 class LoadTester:
     def __init__(self, base_url="http://localhost", port=80):
@@ -13,52 +18,523 @@ class LoadTester:
         self.results = defaultdict(list)
         self.lock = threading.Lock()
         
-    def health_check(self):
+        # Load generator melewati rate limiter API jika token bypass di-set
+        # (harus sama dengan RATE_LIMIT_BYPASS_TOKEN di server)
+        self.headers = {}
+        bypass_token = os.environ.get("RATE_LIMIT_BYPASS_TOKEN")
+        if bypass_token:
+            self.headers["X-RateLimit-Bypass"] = bypass_token
+        
+        # Cache workload state (lihat test_cache_behavior)
+        self.cache_write_ratio = 0.0
+        self.last_write_time = 0
+        self.last_cache_fill = 0
+        
+        # Endpoint untuk test "health". Nginx menjawab /health sendiri (static 200),
+        # jadi test scaling memakai /backend-health atau /live (lihat detect_health_endpoint)
+        self.health_endpoint = "/health"
+        
+        # Conditional GET: setiap thread menyimpan ETag terakhir seperti client
+        # sungguhan dan mengirimnya lewat If-None-Match (lihat test_conditional_get)
+        self.conditional_get = False
+        self.etags = {}
+        
+        # Pagination workload (lihat walk_pages)
+        self.page_size = 50
+        self.page_filter = None
+        self.max_pages = 20
+        
+        # X-Request-ID per request, untuk join dengan access log nginx
+        # (lihat test_upstream_timing)
+        self.trace_requests = False
+        
+        # Sampler nginx stub_status (/nginx-status) selama run_load_test.
+        # Writing di atas jumlah keepalive upstream (32) = request mengantri ke API.
+        self.nginx_status_interval = 1.0
+        self.nginx_queue_threshold = 32
+        self.nginx_status_available = True
+        
+    def request_headers(self):
+        """Header untuk satu request: bypass token + X-Request-ID jika tracing aktif"""
+        headers = dict(self.headers)
+        if self.trace_requests:
+            headers["X-Request-ID"] = uuid.uuid4().hex
+        return headers
+    
+    def health_check(self, endpoint=None):
         """Test health endpoint"""
         try:
-            response = requests.get(f"{self.base_url}/health", timeout=5)
+            headers = self.request_headers()
+            response = requests.get(f"{self.base_url}{endpoint or self.health_endpoint}", timeout=5, headers=headers)
+            content = response.json() if response.headers.get('content-type', '').startswith('application/json') else response.text[:100]
+            # Response dari API selalu JSON dengan field instance; selain itu
+            # dijawab langsung oleh proxy (nginx) dan tidak mengukur API
+            instance = content.get("instance") if isinstance(content, dict) else None
             return {
                 "status": response.status_code,
                 "response_time": response.elapsed.total_seconds(),
-                "content": response.json() if response.headers.get('content-type', '').startswith('application/json') else response.text[:100]
+                "content": content,
+                "instance": instance or "proxy",
+                "reached_api": instance is not None,
+                "request_id": headers.get("X-Request-ID"),
+                "seen": int(response.headers.get("X-Request-Seen", 0)),
+                "server_timing": parse_server_timing(response.headers.get("Server-Timing"))
             }
         except Exception as e:
             return {"error": str(e), "status": 0}
     
+    def detect_health_endpoint(self, candidates=("/health", "/backend-health", "/live")):
+        """Pilih endpoint health pertama yang benar-benar dijawab oleh replica API"""
+        for endpoint in candidates:
+            result = self.health_check(endpoint)
+            if result.get("status") == 200 and result["reached_api"]:
+                print(f"   Health endpoint: {endpoint} (answered by {result['instance']})")
+                return endpoint
+            if result.get("status") == 200:
+                print(f"⚠️  {endpoint} is answered by the proxy, not the API "
+                      f"(body: {str(result['content']).strip()!r})")
+        print(f"⚠️  No health endpoint reaches the API, falling back to {candidates[0]}")
+        return candidates[0]
+    
     def get_todos(self):
         """Get all todos"""
         try:
-            response = requests.get(f"{self.base_url}/todos", timeout=5)
+            headers = self.request_headers()
+            client = threading.get_ident()
+            if self.conditional_get and client in self.etags:
+                headers["If-None-Match"] = self.etags[client]
+            
+            request_time = time.time()
+            response = requests.get(f"{self.base_url}/todos", timeout=5, headers=headers)
+            body = response.json() if response.headers.get('content-type', '').startswith('application/json') else {}
+            if self.conditional_get and response.headers.get("ETag"):
+                self.etags[client] = response.headers["ETag"]
+            
+            # Bytes di wire (setelah kompresi), bukan ukuran JSON setelah di-decode
+            wire_bytes = response.headers.get("Content-Length")
+            wire_bytes = int(wire_bytes) if wire_bytes is not None else response.raw.tell()
             return {
                 "status": response.status_code,
                 "response_time": response.elapsed.total_seconds(),
-                "todos_count": len(response.json()) if response.headers.get('content-type', '').startswith('application/json') else 0
+                "todos_count": len(body.get("data", [])),
+                "source": "not_modified" if response.status_code == 304 else body.get("source", "unknown"),
+                "cache_mode": response.headers.get("X-Cache-Mode", "unknown"),
+                "request_time": request_time,
+                "bytes": wire_bytes,
+                "encoding": response.headers.get("Content-Encoding", "identity"),
+                "request_id": headers.get("X-Request-ID"),
+                "seen": int(response.headers.get("X-Request-Seen", 0)),
+                "server_timing": parse_server_timing(response.headers.get("Server-Timing"))
             }
         except Exception as e:
             return {"error": str(e), "status": 0}
     
+    def get_todos_page(self, cursor=None):
+        """Get satu halaman todos (keyset pagination)"""
+        params = {"limit": self.page_size}
+        if cursor:
+            params["cursor"] = cursor
+        if self.page_filter is not None:
+            params["completed"] = "true" if self.page_filter else "false"
+        try:
+            response = requests.get(f"{self.base_url}/todos", params=params, timeout=5, headers=self.headers)
+            body = response.json() if response.headers.get('content-type', '').startswith('application/json') else {}
+            return {
+                "status": response.status_code,
+                "response_time": response.elapsed.total_seconds(),
+                "todos_count": len(body.get("data", [])),
+                "source": body.get("source", "unknown"),
+                "next_cursor": body.get("pagination", {}).get("nextCursor"),
+                "bytes": len(response.content),
+                "server_timing": parse_server_timing(response.headers.get("Server-Timing"))
+            }
+        except Exception as e:
+            return {"error": str(e), "status": 0}
+    
+    def walk_pages(self, thread_id, duration=60):
+        """Worker yang membaca halaman demi halaman sampai habis, lalu mulai lagi"""
+        end_time = time.time() + duration
+        
+        while time.time() < end_time:
+            cursor = None
+            for page_number in range(1, self.max_pages + 1):
+                result = self.get_todos_page(cursor)
+                result["thread_id"] = thread_id
+                result["timestamp"] = time.time()
+                result["page"] = page_number
+                
+                with self.lock:
+                    self.results["pages"].append(result)
+                
+                cursor = result.get("next_cursor")
+                if not cursor or time.time() >= end_time:
+                    break
+                time.sleep(random.uniform(0.05, 0.2))
+            
+            time.sleep(random.uniform(0.1, 0.5))
+    
+    def test_pagination(self, threads=10, duration=60, page_size=50, completed=None, max_pages=20):
+        """Test GET /todos dengan keyset pagination (walk pages)"""
+        print(f"📄 PAGINATION TEST")
+        print(f"   Threads: {threads}")
+        print(f"   Duration: {duration} seconds")
+        print(f"   Page size: {page_size} | Max pages: {max_pages} | Filter completed: {completed}")
+        print("-" * 50)
+        
+        self.page_size = page_size
+        self.page_filter = completed
+        self.max_pages = max_pages
+        self.results["pages"] = []
+        
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            futures = [executor.submit(self.walk_pages, f"pages_{i}", duration) for i in range(threads)]
+            for future in futures:
+                future.result()
+        
+        self.analyze_results("pages")
+        
+        # Latency per nomor halaman: halaman dalam harus tetap secepat halaman pertama
+        per_page = defaultdict(list)
+        for r in self.results["pages"]:
+            if r.get("status") == 200:
+                per_page[r["page"]].append(r)
+        
+        if per_page:
+            print(f"   Latency by page:")
+            for page in sorted(per_page):
+                page_results = per_page[page]
+                avg = sum(r["response_time"] for r in page_results) / len(page_results)
+                avg_bytes = sum(r["bytes"] for r in page_results) / len(page_results)
+                hits = sum(1 for r in page_results if r.get("source") in ("cache", "memory"))
+                print(f"     Page {page:3d}: {len(page_results)} requests | Avg: {avg*1000:.1f}ms | "
+                      f"{avg_bytes/1024:.1f} KB | Cache hits: {hits/len(page_results)*100:.0f}%")
+            print("-" * 50)
+    
     def create_todo(self):
         """Create a new todo"""
         try:
+            headers = self.request_headers()
             todo_data = {
                 "title": f"Test Todo {random.randint(1000, 9999)}",
                 "description": f"Load test todo at {time.time()}",
                 "completed": False
             }
+            if "X-Request-ID" in headers:
+                # Request ID ikut disimpan supaya create ganda bisa dihitung dari database
+                todo_data["description"] += f" rid={headers['X-Request-ID']}"
             response = requests.post(
                 f"{self.base_url}/todos", 
                 json=todo_data, 
                 timeout=5,
-                headers={"Content-Type": "application/json"}
+                headers={"Content-Type": "application/json", **headers}
             )
+            if response.status_code == 201:
+                with self.lock:
+                    self.last_write_time = time.time()
             return {
                 "status": response.status_code,
                 "response_time": response.elapsed.total_seconds(),
-                "created": response.status_code == 201
+                "created": response.status_code == 201,
+                "request_id": headers.get("X-Request-ID"),
+                "seen": int(response.headers.get("X-Request-Seen", 0)),
+                "server_timing": parse_server_timing(response.headers.get("Server-Timing"))
             }
         except Exception as e:
             return {"error": str(e), "status": 0}
     
+    def bulk_create_todos(self, batch_size):
+        """Create banyak todo dalam satu request POST /todos/bulk"""
+        try:
+            batch_id = random.randint(1000, 9999)
+            todos = [
+                {
+                    "title": f"Bulk Todo {batch_id}-{i}",
+                    "description": f"Bulk load test todo at {time.time()}",
+                    "completed": False
+                }
+                for i in range(batch_size)
+            ]
+            response = requests.post(f"{self.base_url}/todos/bulk", json={"todos": todos}, timeout=30, headers=self.headers)
+            rows = response.json().get("count", 0) if response.status_code == 201 else 0
+            return {
+                "status": response.status_code,
+                "response_time": response.elapsed.total_seconds(),
+                "rows": rows
+            }
+        except Exception as e:
+            return {"error": str(e), "status": 0, "rows": 0}
+    
+    def bulk_worker(self, batch_size, thread_id, duration=60):
+        """Worker yang terus mengirim bulk create tanpa jeda"""
+        end_time = time.time() + duration
+        while time.time() < end_time:
+            result = self.bulk_create_todos(batch_size)
+            result["thread_id"] = thread_id
+            result["timestamp"] = time.time()
+            with self.lock:
+                self.results[f"bulk_{batch_size}"].append(result)
+    
+    def test_bulk_create(self, threads=5, duration=30, batch_sizes=(1, 10, 50, 100, 500)):
+        """Ukur rows/second POST /todos/bulk pada berbagai ukuran batch"""
+        print(f"📦 BULK CREATE TEST")
+        print(f"   Threads: {threads}")
+        print(f"   Duration per batch size: {duration} seconds")
+        print(f"   Batch sizes: {', '.join(str(size) for size in batch_sizes)}")
+        print("-" * 50)
+        
+        summary = {}
+        for batch_size in batch_sizes:
+            key = f"bulk_{batch_size}"
+            self.results[key] = []
+            print(f"\n📦 Batch size {batch_size}:")
+            
+            start = time.time()
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                futures = [executor.submit(self.bulk_worker, batch_size, f"{key}_{i}", duration) for i in range(threads)]
+                for future in futures:
+                    future.result()
+            elapsed = time.time() - start
+            
+            self.analyze_results(key)
+            rows = sum(r.get("rows", 0) for r in self.results[key])
+            summary[batch_size] = rows / elapsed if elapsed > 0 else 0
+            time.sleep(2)
+        
+        print(f"\n📋 BULK CREATE SUMMARY:")
+        baseline = summary.get(batch_sizes[0]) or 0
+        for batch_size, rows_per_second in summary.items():
+            speedup = f" ({rows_per_second / baseline:.1f}x vs batch {batch_sizes[0]})" if baseline else ""
+            print(f"   Batch {batch_size:4d}: {rows_per_second:8.1f} rows/s{speedup}")
+        print("-" * 50)
+        return summary
+    
+    def fetch_api_metrics(self):
+        """Ambil konfigurasi/metrics API dari /metrics (kosong jika gagal)"""
+        try:
+            return requests.get(f"{self.base_url}/metrics", timeout=5, headers=self.headers).json()
+        except Exception:
+            return {}
+    
+    def latency_summary(self, results):
+        """Ringkasan latency (ms) per endpoint dari result yang sukses"""
+        by_endpoint = defaultdict(list)
+        limited = defaultdict(int)
+        for r in results:
+            if r.get("status") in (200, 201):
+                by_endpoint[r["endpoint"]].append(r["response_time"] * 1000)
+            elif r.get("status") == 429:
+                limited[r["endpoint"]] += 1
+        
+        summary = {}
+        for endpoint, times in sorted(by_endpoint.items()):
+            times.sort()
+            pct = lambda p: times[min(len(times) - 1, int(len(times) * p))]
+            summary[endpoint] = {"count": len(times), "p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99)}
+            print(f"     {endpoint:18s}: {len(times):6d} requests | P50: {pct(0.50):7.1f}ms | "
+                  f"P95: {pct(0.95):7.1f}ms | P99: {pct(0.99):7.1f}ms")
+        for endpoint, count in sorted(limited.items()):
+            print(f"     {endpoint:18s}: {count:6d} rate limited (429)")
+        
+        # Breakdown fase server per endpoint (hanya jika API mengirim Server-Timing)
+        for endpoint in sorted(by_endpoint):
+            print_phase_breakdown([(r["response_time"] * 1000, r.get("server_timing")) for r in results
+                                   if r.get("endpoint") == endpoint and r.get("status") in (200, 201)],
+                                  endpoint, indent="     ")
+        return summary
+    
+    def save_benchmark_summary(self, name, mode, summary):
+        """Simpan ringkasan benchmark per mode API, untuk dibandingkan antar deploy"""
+        filename = f"{name}_{mode}.json"
+        with open(filename, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"   Summary saved to: {filename}")
+    
+    def compare_benchmark_summaries(self, name, before_mode, after_mode):
+        """Bandingkan P95 per endpoint antara dua mode yang sudah disimpan"""
+        summaries = {}
+        for mode in (before_mode, after_mode):
+            try:
+                with open(f"{name}_{mode}.json") as f:
+                    summaries[mode] = json.load(f)
+            except FileNotFoundError:
+                return
+        
+        before, after = summaries[before_mode], summaries[after_mode]
+        print(f"\n⚖️  {before_mode.upper()} (before) vs {after_mode.upper()} (after), P95:")
+        for endpoint in sorted(set(before) & set(after)):
+            change = (after[endpoint]["p95"] - before[endpoint]["p95"]) / before[endpoint]["p95"] * 100
+            print(f"     {endpoint:18s}: {before[endpoint]['p95']:7.1f}ms -> "
+                  f"{after[endpoint]['p95']:7.1f}ms ({change:+.1f}%)")
+            if "rps" in before[endpoint] and "rps" in after[endpoint]:
+                print(f"     {'':18s}  {before[endpoint]['rps']:7.1f} req/s -> {after[endpoint]['rps']:7.1f} req/s")
+    
+    def timed_request(self, method, endpoint, **kwargs):
+        """Request generik, return result dict dengan endpoint dan response"""
+        try:
+            kwargs.setdefault("headers", self.headers)
+            response = requests.request(method, f"{self.base_url}{endpoint}", timeout=10, **kwargs)
+            return {
+                "status": response.status_code,
+                "response_time": response.elapsed.total_seconds(),
+                "server_timing": parse_server_timing(response.headers.get("Server-Timing"))
+            }, response
+        except Exception as e:
+            return {"error": str(e), "status": 0}, None
+    
+    def write_cycle_worker(self, thread_id, duration=60):
+        """Create -> update -> delete -> list tanpa jeda (write concurrency tinggi)"""
+        end_time = time.time() + duration
+        
+        while time.time() < end_time:
+            cycle = []
+            result, response = self.timed_request("POST", "/todos", json={
+                "title": f"Prepared Test {thread_id}-{random.randint(1000, 9999)}",
+                "description": "Prepared statement benchmark",
+                "completed": False
+            })
+            cycle.append(("POST /todos", result))
+            
+            if response is not None and response.status_code == 201:
+                todo_id = response.json()["data"]["id"]
+                result, _ = self.timed_request("PATCH", f"/todos/{todo_id}", json={"completed": True})
+                cycle.append(("PATCH /todos/:id", result))
+                result, _ = self.timed_request("DELETE", f"/todos/{todo_id}")
+                cycle.append(("DELETE /todos/:id", result))
+            
+            result, _ = self.timed_request("GET", "/todos?limit=50")
+            cycle.append(("GET /todos?limit", result))
+            
+            with self.lock:
+                for endpoint, result in cycle:
+                    result["thread_id"] = thread_id
+                    result["timestamp"] = time.time()
+                    result["endpoint"] = endpoint
+                    self.results["write_cycle"].append(result)
+    
+    def test_prepared_statements(self, threads=50, duration=60):
+        """Latency per endpoint pada write concurrency tinggi.
+        
+        Jalankan sekali dengan PG_PREPARED_STATEMENTS=true dan sekali dengan
+        false; hasil tiap mode disimpan dan dibandingkan otomatis.
+        """
+        metrics = self.fetch_api_metrics()
+        mode = {True: "prepared", False: "unnamed"}.get(metrics.get("preparedStatements"), "unknown")
+        
+        print(f"🧮 PREPARED STATEMENT BENCHMARK (API mode: {mode})")
+        print(f"   Threads: {threads}")
+        print(f"   Duration: {duration} seconds")
+        print("-" * 50)
+        
+        self.results["write_cycle"] = []
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            futures = [executor.submit(self.write_cycle_worker, f"write_{i}", duration) for i in range(threads)]
+            for future in futures:
+                future.result()
+        
+        self.analyze_results("write_cycle")
+        
+        print(f"   Latency by endpoint:")
+        summary = self.latency_summary(self.results["write_cycle"])
+        
+        self.save_benchmark_summary("prepared", mode, summary)
+        self.compare_benchmark_summaries("prepared", "unnamed", "prepared")
+        print("-" * 50)
+        return summary
+    
+    def create_worker(self, thread_id, duration=60):
+        """POST /todos tanpa jeda, untuk mengukur throughput create"""
+        end_time = time.time() + duration
+        while time.time() < end_time:
+            result, _ = self.timed_request("POST", "/todos", json={
+                "title": f"Create Benchmark {thread_id}-{random.randint(1000, 9999)}",
+                "description": "Create throughput benchmark",
+                "completed": False
+            })
+            result["thread_id"] = thread_id
+            result["timestamp"] = time.time()
+            result["endpoint"] = "POST /todos"
+            with self.lock:
+                self.results["create_benchmark"].append(result)
+    
+    def test_create_benchmark(self, threads=20, duration=30):
+        """Throughput dan latency POST /todos, disimpan per LOG_LEVEL API.
+        
+        Jalankan dengan LOG_LEVEL=debug dan LOG_SAMPLE_RATE=1 (semua request
+        di-log) lalu dengan LOG_LEVEL=info untuk melihat biaya logging.
+        """
+        metrics = self.fetch_api_metrics()
+        mode = metrics.get("logLevel", "unknown")
+        
+        print(f"📝 CREATE TODO BENCHMARK (API log level: {mode})")
+        print(f"   Threads: {threads}")
+        print(f"   Duration: {duration} seconds")
+        print("-" * 50)
+        
+        self.results["create_benchmark"] = []
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            futures = [executor.submit(self.create_worker, f"create_{i}", duration) for i in range(threads)]
+            for future in futures:
+                future.result()
+        elapsed = time.time() - start
+        
+        self.analyze_results("create_benchmark")
+        print(f"   Latency by endpoint:")
+        summary = self.latency_summary(self.results["create_benchmark"])
+        for endpoint in summary:
+            summary[endpoint]["rps"] = summary[endpoint]["count"] / elapsed
+        
+        self.save_benchmark_summary("create_logging", mode, summary)
+        self.compare_benchmark_summaries("create_logging", "debug", "info")
+        print("-" * 50)
+        return summary
+    
+    def test_topology(self, label, threads=30, duration=60):
+        """Workload tetap untuk membandingkan topologi deploy dengan CPU budget sama.
+        
+        Contoh: deploy 4 replica x CLUSTER_WORKERS=1 (label "4x1"), jalankan test,
+        lalu deploy 2 replica x CLUSTER_WORKERS=2 (label "2x2") dan jalankan lagi.
+        Semua hasil topology_*.json dibandingkan dalam satu tabel.
+        """
+        print(f"🧩 TOPOLOGY BENCHMARK: {label}")
+        print(f"   Threads: {threads}")
+        print(f"   Duration: {duration} seconds")
+        print("-" * 50)
+        
+        # write_cycle bisa berisi hasil run sebelumnya di proses yang sama
+        self.results["topology"] = []
+        self.results["write_cycle"] = []
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            futures = [executor.submit(self.write_cycle_worker, f"topology_{i}", duration) for i in range(threads)]
+            for future in futures:
+                future.result()
+        elapsed = time.time() - start
+        
+        # write_cycle_worker menyimpan ke results["write_cycle"]; pindahkan ke topology
+        self.results["topology"], self.results["write_cycle"] = self.results["write_cycle"], []
+        self.analyze_results("topology")
+        
+        print(f"   Latency by endpoint:")
+        summary = self.latency_summary(self.results["topology"])
+        successful = sum(1 for r in self.results["topology"] if r.get("status") in (200, 201))
+        summary["_total"] = {"rps": successful / elapsed}
+        self.save_benchmark_summary("topology", label, summary)
+        
+        # Tabel semua topologi yang pernah diukur
+        print(f"\n⚖️  TOPOLOGY COMPARISON:")
+        for filename in sorted(glob.glob("topology_*.json")):
+            with open(filename) as f:
+                saved = json.load(f)
+            name = filename[len("topology_"):-len(".json")]
+            p95 = " | ".join(
+                f"{endpoint} P95 {stats['p95']:.0f}ms"
+                for endpoint, stats in sorted(saved.items()) if not endpoint.startswith("_")
+            )
+            print(f"   {name:>8}: {saved.get('_total', {}).get('rps', 0):7.1f} req/s | {p95}")
+        print("-" * 50)
+        return summary
+    
     def worker_thread(self, test_type, thread_id, duration=60):
         """Worker thread for load testing"""
         start_time = time.time()
@@ -71,6 +547,8 @@ class LoadTester:
                 result = self.get_todos()
             elif test_type == "create":
                 result = self.create_todo()
+            elif test_type == "cache":
+                result = self.cache_workload_request()
             else:
                 result = {"error": "Unknown test type", "status": 0}
             
@@ -93,6 +571,14 @@ class LoadTester:
         
         # Clear previous results
         self.results[test_type] = []
+        self.results["nginx_status"] = []
+        
+        # Sampler stub_status berjalan di background selama test
+        stop_sampler = threading.Event()
+        sampler = None
+        if self.nginx_status_interval > 0 and self.nginx_status_available:
+            sampler = threading.Thread(target=self.nginx_status_worker, args=(stop_sampler,), daemon=True)
+            sampler.start()
         
         # Start worker threads
         with ThreadPoolExecutor(max_workers=threads) as executor:
@@ -105,8 +591,461 @@ class LoadTester:
             for future in futures:
                 future.result()
         
+        if sampler:
+            stop_sampler.set()
+            sampler.join()
+        
         # Analyze results
         self.analyze_results(test_type)
+        self.analyze_nginx_status(test_type)
+    
+    def fetch_nginx_status(self):
+        """Scrape /nginx-status (stub_status) menjadi dict, None jika tidak tersedia"""
+        try:
+            response = requests.get(f"{self.base_url}/nginx-status", timeout=2)
+            if response.status_code != 200 or not response.text.startswith("Active connections:"):
+                return None
+            # Active connections: 291
+            # server accepts handled requests
+            #  16630948 16630948 31070465
+            # Reading: 6 Writing: 179 Waiting: 106
+            lines = response.text.splitlines()
+            accepts, handled, total_requests = (int(v) for v in lines[2].split())
+            parts = lines[3].split()
+            return {
+                "timestamp": time.time(),
+                "active": int(lines[0].split(":")[1]),
+                "accepts": accepts,
+                "handled": handled,
+                "requests": total_requests,
+                "reading": int(parts[1]),
+                "writing": int(parts[3]),
+                "waiting": int(parts[5])
+            }
+        except Exception:
+            return None
+    
+    def nginx_status_worker(self, stop_event):
+        """Ambil stub_status setiap nginx_status_interval detik sampai stop_event di-set"""
+        while not stop_event.is_set():
+            sample = self.fetch_nginx_status()
+            if sample is None:
+                if not self.results["nginx_status"]:
+                    # Endpoint tidak ada (nginx.conf lama) atau IP client tidak di-allow
+                    self.nginx_status_available = False
+                    print("ℹ️  /nginx-status not available, stub_status sampling disabled")
+                    return
+            else:
+                with self.lock:
+                    self.results["nginx_status"].append(sample)
+            stop_event.wait(self.nginx_status_interval)
+    
+    def analyze_nginx_status(self, test_type):
+        """Ringkasan stub_status dan interval di mana antrian koneksi bertepatan dengan latency spike"""
+        samples = self.results["nginx_status"]
+        if len(samples) < 2:
+            return
+        
+        # Rate per interval dari counter kumulatif, plus P95 latency request yang selesai di interval itu
+        intervals = []
+        for prev, cur in zip(samples, samples[1:]):
+            elapsed = cur["timestamp"] - prev["timestamp"]
+            if elapsed <= 0:
+                continue
+            times = sorted(r["response_time"] for r in self.results[test_type]
+                           if r.get("response_time") and prev["timestamp"] < r["timestamp"] <= cur["timestamp"])
+            intervals.append({
+                "timestamp": cur["timestamp"],
+                "accept_rate": (cur["accepts"] - prev["accepts"]) / elapsed,
+                "request_rate": (cur["requests"] - prev["requests"]) / elapsed,
+                "dropped": (cur["accepts"] - cur["handled"]) - (prev["accepts"] - prev["handled"]),
+                "active": cur["active"],
+                "writing": cur["writing"],
+                "waiting": cur["waiting"],
+                "p95": times[min(len(times) - 1, int(len(times) * 0.95))] if times else None
+            })
+        if not intervals:
+            return
+        
+        print(f"🌐 NGINX STUB_STATUS ({len(samples)} samples, every {self.nginx_status_interval:g}s):")
+        print(f"   Active connections - Peak: {max(i['active'] for i in intervals)} | "
+              f"Writing peak: {max(i['writing'] for i in intervals)} | "
+              f"Waiting (keepalive) peak: {max(i['waiting'] for i in intervals)}")
+        print(f"   Accept rate - Avg: {sum(i['accept_rate'] for i in intervals)/len(intervals):.1f}/s | "
+              f"Request rate - Avg: {sum(i['request_rate'] for i in intervals)/len(intervals):.1f}/s")
+        dropped = sum(i["dropped"] for i in intervals)
+        if dropped:
+            print(f"   ⚠️  Dropped connections (accepts - handled): {dropped}")
+        
+        # Spike = P95 interval lebih dari 2x median P95 seluruh test
+        p95s = sorted(i["p95"] for i in intervals if i["p95"] is not None)
+        if not p95s:
+            print("-" * 50)
+            return
+        baseline = p95s[len(p95s) // 2]
+        start = samples[0]["timestamp"]
+        flagged = [
+            i for i in intervals
+            if i["p95"] is not None and i["p95"] > 2 * baseline
+            and (i["writing"] > self.nginx_queue_threshold or i["dropped"] > 0)
+        ]
+        if flagged:
+            print(f"   ⚠️  Connection queueing during latency spikes ({len(flagged)} intervals, "
+                  f"baseline P95 {baseline*1000:.1f}ms):")
+            for i in flagged[:10]:
+                print(f"     t+{i['timestamp'] - start:5.1f}s: P95 {i['p95']*1000:.1f}ms | "
+                      f"writing {i['writing']} (> {self.nginx_queue_threshold}) | "
+                      f"active {i['active']} | dropped {i['dropped']}")
+        else:
+            print(f"   No connection queueing coincided with latency spikes")
+        print("-" * 50)
+    
+    def cache_workload_request(self):
+        """GET /todos atau POST /todos sesuai cache_write_ratio"""
+        if random.random() < self.cache_write_ratio:
+            result = self.create_todo()
+            result["operation"] = "write"
+        else:
+            result = self.get_todos()
+            result["operation"] = "read"
+            if result.get("source") == "database":
+                # Miss setelah ada write sejak cache terakhir diisi berarti cache
+                # di-invalidate oleh write, selain itu miss karena TTL 60 detik
+                # habis (atau cache masih dingin)
+                with self.lock:
+                    result["after_write"] = self.last_write_time > self.last_cache_fill
+                    self.last_cache_fill = max(self.last_cache_fill, result["request_time"])
+        return result
+    
+    def analyze_cache_results(self, results, label=""):
+        """Pisahkan latency GET /todos berdasarkan source (cache vs database)"""
+        reads = [r for r in results if r.get("operation", "read") == "read" and r.get("status") == 200]
+        if not reads:
+            print("❌ No successful GET /todos results to analyze")
+            return None
+        
+        time_span = max(r["timestamp"] for r in results) - min(r["timestamp"] for r in results)
+        by_source = defaultdict(list)
+        for r in reads:
+            by_source[r.get("source", "unknown")].append(r["response_time"])
+        
+        # memory = hit di L1 cache (in-process), cache = hit di Redis.
+        # coalesced = miss yang menunggu load database milik request lain: tetap miss
+        hit_times = by_source.get("memory", []) + by_source.get("cache", [])
+        miss_times = by_source.get("database", []) + by_source.get("coalesced", [])
+        hits = len(hit_times)
+        misses = len(miss_times)
+        coalesced = len(by_source.get("coalesced", []))
+        hit_ratio = hits / (hits + misses) * 100 if hits + misses else 0
+        
+        print(f"📦 CACHE BREAKDOWN {label}".rstrip() + ":")
+        print(f"   Hit Ratio: {hit_ratio:.1f}% ({hits} hits / {misses} misses, {coalesced} of them coalesced)")
+        for source in sorted(by_source):
+            times = sorted(by_source[source])
+            avg = sum(times) / len(times)
+            p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+            rps = len(times) / time_span if time_span > 0 else 0
+            print(f"   {source:>9}: {len(times)} requests | {rps:.2f} req/s | "
+                  f"Avg: {avg*1000:.1f}ms | P95: {p95*1000:.1f}ms")
+        
+        summary = {"hit_ratio": hit_ratio, "hits": hits, "misses": misses, "coalesced": coalesced}
+        if hits and misses:
+            avg_hit = sum(hit_times) / hits
+            avg_miss = sum(miss_times) / misses
+            invalidation_misses = sum(1 for r in reads
+                                      if r.get("source") in ("database", "coalesced") and r.get("after_write"))
+            ttl_misses = misses - invalidation_misses
+            miss_penalty = avg_miss - avg_hit
+            
+            # Biaya = waktu tambahan yang dibayar client karena miss
+            print(f"   Miss Penalty: {miss_penalty*1000:.1f}ms per request")
+            print(f"   Cost of invalidate-on-write: {invalidation_misses} misses, "
+                  f"{invalidation_misses * miss_penalty:.2f}s extra latency")
+            print(f"   Cost of 60s TTL / cold cache: {ttl_misses} misses, "
+                  f"{ttl_misses * miss_penalty:.2f}s extra latency")
+            summary.update({
+                "miss_penalty": miss_penalty,
+                "invalidation_misses": invalidation_misses,
+                "ttl_misses": ttl_misses
+            })
+        return summary
+    
+    def analyze_transfer(self, results, label=""):
+        """Bytes yang ditransfer dan rasio 304 untuk GET /todos"""
+        reads = [r for r in results if r.get("status") in (200, 304) and "bytes" in r]
+        if not reads:
+            print("❌ No successful GET /todos results to analyze")
+            return None
+        
+        not_modified = [r for r in reads if r["status"] == 304]
+        total_bytes = sum(r["bytes"] for r in reads)
+        avg = sum(r["response_time"] for r in reads) / len(reads)
+        encodings = defaultdict(int)
+        for r in reads:
+            if r["status"] == 200:
+                encodings[r["encoding"]] += 1
+        
+        print(f"📉 TRANSFER {label}".rstrip() + ":")
+        print(f"   GET /todos: {len(reads)} requests | Avg: {avg*1000:.1f}ms")
+        print(f"   304 Not Modified: {len(not_modified)} ({len(not_modified)/len(reads)*100:.1f}%)")
+        print(f"   Bytes transferred: {total_bytes/1024/1024:.2f} MB total | "
+              f"{total_bytes/len(reads)/1024:.1f} KB/request")
+        print(f"   Encodings (200): {', '.join(f'{e}={c}' for e, c in sorted(encodings.items()))}")
+        
+        return {
+            "requests": len(reads),
+            "not_modified_ratio": len(not_modified) / len(reads),
+            "bytes_per_request": total_bytes / len(reads),
+            "avg_ms": avg * 1000
+        }
+    
+    def test_conditional_get(self, threads=10, duration=30, write_ratio=0.05):
+        """Bandingkan GET /todos biasa dengan If-None-Match (ETag) pada write ratio yang sama"""
+        print(f"🏷️  CONDITIONAL GET TEST")
+        print(f"   Threads: {threads}")
+        print(f"   Duration per mode: {duration} seconds")
+        print(f"   Write ratio: {write_ratio:.0%}")
+        print("-" * 50)
+        
+        summaries = {}
+        self.cache_write_ratio = write_ratio
+        for conditional in (False, True):
+            label = "with If-None-Match" if conditional else "unconditional"
+            print(f"\n🔁 {label}:")
+            self.conditional_get = conditional
+            self.etags = {}
+            self.run_load_test("cache", threads=threads, duration=duration)
+            summaries[label] = self.analyze_transfer(self.results["cache"], f"({label})")
+            time.sleep(2)
+        self.conditional_get = False
+        
+        before, after = summaries["unconditional"], summaries["with If-None-Match"]
+        if before and after and before["bytes_per_request"] > 0:
+            saved = (1 - after["bytes_per_request"] / before["bytes_per_request"]) * 100
+            print(f"\n📋 CONDITIONAL GET SUMMARY:")
+            print(f"   Bytes/request: {before['bytes_per_request']/1024:.1f} KB -> "
+                  f"{after['bytes_per_request']/1024:.1f} KB ({saved:.1f}% saved)")
+            print(f"   Avg latency: {before['avg_ms']:.1f}ms -> {after['avg_ms']:.1f}ms")
+            print(f"   304 ratio: {after['not_modified_ratio']*100:.1f}%")
+            print("-" * 50)
+        return summaries
+    
+    def test_upstream_timing(self, test_type="get", threads=10, duration=30, log_path="logs/nginx/access.log"):
+        """Pisahkan latency client / nginx / upstream dengan join ke access log lewat X-Request-ID"""
+        print(f"📐 UPSTREAM TIMING TEST ({test_type})")
+        print(f"   Threads: {threads}")
+        print(f"   Duration: {duration} seconds")
+        print(f"   Access log: {log_path}")
+        print("-" * 50)
+        
+        if not os.path.exists(log_path):
+            print(f"❌ Access log not found: {log_path} (mount /var/log/nginx, see docker-stack.yml)")
+            return None
+        
+        tailer = NginxLogTailer(log_path).start()
+        self.trace_requests = True
+        try:
+            self.run_load_test(test_type, threads=threads, duration=duration)
+        finally:
+            self.trace_requests = False
+            tailer.stop()
+        
+        rows = []
+        for r in self.results[test_type]:
+            timing = tailer.lookup(r.get("request_id"))
+            if timing and r.get("response_time"):
+                rows.append({"client": r["response_time"], **timing})
+        
+        sent = sum(1 for r in self.results[test_type] if r.get("request_id"))
+        print(f"   Joined {len(rows)}/{sent} requests with the access log "
+              f"({tailer.lines} log lines read, {tailer.unparsed} unparsed)")
+        if rows:
+            print_latency_breakdown(rows)
+        print("-" * 50)
+        return rows
+    
+    def count_created_by_request_id(self):
+        """Jumlah row todos per request ID (dari description "rid=...") via GET /todos"""
+        try:
+            response = requests.get(f"{self.base_url}/todos", timeout=30, headers=self.headers)
+            todos = response.json().get("data", [])
+        except Exception as e:
+            print(f"❌ Could not fetch todos to confirm duplicates: {e}")
+            return None
+        
+        counts = defaultdict(int)
+        for todo in todos:
+            _, sep, request_id = (todo.get("description") or "").rpartition(" rid=")
+            if sep:
+                counts[request_id] += 1
+        return counts
+    
+    def test_retry_amplification(self, threads=20, duration=60):
+        """Hitung berapa kali setiap request dieksekusi backend (retry nginx proxy_next_upstream)
+        
+        Jalankan sambil mematikan/men-scale replica atau dengan thread tinggi (overload)
+        supaya nginx benar-benar retry ke upstream lain.
+        """
+        print(f"🔁 RETRY AMPLIFICATION TEST")
+        print(f"   Threads: {threads} (half GET /todos, half POST /todos)")
+        print(f"   Duration: {duration} seconds")
+        print("-" * 50)
+        
+        self.results["get"] = []
+        self.results["create"] = []
+        self.trace_requests = True
+        try:
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                futures = [executor.submit(self.worker_thread, "get" if i % 2 == 0 else "create", f"retry_{i}", duration)
+                           for i in range(threads)]
+                for future in futures:
+                    future.result()
+        finally:
+            self.trace_requests = False
+        
+        for test_type, endpoint in (("get", "GET /todos"), ("create", "POST /todos")):
+            results = self.results[test_type]
+            if not results:
+                continue
+            # seen = 0: tidak ada response dari API (error dari nginx atau koneksi gagal)
+            answered = [r for r in results if r.get("seen")]
+            executions = sum(r["seen"] for r in answered)
+            retried = [r for r in answered if r["seen"] > 1]
+            amplification = executions / len(answered) if answered else 0
+            print(f"   {endpoint}: {len(results)} requests | {len(answered)} answered by API | "
+                  f"{executions} backend executions | amplification {amplification:.2f}x")
+            print(f"     Executed more than once: {len(retried)} "
+                  f"(max {max((r['seen'] for r in retried), default=1)}x)")
+            statuses = defaultdict(int)
+            for r in results:
+                if not r.get("seen"):
+                    statuses[r.get("status", 0)] += 1
+            if statuses:
+                print(f"     Without API answer: " + ", ".join(
+                    f"HTTP {status}: {count}" for status, count in sorted(statuses.items())))
+        
+        # Create ganda: estimasi dari X-Request-Seen, konfirmasi dari row di database
+        creates = self.results["create"]
+        estimated = sum(r["seen"] - 1 for r in creates if r.get("seen", 0) > 1)
+        print(f"   Duplicate creates (estimated from X-Request-Seen): {estimated}")
+        counts = self.count_created_by_request_id()
+        if counts is not None:
+            request_ids = {r["request_id"] for r in creates if r.get("request_id")}
+            confirmed = sum(counts[rid] - 1 for rid in request_ids if counts.get(rid, 0) > 1)
+            # Client menerima error, tapi row tetap dibuat (hasil tidak pasti bagi client)
+            unacknowledged = sum(1 for r in creates if r.get("request_id") in counts and r.get("status") != 201)
+            print(f"   Duplicate creates (confirmed in database): {confirmed}")
+            print(f"   Creates stored despite client error: {unacknowledged}")
+        print("-" * 50)
+    
+    def test_cache_behavior(self, threads=10, duration=30, write_ratios=(0.0, 0.05, 0.2, 0.5)):
+        """Ukur cache hit ratio GET /todos pada beberapa write ratio"""
+        print(f"📦 CACHE HIT/MISS TEST")
+        print(f"   Threads: {threads}")
+        print(f"   Duration per ratio: {duration} seconds")
+        print(f"   Write ratios: {', '.join(f'{r:.0%}' for r in write_ratios)}")
+        print("-" * 50)
+        
+        summaries = {}
+        cache_mode = "unknown"
+        for ratio in write_ratios:
+            print(f"\n✍️  Write ratio {ratio:.0%}:")
+            self.cache_write_ratio = ratio
+            self.last_write_time = 0
+            self.last_cache_fill = 0
+            self.run_load_test("cache", threads=threads, duration=duration)
+            summaries[ratio] = self.analyze_cache_results(self.results["cache"], f"(write ratio {ratio:.0%})")
+            modes = [r["cache_mode"] for r in self.results["cache"] if r.get("cache_mode", "unknown") != "unknown"]
+            if modes:
+                cache_mode = modes[-1]
+            time.sleep(2)
+        
+        print(f"\n📋 CACHE SUMMARY (API cache mode: {cache_mode}):")
+        for ratio, summary in summaries.items():
+            if summary:
+                print(f"   Write {ratio:>4.0%}: hit ratio {summary['hit_ratio']:5.1f}% "
+                      f"({summary['hits']} hits / {summary['misses']} misses)")
+        print("-" * 50)
+        
+        # Simpan per cache mode supaya bisa dibandingkan dengan run berikutnya
+        filename = f"cache_mode_{cache_mode}.json"
+        with open(filename, "w") as f:
+            json.dump({str(ratio): summary for ratio, summary in summaries.items()}, f, indent=2)
+        print(f"   Summary saved to: {filename}")
+        return summaries
+    
+    def compare_cache_modes(self, modes=("invalidate", "write-through")):
+        """Bandingkan hasil test_cache_behavior dari dua cache mode API"""
+        summaries = {}
+        for mode in modes:
+            try:
+                with open(f"cache_mode_{mode}.json") as f:
+                    summaries[mode] = json.load(f)
+            except FileNotFoundError:
+                print(f"⚠️  No results for cache mode '{mode}' (deploy API with CACHE_MODE={mode} "
+                      f"and run the cache test first)")
+        
+        if len(summaries) < len(modes):
+            return
+        
+        print(f"\n⚖️  CACHE MODE COMPARISON:")
+        print(f"   {'Write ratio':>11} | " + " | ".join(f"{mode:>22}" for mode in modes))
+        ratios = sorted(set().union(*(summary.keys() for summary in summaries.values())), key=float)
+        for ratio in ratios:
+            cells = []
+            for mode in modes:
+                summary = summaries[mode].get(ratio)
+                if summary:
+                    cells.append(f"{summary['hit_ratio']:5.1f}% hit, {summary['misses']:5d} miss")
+                else:
+                    cells.append("-")
+            print(f"   {float(ratio):>11.0%} | " + " | ".join(f"{cell:>22}" for cell in cells))
+        print("-" * 50)
+    
+    def test_stampede(self, concurrency=50, rounds=10):
+        """Picu cache stampede: invalidate todos:all lalu kirim GET /todos serentak"""
+        print(f"🐘 CACHE STAMPEDE TEST")
+        print(f"   Concurrent GETs per stampede: {concurrency}")
+        print(f"   Rounds: {rounds}")
+        print("-" * 50)
+        
+        self.results["stampede"] = []
+        
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for round_number in range(1, rounds + 1):
+                # POST /todos meng-invalidate todos:all
+                self.create_todo()
+                
+                # Semua thread menunggu di barrier supaya request dikirim bersamaan
+                barrier = threading.Barrier(concurrency)
+                
+                def stampede_request(thread_id):
+                    barrier.wait()
+                    result = self.get_todos()
+                    result["thread_id"] = thread_id
+                    result["timestamp"] = time.time()
+                    result["round"] = round_number
+                    return result
+                
+                futures = [executor.submit(stampede_request, i) for i in range(concurrency)]
+                round_results = [future.result() for future in futures]
+                self.results["stampede"].extend(round_results)
+                
+                sources = defaultdict(int)
+                for r in round_results:
+                    sources[r.get("source", "error")] += 1
+                print(f"   Round {round_number:2d}: " +
+                      " | ".join(f"{source}: {count}" for source, count in sorted(sources.items())))
+                time.sleep(1)
+        
+        self.analyze_results("stampede")
+        
+        # Setiap response dengan source=database = satu query getAllTodos
+        db_queries = sum(1 for r in self.results["stampede"] if r.get("source") == "database")
+        print(f"   Database queries: {db_queries} for {rounds * concurrency} requests "
+              f"({db_queries / rounds:.1f} per stampede, unprotected would be {concurrency})")
+        print(f"   Database load reduction: {(1 - db_queries / (rounds * concurrency)) * 100:.1f}%")
+        print("-" * 50)
     
     def analyze_results(self, test_type):
         """Analyze test results"""
@@ -117,8 +1056,10 @@ class LoadTester:
         
         # Calculate statistics
         total_requests = len(results)
-        successful_requests = sum(1 for r in results if r.get("status", 0) in [200, 201])
-        failed_requests = total_requests - successful_requests
+        successful_requests = sum(1 for r in results if r.get("status", 0) in [200, 201, 304])
+        # 429 = ditolak rate limiter, bukan error aplikasi; dilaporkan terpisah
+        rate_limited = sum(1 for r in results if r.get("status") == 429)
+        failed_requests = total_requests - successful_requests - rate_limited
         
         response_times = [r.get("response_time", 0) for r in results if r.get("response_time", 0) > 0]
         
@@ -141,17 +1082,23 @@ class LoadTester:
         print(f"   Total Requests: {total_requests}")
         print(f"   Successful: {successful_requests} ({successful_requests/total_requests*100:.1f}%)")
         print(f"   Failed: {failed_requests} ({failed_requests/total_requests*100:.1f}%)")
+        print(f"   Rate Limited (429): {rate_limited} ({rate_limited/total_requests*100:.1f}%)")
         print(f"   Requests/Second: {rps:.2f}")
         print(f"   Response Time - Avg: {avg_response_time:.3f}s")
         print(f"   Response Time - Min: {min_response_time:.3f}s")
         print(f"   Response Time - Max: {max_response_time:.3f}s")
         
+        # Waktu per fase di server vs di luar API (jaringan + nginx)
+        # Request yang timeout/gagal konek tidak punya response_time
+        print_phase_breakdown([(r["response_time"] * 1000, r.get("server_timing")) for r in results
+                               if "response_time" in r])
+        
         # Show error distribution
         errors = defaultdict(int)
         for result in results:
             if result.get("error"):
                 errors[result["error"]] += 1
-            elif result.get("status", 0) not in [200, 201]:
+            elif result.get("status", 0) not in [200, 201, 304, 429]:
                 errors[f"HTTP {result.get('status', 0)}"] += 1
         
         if errors:
@@ -159,18 +1106,39 @@ class LoadTester:
             for error, count in errors.items():
                 print(f"     {error}: {count}")
         
+        # Distribusi per replica (health): response dari proxy tidak mengukur API
+        answered = [r for r in results if "reached_api" in r]
+        if answered:
+            proxied = sum(1 for r in answered if not r["reached_api"])
+            if proxied:
+                print(f"   ⚠️  {proxied}/{len(answered)} responses short-circuited by the proxy "
+                      f"(not JSON / no instance), this measures nginx, not the API")
+            instances = defaultdict(int)
+            for r in answered:
+                instances[r["instance"]] += 1
+            print(f"   Instance Distribution:")
+            for instance, count in sorted(instances.items()):
+                print(f"     {instance}: {count} requests")
+        
         print("-" * 50)
     
-    def test_scaling(self, max_threads=50, step=10, duration=30):
+    def test_scaling(self, max_threads=50, step=10, duration=30, endpoint=None):
         """Test scaling by gradually increasing load"""
         print(f"🔥 SCALING TEST - Gradually increasing load")
         print(f"   Starting with {step} threads, max {max_threads}")
+        
+        # Default: pilih endpoint yang benar-benar sampai ke replica API
+        self.health_endpoint = endpoint or self.detect_health_endpoint()
+        print(f"   Target: {self.base_url}{self.health_endpoint}")
         print("-" * 50)
         
-        for threads in range(step, max_threads + 1, step):
-            print(f"\n📈 Testing with {threads} threads:")
-            self.run_load_test("health", threads=threads, duration=duration)
-            time.sleep(2)  # Brief pause between tests
+        try:
+            for threads in range(step, max_threads + 1, step):
+                print(f"\n📈 Testing with {threads} threads:")
+                self.run_load_test("health", threads=threads, duration=duration)
+                time.sleep(2)  # Brief pause between tests
+        finally:
+            self.health_endpoint = "/health"
     
     def test_mixed_workload(self, threads=20, duration=60):
         """Test mixed workload (health, get, create)"""
@@ -214,6 +1182,9 @@ class LoadTester:
         for test_type in ["health", "get", "create"]:
             if self.results[test_type]:
                 self.analyze_results(test_type)
+        
+        if self.results["get"]:
+            self.analyze_cache_results(self.results["get"], "(GET /todos)")
 
 def main():
     tester = LoadTester()
@@ -226,10 +1197,21 @@ def main():
     print("4. Scaling Test (Gradual Load Increase)")
     print("5. Mixed Workload Test")
     print("6. Custom Test")
+    print("7. Cache Hit/Miss Test (Different Write Ratios)")
+    print("8. Pagination Test (Walk Pages)")
+    print("9. Cache Stampede Test")
+    print("10. Cache Mode Comparison (invalidate vs write-through)")
+    print("11. Bulk Create Test (Rows/Second per Batch Size)")
+    print("12. Prepared Statement Benchmark (High Write Concurrency)")
+    print("13. Create Todo Benchmark (Logging Overhead)")
+    print("14. Topology Benchmark (Replicas x Cluster Workers)")
+    print("15. Conditional GET Test (ETag / 304, Bytes Transferred)")
+    print("16. Upstream Timing Test (Client vs Nginx vs Backend, needs access log)")
+    print("17. Retry Amplification Test (Backend Executions per Request)")
     print("=" * 50)
     
     try:
-        choice = input("Select test (1-6): ").strip()
+        choice = input("Select test (1-17): ").strip()
         
         if choice == "1":
             threads = int(input("Number of threads (default 10): ") or "10")
@@ -250,7 +1232,8 @@ def main():
             max_threads = int(input("Maximum threads (default 50): ") or "50")
             step = int(input("Thread increment (default 10): ") or "10")
             duration = int(input("Duration per test (default 30): ") or "30")
-            tester.test_scaling(max_threads, step, duration)
+            endpoint = input("Endpoint (/backend-health, /live, /health; default auto-detect): ").strip() or None
+            tester.test_scaling(max_threads, step, duration, endpoint)
             
         elif choice == "5":
             threads = int(input("Number of threads (default 20): ") or "20")
@@ -263,6 +1246,69 @@ def main():
             duration = int(input("Duration in seconds: "))
             tester.run_load_test(test_type, threads, duration)
             
+        elif choice == "7":
+            threads = int(input("Number of threads (default 10): ") or "10")
+            duration = int(input("Duration per write ratio (default 30): ") or "30")
+            tester.test_cache_behavior(threads, duration)
+            
+        elif choice == "8":
+            threads = int(input("Number of threads (default 10): ") or "10")
+            duration = int(input("Duration in seconds (default 30): ") or "30")
+            page_size = int(input("Page size (default 50): ") or "50")
+            completed = input("Filter completed (true/false/empty for all): ").strip().lower()
+            completed = {"true": True, "false": False}.get(completed)
+            tester.test_pagination(threads, duration, page_size, completed)
+            
+        elif choice == "9":
+            concurrency = int(input("Concurrent requests per stampede (default 50): ") or "50")
+            rounds = int(input("Number of stampedes (default 10): ") or "10")
+            tester.test_stampede(concurrency, rounds)
+            
+        elif choice == "10":
+            threads = int(input("Number of threads (default 10): ") or "10")
+            duration = int(input("Duration per write ratio (default 30): ") or "30")
+            tester.test_cache_behavior(threads, duration)
+            tester.compare_cache_modes()
+            
+        elif choice == "11":
+            threads = int(input("Number of threads (default 5): ") or "5")
+            duration = int(input("Duration per batch size (default 30): ") or "30")
+            tester.test_bulk_create(threads, duration)
+            
+        elif choice == "12":
+            threads = int(input("Number of threads (default 50): ") or "50")
+            duration = int(input("Duration in seconds (default 60): ") or "60")
+            tester.test_prepared_statements(threads, duration)
+            
+        elif choice == "13":
+            threads = int(input("Number of threads (default 20): ") or "20")
+            duration = int(input("Duration in seconds (default 30): ") or "30")
+            tester.test_create_benchmark(threads, duration)
+            
+        elif choice == "14":
+            label = input("Topology label, e.g. 4x1 or 2x2 (replicas x workers): ").strip() or "unknown"
+            threads = int(input("Number of threads (default 30): ") or "30")
+            duration = int(input("Duration in seconds (default 60): ") or "60")
+            tester.test_topology(label, threads, duration)
+            
+        elif choice == "15":
+            threads = int(input("Number of threads (default 10): ") or "10")
+            duration = int(input("Duration per mode (default 30): ") or "30")
+            write_ratio = float(input("Write ratio 0-1 (default 0.05): ") or "0.05")
+            tester.test_conditional_get(threads, duration, write_ratio)
+            
+        elif choice == "16":
+            test_type = input("Test type (get/create, default get): ").strip().lower() or "get"
+            threads = int(input("Number of threads (default 10): ") or "10")
+            duration = int(input("Duration in seconds (default 30): ") or "30")
+            log_path = input("Access log path (default logs/nginx/access.log): ").strip() or "logs/nginx/access.log"
+            tester.test_upstream_timing(test_type, threads, duration, log_path)
+            
+        elif choice == "17":
+            threads = int(input("Number of threads (default 20): ") or "20")
+            duration = int(input("Duration in seconds (default 60): ") or "60")
+            tester.test_retry_amplification(threads, duration)
+            
         else:
             print("❌ Invalid choice")
             
@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+Mock Todo API - in-process server dengan route dan bentuk JSON yang sama
+dengan api/server.js, untuk mengukur kapasitas load generator tanpa Docker stack.
+
+Latency dan error bisa di-inject:
+    python mock_api_server.py --port 3999 --latency-ms 5 --error-rate 0.01
+"""
+import argparse
+import base64
+import json
+import os
+import random
+import socket
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Sama dengan api/server.js
+MAX_PAGE_SIZE = 200
+DEFAULT_PAGE_SIZE = 50
+MAX_BULK_SIZE = 1000
+
+
+def parse_integer_id(value):
+    """Number.isInteger(Number(id)) seperti server.js; None jika bukan integer"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return int(number) if number.is_integer() else None
+
+
+def now_iso():
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+class MockTodoStore:
+    """Todos di memory, urutan terbaru dulu seperti ORDER BY created_at DESC"""
+
+    def __init__(self, seed_todos=100):
+        self.lock = threading.Lock()
+        self.todos = []
+        self.next_id = 1
+        for i in range(seed_todos):
+            self.create(f"Seed Todo {i}", i % 3 == 0, "Mock data")
+
+    def create(self, title, completed=False, description=""):
+        with self.lock:
+            timestamp = now_iso()
+            todo = {
+                "id": self.next_id,
+                "title": title,
+                "completed": bool(completed),
+                "description": description,
+                "created_at": timestamp,
+                "updated_at": timestamp
+            }
+            self.next_id += 1
+            self.todos.insert(0, todo)
+            return todo
+
+    def update(self, todo_id, completed):
+        with self.lock:
+            for todo in self.todos:
+                if todo["id"] == todo_id:
+                    todo["completed"] = completed
+                    todo["updated_at"] = now_iso()
+                    return todo
+        return None
+
+    def delete(self, todo_id):
+        with self.lock:
+            for i, todo in enumerate(self.todos):
+                if todo["id"] == todo_id:
+                    del self.todos[i]
+                    return True
+        return False
+
+    def all(self):
+        with self.lock:
+            return list(self.todos)
+
+    def page(self, limit, offset, completed=None):
+        with self.lock:
+            todos = self.todos if completed is None else [t for t in self.todos if t["completed"] == completed]
+            data = todos[offset:offset + limit]
+            has_more = offset + limit < len(todos)
+        return data, has_more
+
+    def stats(self):
+        with self.lock:
+            total = len(self.todos)
+            completed = sum(1 for t in self.todos if t["completed"])
+        return {"total": total, "completed": completed, "pending": total - completed}
+
+
+class MockTodoAPI:
+    """Jalankan mock API di background thread: with MockTodoAPI(port=0) as api: api.base_url"""
+
+    def __init__(self, host="127.0.0.1", port=0, latency_ms=0.0, jitter_ms=0.0,
+                 error_rate=0.0, seed_todos=100, instance="mock-1", leak_kb_per_request=0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.instance = instance
+        self.seed_todos = seed_todos
+        self.leak_kb_per_request = leak_kb_per_request
+        self.store = MockTodoStore(seed_todos)
+        self.started_at = time.time()
+        self.seen = {}
+        self.lock = threading.Lock()
+
+        # CPU yang dipakai thread handler mock, supaya benchmark bisa
+        # memisahkan CPU client dari CPU server dalam proses yang sama
+        self.requests = 0
+        self.cpu_seconds = 0.0
+
+        handler = type("BoundMockHandler", (MockRequestHandler,), {"api": self})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    @property
+    def base_url(self):
+        return f"http://{self.server.server_address[0]}:{self.port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self.thread:
+            self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset(self):
+        """Kembalikan data ke kondisi awal (seed), mis. di antara run benchmark"""
+        self.store = MockTodoStore(self.seed_todos)
+        with self.lock:
+            self.seen.clear()
+
+    def record(self, cpu_seconds):
+        with self.lock:
+            self.requests += 1
+            self.cpu_seconds += cpu_seconds
+
+    def memory_usage(self):
+        """Bentuk process.memoryUsage() sintetis; heap naik leak_kb_per_request per request"""
+        heap_used = 16 * 1024 * 1024 + int(self.requests * self.leak_kb_per_request * 1024)
+        return {"rss": heap_used + 48 * 1024 * 1024, "heapTotal": heap_used + 4 * 1024 * 1024,
+                "heapUsed": heap_used, "external": 2 * 1024 * 1024}
+
+    def mark_seen(self, request_id):
+        with self.lock:
+            self.seen[request_id] = self.seen.get(request_id, 0) + 1
+            return self.seen[request_id]
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    api = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.handle_api("GET")
+
+    def do_POST(self):
+        self.handle_api("POST")
+
+    def do_PATCH(self):
+        self.handle_api("PATCH")
+
+    def do_DELETE(self):
+        self.handle_api("DELETE")
+
+    def handle_api(self, method):
+        cpu_start = time.thread_time()
+        wall_start = time.perf_counter()
+        api = self.api
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        body = self.read_body()
+        headers = {}
+
+        request_id = self.headers.get("X-Request-ID")
+        if request_id:
+            headers["X-Request-Seen"] = str(api.mark_seen(request_id))
+
+        # Latency injection: sleep tidak memakai CPU, jadi tidak dihitung ke cpu_seconds
+        delay = api.latency_ms + (random.uniform(0, api.jitter_ms) if api.jitter_ms else 0)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+        if api.error_rate and random.random() < api.error_rate:
+            status, payload = 500, {"error": "Internal server error"}
+        elif not isinstance(body, (dict, list)):
+            # express.json() strict: hanya object/array yang diterima
+            status, payload = 400, {"error": "Invalid JSON"}
+        else:
+            status, payload = self.route(method, url.path, query, body)
+
+        # Mock hanya punya satu fase (tanpa Redis/Postgres), format sama dengan server.js
+        headers["Server-Timing"] = f'total;dur={(time.perf_counter() - wall_start) * 1000:.2f};desc="Server total"'
+        self.send_json(status, payload, headers)
+        api.record(time.thread_time() - cpu_start)
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            return None
+
+    def send_json(self, status, payload, headers):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def route(self, method, path, query, body):
+        api = self.api
+        parts = [part for part in path.split("/") if part]
+
+        if method == "GET" and path == "/health":
+            return 200, {
+                "status": "healthy",
+                "instance": api.instance,
+                "hostname": socket.gethostname(),
+                "pid": os.getpid(),
+                "timestamp": now_iso(),
+                "uptime": time.time() - api.started_at,
+                "memory": api.memory_usage(),
+                "checks": {"database": "healthy", "redis": "healthy"},
+                "checkedAt": now_iso(),
+                "deep": query.get("deep") in ("1", "true")
+            }
+        if method == "GET" and path == "/live":
+            return 200, {"status": "alive", "instance": api.instance, "hostname": socket.gethostname(),
+                         "pid": os.getpid(), "timestamp": now_iso(),
+                         "uptime": time.time() - api.started_at, "memory": api.memory_usage()}
+        if method == "GET" and path == "/ready":
+            return 200, {"status": "ready", "instance": api.instance, "hostname": socket.gethostname(),
+                         "pid": os.getpid(), "timestamp": now_iso()}
+        if method == "GET" and path == "/metrics":
+            return 200, {
+                "instance": api.instance,
+                "timestamp": now_iso(),
+                "pool": {"max": 20, "total": 1, "idle": 1, "waiting": 0,
+                         "acquire": {"count": 0, "errors": 0, "totalWaitMs": 0, "avgWaitMs": 0, "maxWaitMs": 0,
+                                     "recentMaxWaitMs": 0, "recentWindowSeconds": 60}},
+                "preparedStatements": True,
+                "logLevel": "info"
+            }
+        if method == "GET" and path == "/stats":
+            return 200, {"source": "cache", "instance": api.instance, "stats": api.store.stats()}
+
+        # Body array hanya valid untuk /todos/bulk; seperti destructuring di server.js
+        # field-nya dianggap tidak ada
+        fields = body if isinstance(body, dict) else {}
+
+        if parts[:1] == ["todos"] and len(parts) == 1:
+            if method == "GET":
+                return self.get_todos(query)
+            if method == "POST":
+                if not fields.get("title"):
+                    return 400, {"error": "Title is required"}
+                todo = api.store.create(fields["title"], fields.get("completed", False), fields.get("description", ""))
+                return 201, {"instance": api.instance, "data": todo}
+
+        if parts == ["todos", "bulk"] and method in ("POST", "PATCH"):
+            return self.bulk(method, body)
+
+        if parts[:1] == ["todos"] and len(parts) == 2 and parts[1].isdigit():
+            todo_id = int(parts[1])
+            if method == "PATCH":
+                todo = api.store.update(todo_id, fields.get("completed"))
+                if todo is None:
+                    return 404, {"error": "Todo not found"}
+                return 200, {"instance": api.instance, "data": todo}
+            if method == "DELETE":
+                if not api.store.delete(todo_id):
+                    return 404, {"error": "Todo not found"}
+                return 200, {"instance": api.instance, "message": "Todo deleted successfully"}
+
+        return 404, {"error": "Not found"}
+
+    def get_todos(self, query):
+        api = self.api
+        if not any(key in query for key in ("limit", "cursor", "completed")):
+            return 200, {"source": "memory", "instance": api.instance, "data": api.store.all()}
+
+        try:
+            limit = int(query.get("limit", DEFAULT_PAGE_SIZE))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            return 400, {"error": f"limit must be an integer between 1 and {MAX_PAGE_SIZE}"}
+
+        completed = None
+        if "completed" in query:
+            if query["completed"] not in ("true", "false"):
+                return 400, {"error": "completed must be true or false"}
+            completed = query["completed"] == "true"
+
+        # Cursor mock = offset (API asli memakai keyset created_at/id)
+        offset = 0
+        if query.get("cursor"):
+            try:
+                offset = int(base64.urlsafe_b64decode(query["cursor"].encode()).decode())
+            except ValueError:
+                return 400, {"error": "Invalid cursor"}
+            if offset < 0:
+                return 400, {"error": "Invalid cursor"}
+
+        data, has_more = api.store.page(limit, offset, completed)
+        next_cursor = base64.urlsafe_b64encode(str(offset + limit).encode()).decode() if has_more else None
+        return 200, {
+            "source": "cache",
+            "instance": api.instance,
+            "data": data,
+            "pagination": {"limit": limit, "nextCursor": next_cursor}
+        }
+
+    def bulk(self, method, body):
+        api = self.api
+        items = body if isinstance(body, list) else body.get("todos")
+        if not isinstance(items, list) or not items:
+            return 400, {"error": "Request body must contain a non-empty todos array"}
+        if len(items) > MAX_BULK_SIZE:
+            return 400, {"error": f"At most {MAX_BULK_SIZE} todos per request"}
+
+        if method == "POST":
+            invalid = next((i for i, item in enumerate(items) if not isinstance(item, dict) or not item.get("title")), None)
+            if invalid is not None:
+                return 400, {"error": f"Title is required (item {invalid})"}
+            todos = [api.store.create(item.get("title"), item.get("completed", False), item.get("description", ""))
+                     for item in items]
+            return 201, {"instance": api.instance, "count": len(todos), "data": todos}
+
+        invalid = next((i for i, item in enumerate(items)
+                        if not isinstance(item, dict) or parse_integer_id(item.get("id")) is None
+                        or not isinstance(item.get("completed"), bool)), None)
+        if invalid is not None:
+            return 400, {"error": f"Integer id and boolean completed are required (item {invalid})"}
+
+        todos = []
+        not_found = []
+        for item in items:
+            todo = api.store.update(parse_integer_id(item["id"]), item["completed"])
+            if todo is None:
+                not_found.append(item.get("id"))
+            else:
+                todos.append(todo)
+        return 200, {"instance": api.instance, "count": len(todos), "notFound": not_found, "data": todos}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='In-process mock of the Todo API')
+    parser.add_argument('--port', type=int, default=3999,
+                       help='Port to listen on (default: 3999)')
+    parser.add_argument('--latency-ms', type=float, default=0,
+                       help='Fixed latency added to every request (default: 0)')
+    parser.add_argument('--jitter-ms', type=float, default=0,
+                       help='Random extra latency 0..jitter per request (default: 0)')
+    parser.add_argument('--error-rate', type=float, default=0,
+                       help='Fraction of requests answered with HTTP 500 (default: 0)')
+    parser.add_argument('--seed-todos', type=int, default=100,
+                       help='Number of todos created at startup (default: 100)')
+    parser.add_argument('--leak-kb', type=float, default=0,
+                       help='Simulated heap growth per request in KB, for memory_trend.py (default: 0)')
+
+    args = parser.parse_args()
+
+    api = MockTodoAPI(port=args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                      error_rate=args.error_rate, seed_todos=args.seed_todos,
+                      leak_kb_per_request=args.leak_kb)
+    print(f"🧪 Mock Todo API listening on {api.base_url}")
+    try:
+        api.server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏹️  Mock API stopped")
+        api.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Nginx Access Log Parser - upstream timing per request
+Membaca log format "main" di nginx-swarm.conf / nginx.conf:
+
+    ... "$request" $status $body_bytes_sent "$http_referer" "$http_user_agent"
+    "$http_x_forwarded_for" rt=$request_time uct="$upstream_connect_time"
+    uht="$upstream_header_time" urt="$upstream_response_time" rid=$http_x_request_id
+
+Log nginx:alpine default-nya symlink ke stdout; untuk membaca file, mount
+direktori log (lihat docker-stack.yml) atau simpan output
+`docker service logs -f <stack>_nginx` ke file.
+"""
+import os
+import re
+import sys
+import threading
+import time
+
+# Slow path: hanya dipakai jika fast path gagal (baris dengan format tidak biasa)
+LOG_PATTERN = re.compile(
+    r'"(?P<request>[^"]*)" (?P<status>\d{3}) (?P<bytes>\d+) .*?'
+    r' rt=(?P<rt>[\d.]+) uct="(?P<uct>[^"]*)" uht="(?P<uht>[^"]*)" urt="(?P<urt>[^"]*)"'
+    r'(?: rid=(?P<rid>\S+))?'
+)
+
+TIMING_FIELDS = ("rt", "uct", "uht", "urt")
+
+
+def upstream_seconds(value):
+    """Total waktu upstream; "0.001, 0.004" (retry ke upstream lain) dijumlahkan, "-" = None"""
+    total = None
+    for part in value.replace(":", ",").split(","):
+        part = part.strip()
+        if part and part != "-":
+            total = (total or 0.0) + float(part)
+    return total
+
+
+def parse_fast(line):
+    """Parse tanpa regex: status dari setelah "$request", timing dari key=value di akhir baris"""
+    _, _, rest = line.partition('] "')
+    _, _, after_request = rest.partition('" ')
+    status, body_bytes, _ = after_request.split(" ", 2)
+
+    start = line.rfind(" rt=")
+    if start < 0:
+        return None
+
+    fields = {}
+    tail = line[start + 1:].rstrip("\r\n")
+    while tail:
+        key, sep, tail = tail.partition("=")
+        if not sep:
+            break
+        if tail.startswith('"'):
+            value, _, tail = tail[1:].partition('"')
+            tail = tail.lstrip(" ")
+        else:
+            value, _, tail = tail.partition(" ")
+        fields[key] = value
+
+    return build_entry(int(status), int(body_bytes), fields)
+
+
+def parse_slow(line):
+    match = LOG_PATTERN.search(line)
+    if not match:
+        return None
+    return build_entry(int(match["status"]), int(match["bytes"]), match.groupdict(default="-"))
+
+
+def build_entry(status, body_bytes, fields):
+    entry = {"status": status, "bytes": body_bytes, "request_id": fields.get("rid", "-")}
+    entry["rt"] = float(fields["rt"])
+    for name in TIMING_FIELDS[1:]:
+        entry[name] = upstream_seconds(fields.get(name, "-"))
+    return entry
+
+
+def parse_line(line):
+    """Return dict status/bytes/request_id/rt/uct/uht/urt (detik), atau None"""
+    try:
+        entry = parse_fast(line)
+        if entry is not None:
+            return entry
+    except (ValueError, KeyError):
+        pass
+    try:
+        return parse_slow(line)
+    except (ValueError, KeyError):
+        return None
+
+
+class NginxLogTailer:
+    """Ikuti access log (seperti tail -F) di background thread dan simpan timing per request ID"""
+
+    def __init__(self, path, from_start=False, poll_interval=0.2):
+        self.path = path
+        self.from_start = from_start
+        self.poll_interval = poll_interval
+        self.timings = {}
+        self.lines = 0
+        self.unparsed = 0
+        self.lock = threading.Lock()
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.follow, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self, drain_seconds=1.0):
+        """Tunggu sebentar supaya nginx sempat menulis baris terakhir, lalu berhenti"""
+        time.sleep(drain_seconds)
+        self.running = False
+        if self.thread:
+            self.thread.join()
+
+    def follow(self):
+        handle = open(self.path, "rb")
+        if not self.from_start:
+            handle.seek(0, os.SEEK_END)
+        inode = os.fstat(handle.fileno()).st_ino
+        pending = b""
+
+        try:
+            while self.running:
+                chunk = handle.readline()
+                if chunk:
+                    # Baris yang belum lengkap digabung dengan sisa yang ditulis berikutnya
+                    pending += chunk
+                    if pending.endswith(b"\n"):
+                        self.ingest(pending.decode("utf-8", errors="replace"))
+                        pending = b""
+                    continue
+
+                time.sleep(self.poll_interval)
+
+                # Log di-rotate (inode baru) atau di-truncate: buka ulang dari awal
+                try:
+                    stat = os.stat(self.path)
+                except FileNotFoundError:
+                    continue
+                if stat.st_ino != inode or stat.st_size < handle.tell():
+                    handle.close()
+                    handle = open(self.path, "rb")
+                    inode = os.fstat(handle.fileno()).st_ino
+                    pending = b""
+        finally:
+            handle.close()
+
+    def ingest(self, line):
+        entry = parse_line(line)
+        with self.lock:
+            self.lines += 1
+            if entry is None:
+                self.unparsed += 1
+            elif entry["request_id"] != "-":
+                self.timings[entry["request_id"]] = entry
+
+    def lookup(self, request_id):
+        with self.lock:
+            return self.timings.get(request_id)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def print_latency_breakdown(rows, title="LATENCY BREAKDOWN"):
+    """rows: list of dict dengan client/rt/uct/urt (detik); tampilkan per percentile dalam ms"""
+    columns = [
+        ("client", "Client"),
+        ("rt", "Nginx total"),
+        ("uct", "Upstream conn"),
+        ("urt", "Upstream resp"),
+    ]
+    print(f"📐 {title} ({len(rows)} requests):")
+    print(f"   {'':>6} " + " ".join(f"{label:>14}" for _, label in columns))
+    for name, p in (("P50", 0.50), ("P90", 0.90), ("P95", 0.95), ("P99", 0.99)):
+        cells = []
+        for key, _ in columns:
+            values = [r[key] for r in rows if r.get(key) is not None]
+            cells.append(f"{percentile(values, p) * 1000:12.1f}ms" if values else f"{'-':>14}")
+        print(f"   {name:>6} " + " ".join(cells))
+
+    # Selisih client vs nginx = jaringan/antrian di sisi client, nginx vs upstream = proxy
+    joined = [r for r in rows if r.get("client") is not None and r.get("urt") is not None]
+    if joined:
+        proxy = sum(r["rt"] - r["urt"] for r in joined) / len(joined)
+        network = sum(r["client"] - r["rt"] for r in joined) / len(joined)
+        print(f"   Avg time in nginx (rt - urt): {proxy * 1000:.1f}ms | "
+              f"Avg outside nginx (client - rt): {network * 1000:.1f}ms")
+
+
+def summarize_file(path):
+    """Ringkasan timing seluruh file log (tanpa join ke load test)"""
+    rows = []
+    unparsed = 0
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            entry = parse_line(line)
+            if entry is None:
+                unparsed += 1
+            else:
+                rows.append(entry)
+
+    if not rows:
+        print(f"❌ No parsable lines in {path}")
+        return
+    print_latency_breakdown(rows, f"NGINX TIMING {path}")
+    if unparsed:
+        print(f"   Unparsed lines: {unparsed}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print(f"Usage: {sys.argv[0]} <access.log>")
+        sys.exit(1)
+    summarize_file(sys.argv[1])
@@ -9,18 +9,26 @@ import time
 from concurrent.futures import ThreadPoolExecutor
 import random
 
-def quick_health_test(thread_id, results, base_url="http://localhost"):
+def quick_health_test(thread_id, results, base_url="http://localhost", path="/health"):
     """Single health check request"""
     try:
         start = time.time()
-        response = requests.get(f"{base_url}/health", timeout=3)
+        response = requests.get(f"{base_url}{path}", timeout=3)
         end = time.time()
         
+        # Hanya response JSON dengan field instance yang berasal dari API;
+        # nginx menjawab /health sendiri dengan text "healthy"
+        try:
+            instance = response.json().get("instance")
+        except ValueError:
+            instance = None
+        
         results.append({
             "thread": thread_id,
             "status": response.status_code,
             "response_time": end - start,
-            "server": response.headers.get('Server', 'Unknown')
+            "server": response.headers.get('Server', 'Unknown'),
+            "instance": instance or "proxy"
         })
     except Exception as e:
         results.append({
@@ -29,10 +37,10 @@ def quick_health_test(thread_id, results, base_url="http://localhost"):
             "error": str(e)
         })
 
-def run_quick_test(concurrent_requests=20, base_url="http://localhost"):
+def run_quick_test(concurrent_requests=20, base_url="http://localhost", path="/health"):
     """Run quick load test"""
     print(f"🚀 Quick Load Test - {concurrent_requests} concurrent requests")
-    print(f"   Target: {base_url}/health")
+    print(f"   Target: {base_url}{path}")
     print("-" * 40)
     
     results = []
@@ -41,7 +49,7 @@ def run_quick_test(concurrent_requests=20, base_url="http://localhost"):
     with ThreadPoolExecutor(max_workers=concurrent_requests) as executor:
         futures = []
         for i in range(concurrent_requests):
-            future = executor.submit(quick_health_test, i, results, base_url)
+            future = executor.submit(quick_health_test, i, results, base_url, path)
             futures.append(future)
         
         # Wait for completion
@@ -80,10 +88,24 @@ def run_quick_test(concurrent_requests=20, base_url="http://localhost"):
         for server, count in servers.items():
             print(f"     {server}: {count} requests")
     
+    # Distribusi per replica API
+    instances = {}
+    for r in results:
+        if r.get("status") == 200:
+            instances[r["instance"]] = instances.get(r["instance"], 0) + 1
+    
+    if instances.get("proxy"):
+        print(f"   ⚠️  {instances['proxy']} responses came from the proxy, not the API "
+              f"(try /backend-health or /live)")
+    if instances:
+        print(f"   Instance Distribution:")
+        for instance, count in sorted(instances.items()):
+            print(f"     {instance}: {count} requests")
+    
     print("-" * 40)
     return results
 
-def test_scaling_levels():
+def test_scaling_levels(path="/health"):
     """Test different scaling levels"""
     base_url = "http://localhost"
     
@@ -91,11 +113,12 @@ def test_scaling_levels():
     levels = [5, 10, 20, 30, 50]
     
     print("🔥 SCALING TEST - Different Load Levels")
+    print(f"   Endpoint: {path}")
     print("=" * 50)
     
     for level in levels:
         print(f"\n📈 Testing {level} concurrent requests:")
-        run_quick_test(level, base_url)
+        run_quick_test(level, base_url, path)
         time.sleep(1)  # Brief pause between tests
 
 if __name__ == "__main__":
@@ -104,10 +127,11 @@ if __name__ == "__main__":
     print("1. Quick Test (20 requests)")
     print("2. Custom Test")
     print("3. Scaling Test (5, 10, 20, 30, 50 requests)")
+    print("4. API Scaling Test (/backend-health or /live, reaches the replicas)")
     print("=" * 50)
     
     try:
-        choice = input("Select option (1-3): ").strip()
+        choice = input("Select option (1-4): ").strip()
         
         if choice == "1":
             run_quick_test()
@@ -120,6 +144,10 @@ if __name__ == "__main__":
         elif choice == "3":
             test_scaling_levels()
             
+        elif choice == "4":
+            path = input("Endpoint (default /backend-health): ").strip() or "/backend-health"
+            test_scaling_levels(path)
+            
         else:
             print("❌ Invalid choice")
             
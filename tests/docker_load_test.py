@@ -9,22 +9,40 @@ import requests
 import threading
 import time
 import json
+import os
+import random
 import docker
 import psutil
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
 import argparse
 
+from memory_trend import instance_key
+from phases import PhaseWindow, print_excluded_phases
+from soak import SoakRecorder, load_snapshots, monitor_soak, print_soak_report
+
 class DockerLoadTester:
-    def __init__(self, base_url="http://localhost", num_users=10, duration=60):
+    def __init__(self, base_url="http://localhost", num_users=10, duration=60, bypass_token=None,
+                 warmup=0, cooldown=0, auto_warmup=False):
         self.base_url = base_url
         self.num_users = num_users
         self.duration = duration
         self.results = []
+        self.start_time = None
         self.container_stats = []
         self.docker_client = None
         self.lock = threading.Lock()
         
+        # Header bypass rate limiter (RATE_LIMIT_BYPASS_TOKEN di server)
+        self.headers = {'X-RateLimit-Bypass': bypass_token} if bypass_token else {}
+        
+        # Soak mode: request dan container stats diagregasi per window (lihat run_soak_test)
+        self.recorder = None
+        
+        # Warm-up / cool-down windows (detik), tidak ikut statistik utama
+        # (sama seperti TodoLoadTester di load_test.py)
+        self.phases = PhaseWindow(duration, warmup, cooldown, auto_warmup)
+        
         # Initialize Docker client
         try:
             self.docker_client = docker.from_env()
@@ -85,7 +103,11 @@ class DockerLoadTester:
         
         while hasattr(self, 'test_running') and self.test_running:
             stats = self.get_container_stats()
-            if stats:
+            if stats and self.recorder:
+                for container_name, container_stats in stats.items():
+                    self.recorder.record_container(container_name, container_stats['cpu_percent'],
+                                                   container_stats['memory_usage_mb'])
+            elif stats:
                 with self.lock:
                     self.container_stats.append({
                         'timestamp': datetime.now(),
@@ -106,16 +128,21 @@ class DockerLoadTester:
         """Make HTTP request with timing"""
         url = f"{self.base_url}{endpoint}"
         start_time = time.time()
+        phase = self.phases.get_phase(start_time)
         
         try:
             if method == "GET":
-                response = requests.get(url, timeout=10)
+                response = requests.get(url, timeout=10, headers=self.headers)
             elif method == "POST":
-                response = requests.post(url, json=data, timeout=10)
+                response = requests.post(url, json=data, timeout=10, headers=self.headers)
             
             end_time = time.time()
             response_time = (end_time - start_time) * 1000
             
+            if self.recorder:
+                self.recorder.record(f"{method} {endpoint}", response_time, response.status_code)
+                return response
+            
             with self.lock:
                 result = {
                     'method': method,
@@ -123,7 +150,8 @@ class DockerLoadTester:
                     'status_code': response.status_code,
                     'response_time': response_time,
                     'timestamp': datetime.now(),
-                    'success': response.status_code < 400
+                    'success': response.status_code < 400,
+                    'phase': phase
                 }
                 self.results.append(result)
             
@@ -133,6 +161,10 @@ class DockerLoadTester:
             end_time = time.time()
             response_time = (end_time - start_time) * 1000
             
+            if self.recorder:
+                self.recorder.record(f"{method} {endpoint}", response_time)
+                return None
+            
             with self.lock:
                 error = {
                     'method': method,
@@ -140,7 +172,8 @@ class DockerLoadTester:
                     'error': str(e),
                     'response_time': response_time,
                     'timestamp': datetime.now(),
-                    'success': False
+                    'success': False,
+                    'phase': phase
                 }
                 self.results.append(error)
             
@@ -167,9 +200,13 @@ class DockerLoadTester:
         """Run the Docker load test"""
         print(f"Starting Docker Load Test")
         print(f"Users: {self.num_users} | Duration: {self.duration}s | URL: {self.base_url}")
+        if self.phases.enabled:
+            print(self.phases.describe())
         print("-" * 60)
         
         self.test_running = True
+        self.start_time = time.time()
+        self.phases.start(lambda: self.results)
         
         # Start container monitoring
         if self.docker_client:
@@ -189,6 +226,7 @@ class DockerLoadTester:
             
             # Stop test
             self.test_running = False
+            self.phases.stop()
             
             # Wait for threads to finish
             for future in futures:
@@ -197,6 +235,197 @@ class DockerLoadTester:
                 except:
                     pass
     
+    def run_soak_test(self, recorder, health_interval=15):
+        """Test panjang (self.duration detik) dengan agregasi per window dan snapshot ke disk"""
+        self.recorder = recorder
+        print(f"Starting Docker Soak Test")
+        print(f"Users: {self.num_users} | Duration: {self.duration / 3600:.1f} hours | URL: {self.base_url}")
+        print(f"Window: {recorder.window_seconds}s | Snapshots: {recorder.snapshot_path}")
+        print("-" * 60)
+        
+        self.test_running = True
+        
+        # Container stats ikut masuk window; print per 5 detik dimatikan lewat recorder
+        if self.docker_client:
+            monitor_thread = threading.Thread(target=self.monitor_containers)
+            monitor_thread.daemon = True
+            monitor_thread.start()
+        
+        soak_thread = threading.Thread(
+            target=monitor_soak,
+            args=(recorder, self.base_url, self.headers, lambda: self.test_running, health_interval)
+        )
+        soak_thread.daemon = True
+        soak_thread.start()
+        
+        end_time = time.time() + self.duration
+        with ThreadPoolExecutor(max_workers=self.num_users) as executor:
+            futures = [
+                executor.submit(self.user_simulation, user_id)
+                for user_id in range(1, self.num_users + 1)
+            ]
+            try:
+                while time.time() < end_time:
+                    time.sleep(1)
+            finally:
+                self.test_running = False
+                for future in futures:
+                    try:
+                        future.result(timeout=10)
+                    except:
+                        pass
+                recorder.close()
+    
+    def scale_service(self, service_name, replicas, timeout=180):
+        """Scale service swarm, tunggu semua task running lalu /ready; False jika timeout"""
+        service = self.docker_client.services.get(service_name)
+        service.scale(replicas)
+        deadline = time.time() + timeout
+        
+        while time.time() < deadline:
+            tasks = service.tasks(filters={'desired-state': 'running'})
+            running = [t for t in tasks if t['Status']['State'] == 'running']
+            if len(running) == replicas:
+                return self.wait_ready(replicas, deadline)
+            time.sleep(2)
+        return False
+    
+    def wait_ready(self, replicas, deadline):
+        """Tunggu sampai /ready 200 datang dari `replicas` replica yang berbeda
+        
+        Replica Swarm berbagi INSTANCE_NAME, jadi dibedakan lewat hostname/pid di
+        body /ready (instance_key). Streak 200 lewat nginx saja tidak cukup: replica
+        baru yang belum siap bisa tidak pernah terkena request sama sekali.
+        """
+        seen = set()
+        session = requests.Session()
+        while time.time() < deadline:
+            try:
+                response = session.get(f"{self.base_url}/ready", timeout=5, headers=self.headers)
+                if response.status_code == 200:
+                    seen.add(instance_key(response.json()))
+            except (requests.RequestException, ValueError):
+                pass
+            if len(seen) >= replicas:
+                return True
+            time.sleep(0.2)
+        print(f"  ⚠️  Only {len(seen)}/{replicas} replicas answered /ready: {', '.join(sorted(seen)) or '-'}")
+        return False
+    
+    def sweep_worker(self, user_id, write_ratio):
+        """Workload tetap tanpa think time: GET /todos dan sebagian kecil POST /todos"""
+        while self.test_running:
+            if random.random() < write_ratio:
+                self.make_request("POST", "/todos", {
+                    "title": f"Sweep Todo {user_id}-{int(time.time())}",
+                    "completed": False,
+                    "description": f"Created by scaling sweep user {user_id}"
+                })
+            else:
+                self.make_request("GET", "/todos")
+    
+    def run_fixed_workload(self, write_ratio):
+        """Jalankan workload yang sama (users, durasi, mix) dan return ringkasan throughput"""
+        self.results = []
+        self.test_running = True
+        start_time = time.time()
+        
+        with ThreadPoolExecutor(max_workers=self.num_users) as executor:
+            futures = [
+                executor.submit(self.sweep_worker, user_id, write_ratio)
+                for user_id in range(1, self.num_users + 1)
+            ]
+            time.sleep(self.duration)
+            self.test_running = False
+            for future in futures:
+                try:
+                    future.result(timeout=10)
+                except:
+                    pass
+        
+        elapsed = time.time() - start_time
+        successful = [r for r in self.results if r.get('success')]
+        times = sorted(r['response_time'] for r in successful)
+        percentile = lambda p: times[min(len(times) - 1, int(len(times) * p))] if times else 0
+        return {
+            'requests': len(self.results),
+            'rps': len(successful) / elapsed if elapsed > 0 else 0,
+            'error_rate': (len(self.results) - len(successful)) / len(self.results) * 100 if self.results else 0,
+            'p50': percentile(0.50),
+            'p95': percentile(0.95)
+        }
+    
+    def run_scaling_sweep(self, service_name, max_replicas, write_ratio=0.1, settle_time=5):
+        """Scale service API 1..max_replicas dan ukur throughput pada setiap ukuran"""
+        if not self.docker_client:
+            print("❌ Scaling sweep needs the Docker client")
+            return None
+        
+        try:
+            service = self.docker_client.services.get(service_name)
+        except docker.errors.APIError as e:
+            print(f"❌ Service {service_name} not found (is this a swarm stack?): {e}")
+            return None
+        original_replicas = service.attrs['Spec']['Mode'].get('Replicated', {}).get('Replicas')
+        
+        print(f"Starting Scaling Sweep: {service_name} 1..{max_replicas} replicas")
+        print(f"Users: {self.num_users} | Duration per size: {self.duration}s | "
+              f"Write ratio: {write_ratio:.0%} | URL: {self.base_url}")
+        print("-" * 60)
+        
+        sweep = {}
+        try:
+            for replicas in range(1, max_replicas + 1):
+                print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Scaling to {replicas} replica(s)...")
+                if not self.scale_service(service_name, replicas):
+                    print(f"⚠️  {replicas} replica(s) not ready in time, skipping this size")
+                    continue
+                
+                # Beri waktu koneksi pool dan cache replica baru terisi
+                time.sleep(settle_time)
+                result = self.run_fixed_workload(write_ratio)
+                sweep[replicas] = result
+                print(f"  {replicas} replica(s): {result['rps']:8.1f} req/s | "
+                      f"P50: {result['p50']:7.1f}ms | P95: {result['p95']:7.1f}ms | "
+                      f"Errors: {result['error_rate']:5.1f}%")
+        finally:
+            if original_replicas:
+                print(f"\nRestoring {service_name} to {original_replicas} replica(s)")
+                self.docker_client.services.get(service_name).scale(original_replicas)
+        
+        self.report_scaling_sweep(sweep)
+        return sweep
+    
+    def report_scaling_sweep(self, sweep):
+        """Throughput per replica dan efisiensi scaling relatif ke ukuran terkecil"""
+        if not sweep:
+            print("No sweep results to report!")
+            return
+        
+        base_replicas = min(sweep)
+        base_rps = sweep[base_replicas]['rps']
+        
+        print("\n" + "="*60)
+        print("SCALING SWEEP RESULTS")
+        print("="*60)
+        print(f"{'Replicas':>8} {'RPS':>10} {'RPS/replica':>12} {'Speedup':>8} {'Efficiency':>10} {'P95':>10}")
+        for replicas in sorted(sweep):
+            result = sweep[replicas]
+            speedup = result['rps'] / base_rps if base_rps else 0
+            # Efisiensi 100% = throughput naik sebanding dengan jumlah replica
+            efficiency = speedup / (replicas / base_replicas) * 100
+            print(f"{replicas:8d} {result['rps']:10.1f} {result['rps'] / replicas:12.1f} "
+                  f"{speedup:7.2f}x {efficiency:9.1f}% {result['p95']:8.1f}ms")
+        
+        best = max(sweep, key=lambda r: sweep[r]['rps'])
+        print(f"\nPeak throughput at {best} replica(s): {sweep[best]['rps']:.1f} req/s")
+        low = [r for r in sorted(sweep) if r > base_replicas and
+               sweep[r]['rps'] / base_rps / (r / base_replicas) < 0.7]
+        if low:
+            print(f"⚠️  Scaling efficiency drops below 70% from {low[0]} replicas: "
+                  f"the bottleneck is likely shared (Postgres, Redis, nginx or the load generator)")
+        print("="*60)
+    
     def analyze_container_performance(self):
         """Analyze container performance during test"""
         if not self.container_stats:
@@ -247,15 +476,21 @@ class DockerLoadTester:
             print("No results to report!")
             return
         
+        # Statistik utama hanya dari steady state; warm-up/cool-down dilaporkan terpisah
+        steady_results = [r for r in self.results if r.get('phase', 'steady') == 'steady']
+        if not steady_results:
+            print("No steady-state results (warm-up/cool-down cover the whole test), using all results")
+            steady_results = self.results
+        
         # Basic statistics
-        total_requests = len(self.results)
-        successful_requests = [r for r in self.results if r.get('success', False)]
-        failed_requests = [r for r in self.results if not r.get('success', False)]
+        total_requests = len(steady_results)
+        successful_requests = [r for r in steady_results if r.get('success', False)]
+        failed_requests = [r for r in steady_results if not r.get('success', False)]
         
         success_rate = (len(successful_requests) / total_requests) * 100
         
         # Response time analysis
-        response_times = [r['response_time'] for r in self.results if 'response_time' in r]
+        response_times = [r['response_time'] for r in steady_results if 'response_time' in r]
         if response_times:
             avg_response_time = sum(response_times) / len(response_times)
             min_response_time = min(response_times)
@@ -264,12 +499,13 @@ class DockerLoadTester:
             avg_response_time = min_response_time = max_response_time = 0
         
         # Calculate RPS
-        rps = total_requests / self.duration
+        duration = self.phases.steady_duration() if steady_results is not self.results else self.duration
+        rps = total_requests / duration
         
         print("\n" + "="*60)
         print("DOCKER LOAD TEST RESULTS")
         print("="*60)
-        print(f"Test Duration: {self.duration} seconds")
+        print(f"Test Duration: {duration:.1f} seconds")
         print(f"Concurrent Users: {self.num_users}")
         print(f"Total Requests: {total_requests}")
         print(f"Successful Requests: {len(successful_requests)}")
@@ -282,6 +518,9 @@ class DockerLoadTester:
         print(f"  Average: {avg_response_time:.2f} ms")
         print(f"  Minimum: {min_response_time:.2f} ms")
         print(f"  Maximum: {max_response_time:.2f} ms")
+        print()
+        
+        print_excluded_phases(self.phases, self.results)
         
         # Container performance analysis
         self.analyze_container_performance()
@@ -327,10 +566,36 @@ def main():
     parser.add_argument('--users', type=int, default=10,
                        help='Number of concurrent users')
     parser.add_argument('--duration', type=int, default=60,
-                       help='Test duration in seconds')
+                       help='Test duration in seconds (per replica count with --sweep)')
+    parser.add_argument('--warmup', type=int, default=0,
+                       help='Warm-up seconds excluded from statistics (default: 0)')
+    parser.add_argument('--cooldown', type=int, default=0,
+                       help='Cool-down seconds excluded from statistics (default: 0)')
+    parser.add_argument('--auto-warmup', action='store_true',
+                       help='End warm-up automatically once latency is steady (--warmup is the upper bound)')
+    parser.add_argument('--bypass-token', default=os.environ.get('RATE_LIMIT_BYPASS_TOKEN'),
+                       help='X-RateLimit-Bypass token so the load generator skips the API rate limiter')
+    parser.add_argument('--sweep', type=int, metavar='MAX_REPLICAS',
+                       help='Scale the API service through 1..MAX_REPLICAS and run the same workload at each size')
+    parser.add_argument('--service', default='todo-app_api',
+                       help='Swarm service to scale with --sweep (default: todo-app_api)')
+    parser.add_argument('--write-ratio', type=float, default=0.1,
+                       help='Fraction of POST /todos in the sweep workload (default: 0.1)')
+    parser.add_argument('--soak', type=float, metavar='HOURS',
+                       help='Run a soak test for this many hours, aggregated per window (overrides --duration)')
+    parser.add_argument('--window', type=int, default=60,
+                       help='Soak window length in seconds (default: 60)')
+    parser.add_argument('--snapshot-file', default='docker_soak_snapshots.jsonl',
+                       help='Soak snapshot file; an existing file is resumed (default: docker_soak_snapshots.jsonl)')
+    parser.add_argument('--report-from', metavar='SNAPSHOT_FILE',
+                       help='Only print the soak report from an existing snapshot file')
     
     args = parser.parse_args()
     
+    if args.report_from:
+        print_soak_report(load_snapshots(args.report_from), f"SOAK TEST REPORT ({args.report_from})")
+        return
+    
     # Check if application is running
     try:
         response = requests.get(f"{args.url}/health", timeout=5)
@@ -347,9 +612,31 @@ def main():
     tester = DockerLoadTester(
         base_url=args.url,
         num_users=args.users,
-        duration=args.duration
+        duration=args.duration,
+        bypass_token=args.bypass_token,
+        warmup=args.warmup,
+        cooldown=args.cooldown,
+        auto_warmup=args.auto_warmup
     )
     
+    if args.sweep:
+        try:
+            tester.run_scaling_sweep(args.service, args.sweep, args.write_ratio)
+        except KeyboardInterrupt:
+            print("\nSweep interrupted by user")
+            tester.test_running = False
+        return
+    
+    if args.soak:
+        tester.duration = args.soak * 3600
+        recorder = SoakRecorder(args.snapshot_file, window_seconds=args.window)
+        try:
+            tester.run_soak_test(recorder)
+        except KeyboardInterrupt:
+            print("\nSoak test interrupted by user, snapshots are kept")
+        print_soak_report(load_snapshots(args.snapshot_file), f"SOAK TEST REPORT ({args.snapshot_file})")
+        return
+    
     try:
         tester.run_test()
         tester.generate_report()
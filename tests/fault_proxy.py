@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Fault Proxy - TCP proxy dengan latency injection untuk Redis/Postgres lokal
+API diarahkan ke port proxy (REDIS_PORT / DB_PORT), proxy meneruskan ke
+server aslinya. Delay bisa diubah saat test berjalan (set_delay).
+
+    python fault_proxy.py --listen 16379 --target 127.0.0.1:6379 --delay-ms 500
+    REDIS_HOST=127.0.0.1 REDIS_PORT=16379 node ../api/cluster.js
+"""
+import argparse
+import socket
+import threading
+import time
+
+
+class LatencyProxy:
+    """Proxy TCP: setiap chunk dari server ditahan delay_ms sebelum diteruskan ke client"""
+
+    def __init__(self, listen_port, target_host, target_port, listen_host="127.0.0.1", name="proxy"):
+        self.listen_host = listen_host
+        self.listen_port = listen_port
+        self.target = (target_host, target_port)
+        self.name = name
+        self.delay_ms = 0.0
+        self.connections = 0
+        self.running = False
+        self.server = None
+        self.thread = None
+        self.sockets = []
+        self.lock = threading.Lock()
+
+    def set_delay(self, delay_ms):
+        self.delay_ms = delay_ms
+
+    def start(self):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind((self.listen_host, self.listen_port))
+        self.server.listen(128)
+        self.running = True
+        self.thread = threading.Thread(target=self.accept_loop, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.server:
+            self.server.close()
+        with self.lock:
+            for sock in self.sockets:
+                try:
+                    sock.close()
+                except OSError:
+                    pass
+            self.sockets.clear()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def accept_loop(self):
+        while self.running:
+            try:
+                client, _ = self.server.accept()
+            except OSError:
+                break
+            try:
+                upstream = socket.create_connection(self.target, timeout=5)
+                upstream.settimeout(None)
+            except OSError:
+                client.close()
+                continue
+
+            for sock in (client, upstream):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with self.lock:
+                self.connections += 1
+                self.sockets.extend([client, upstream])
+
+            threading.Thread(target=self.pipe, args=(client, upstream, False), daemon=True).start()
+            threading.Thread(target=self.pipe, args=(upstream, client, True), daemon=True).start()
+
+    def pipe(self, source, destination, delayed):
+        # Delay hanya di arah server -> client: setiap reply tertunda delay_ms
+        try:
+            while True:
+                data = source.recv(65536)
+                if not data:
+                    break
+                if delayed and self.delay_ms > 0:
+                    time.sleep(self.delay_ms / 1000)
+                destination.sendall(data)
+        except OSError:
+            pass
+        finally:
+            for sock in (source, destination):
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+
+def parse_address(value, default_host="127.0.0.1"):
+    host, _, port = value.rpartition(":")
+    return host or default_host, int(port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='TCP proxy that injects latency in front of Redis/Postgres')
+    parser.add_argument('--listen', type=int, required=True,
+                       help='Local port the API connects to (REDIS_PORT / DB_PORT)')
+    parser.add_argument('--target', required=True,
+                       help='Real server as HOST:PORT, e.g. 127.0.0.1:6379')
+    parser.add_argument('--delay-ms', type=float, default=0,
+                       help='Delay added to every reply from the server (default: 0)')
+
+    args = parser.parse_args()
+
+    target_host, target_port = parse_address(args.target)
+    proxy = LatencyProxy(args.listen, target_host, target_port)
+    proxy.set_delay(args.delay_ms)
+    proxy.start()
+    print(f"🐢 Proxy 127.0.0.1:{args.listen} -> {target_host}:{target_port} (delay {args.delay_ms}ms)")
+    print("   Type a new delay in ms and press Enter to change it, Ctrl+C to stop")
+    try:
+        while True:
+            line = input().strip()
+            if line:
+                try:
+                    proxy.set_delay(float(line))
+                    print(f"   Delay: {proxy.delay_ms}ms")
+                except ValueError:
+                    print("   Delay must be a number")
+    except (KeyboardInterrupt, EOFError):
+        print("\n⏹️  Proxy stopped")
+        proxy.stop()
+
+
+if __name__ == "__main__":
+    main()
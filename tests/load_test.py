@@ -13,9 +13,14 @@ import statistics
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import argparse
+import os
+
+from phases import PhaseWindow, percentile, print_excluded_phases
+from server_timing import parse_server_timing, print_phase_breakdown
 
 class TodoLoadTester:
-    def __init__(self, base_url="http://localhost", num_users=10, duration=60):
+    def __init__(self, base_url="http://localhost", num_users=10, duration=60,
+                 warmup=0, cooldown=0, auto_warmup=False, bypass_token=None):
         self.base_url = base_url
         self.num_users = num_users
         self.duration = duration
@@ -24,6 +29,13 @@ class TodoLoadTester:
         self.start_time = None
         self.end_time = None
         
+        # Header bypass rate limiter (RATE_LIMIT_BYPASS_TOKEN di server)
+        self.headers = {'X-RateLimit-Bypass': bypass_token} if bypass_token else {}
+        
+        # Warm-up / cool-down windows (detik). Request di window ini dicatat
+        # terpisah dan tidak ikut ke statistik utama (steady state).
+        self.phases = PhaseWindow(duration, warmup, cooldown, auto_warmup)
+        
         # Sample todo data
         self.sample_todos = [
             "Belajar Docker",
@@ -42,16 +54,17 @@ class TodoLoadTester:
         """Make HTTP request and record response time"""
         url = f"{self.base_url}{endpoint}"
         start_time = time.time()
+        phase = self.phases.get_phase(start_time)
         
         try:
             if method == "GET":
-                response = requests.get(url, timeout=10)
+                response = requests.get(url, timeout=10, headers=self.headers)
             elif method == "POST":
-                response = requests.post(url, json=data, timeout=10)
+                response = requests.post(url, json=data, timeout=10, headers=self.headers)
             elif method == "PATCH":
-                response = requests.patch(url, json=data, timeout=10)
+                response = requests.patch(url, json=data, timeout=10, headers=self.headers)
             elif method == "DELETE":
-                response = requests.delete(url, timeout=10)
+                response = requests.delete(url, timeout=10, headers=self.headers)
             
             end_time = time.time()
             response_time = (end_time - start_time) * 1000  # Convert to milliseconds
@@ -62,7 +75,12 @@ class TodoLoadTester:
                 'status_code': response.status_code,
                 'response_time': response_time,
                 'timestamp': datetime.now(),
-                'success': response.status_code < 400
+                'success': response.status_code < 400,
+                # 429 = ditolak rate limiter, dilaporkan terpisah dari error aplikasi
+                'rate_limited': response.status_code == 429,
+                'phase': phase,
+                # Durasi per fase di server (cache/db/serialize), dari header Server-Timing
+                'server_timing': parse_server_timing(response.headers.get('Server-Timing'))
             }
             
             self.results.append(result)
@@ -77,7 +95,8 @@ class TodoLoadTester:
                 'endpoint': endpoint,
                 'error': str(e),
                 'response_time': response_time,
-                'timestamp': datetime.now()
+                'timestamp': datetime.now(),
+                'phase': phase
             }
             
             self.errors.append(error)
@@ -131,9 +150,12 @@ class TodoLoadTester:
         """Run the load test with multiple users"""
         print(f"Starting load test with {self.num_users} users for {self.duration} seconds")
         print(f"Target URL: {self.base_url}")
+        if self.phases.enabled:
+            print(self.phases.describe())
         print("-" * 60)
         
         self.start_time = time.time()
+        self.phases.start(lambda: self.results)
         
         # Create thread pool for users
         with ThreadPoolExecutor(max_workers=self.num_users) as executor:
@@ -150,34 +172,62 @@ class TodoLoadTester:
                     print(f"User thread error: {e}")
         
         self.end_time = time.time()
+        self.phases.stop()
+        
+    def report_rate_limits(self, results):
+        """Rate 429 vs error lain per endpoint (tanpa id, /todos/12 -> /todos/:id)"""
+        per_endpoint = {}
+        for r in results:
+            endpoint = '/'.join(':id' if part.isdigit() else part for part in r['endpoint'].split('/'))
+            per_endpoint.setdefault(f"{r['method']} {endpoint}", []).append(r)
         
+        if not any(r.get('rate_limited') for r in results):
+            return
+        
+        print("RATE LIMITING BY ENDPOINT:")
+        for endpoint in sorted(per_endpoint):
+            endpoint_results = per_endpoint[endpoint]
+            limited = len([r for r in endpoint_results if r.get('rate_limited')])
+            errors = len([r for r in endpoint_results if not r['success'] and not r.get('rate_limited')])
+            print(f"  {endpoint:20s}: {len(endpoint_results):6d} requests | "
+                  f"429: {limited / len(endpoint_results) * 100:5.1f}% | "
+                  f"Errors: {errors / len(endpoint_results) * 100:5.1f}%")
+        print()
+    
     def generate_report(self):
         """Generate and display test results"""
         if not self.results:
             print("No results to report!")
             return
         
+        # Statistik utama hanya dari steady state; warm-up/cool-down dilaporkan terpisah
+        steady_results = [r for r in self.results if r.get('phase', 'steady') == 'steady']
+        if not steady_results:
+            print("No steady-state results, reporting all phases")
+            steady_results = self.results
+        
         # Calculate statistics
-        response_times = [r['response_time'] for r in self.results]
-        successful_requests = [r for r in self.results if r['success']]
-        failed_requests = [r for r in self.results if not r['success']]
+        response_times = [r['response_time'] for r in steady_results]
+        successful_requests = [r for r in steady_results if r['success']]
+        failed_requests = [r for r in steady_results if not r['success'] and not r.get('rate_limited')]
+        rate_limited_requests = [r for r in steady_results if r.get('rate_limited')]
         
-        total_requests = len(self.results)
+        total_requests = len(steady_results)
         success_rate = (len(successful_requests) / total_requests) * 100
         
         # Response time statistics
         avg_response_time = statistics.mean(response_times)
         min_response_time = min(response_times)
         max_response_time = max(response_times)
-        p95_response_time = statistics.quantiles(response_times, n=20)[18]  # 95th percentile
+        p95_response_time = percentile(response_times, 95)
         
         # Requests per second
-        actual_duration = self.end_time - self.start_time
-        rps = total_requests / actual_duration
+        actual_duration = self.phases.steady_duration()
+        rps = total_requests / actual_duration if actual_duration > 0 else 0
         
         # Status code distribution
         status_codes = {}
-        for result in self.results:
+        for result in steady_results:
             code = result['status_code']
             status_codes[code] = status_codes.get(code, 0) + 1
         
@@ -190,6 +240,7 @@ class TodoLoadTester:
         print(f"Total Requests: {total_requests}")
         print(f"Successful Requests: {len(successful_requests)}")
         print(f"Failed Requests: {len(failed_requests)}")
+        print(f"Rate Limited (429): {len(rate_limited_requests)}")
         print(f"Success Rate: {success_rate:.2f}%")
         print(f"Requests per Second: {rps:.2f}")
         print()
@@ -201,6 +252,10 @@ class TodoLoadTester:
         print(f"  95th Percentile: {p95_response_time:.2f} ms")
         print()
         
+        print_excluded_phases(self.phases, self.results, self.errors)
+        
+        self.report_rate_limits(steady_results)
+        
         print("STATUS CODE DISTRIBUTION:")
         for code, count in sorted(status_codes.items()):
             percentage = (count / total_requests) * 100
@@ -220,7 +275,7 @@ class TodoLoadTester:
         
         # Endpoint performance
         endpoint_stats = {}
-        for result in self.results:
+        for result in steady_results:
             endpoint = f"{result['method']} {result['endpoint']}"
             if endpoint not in endpoint_stats:
                 endpoint_stats[endpoint] = []
@@ -231,9 +286,28 @@ class TodoLoadTester:
             avg_time = statistics.mean(times)
             count = len(times)
             print(f"  {endpoint}: {avg_time:.2f} ms avg ({count} requests)")
+        print()
+        
+        self.report_server_timing(steady_results)
         
         print("="*60)
     
+    def report_server_timing(self, results):
+        """Percentile per fase server (Server-Timing) per endpoint, /todos/12 -> /todos/:id"""
+        per_endpoint = {}
+        for r in results:
+            if r.get('server_timing'):
+                endpoint = '/'.join(':id' if part.isdigit() else part for part in r['endpoint'].split('/'))
+                per_endpoint.setdefault(f"{r['method']} {endpoint}", []).append((r['response_time'], r['server_timing']))
+        
+        if not per_endpoint:
+            return
+        
+        print("SERVER-TIMING BY ENDPOINT:")
+        for endpoint in sorted(per_endpoint):
+            print_phase_breakdown(per_endpoint[endpoint], endpoint, indent="  ")
+        print()
+    
     def save_results_to_file(self, filename=None):
         """Save detailed results to JSON file"""
         if filename is None:
@@ -246,7 +320,8 @@ class TodoLoadTester:
                 'num_users': self.num_users,
                 'duration': self.duration,
                 'start_time': self.start_time,
-                'end_time': self.end_time
+                'end_time': self.end_time,
+                **self.phases.config()
             },
             'results': self.results,
             'errors': self.errors
@@ -267,6 +342,14 @@ def main():
                        help='Test duration in seconds (default: 60)')
     parser.add_argument('--save', action='store_true',
                        help='Save detailed results to JSON file')
+    parser.add_argument('--warmup', type=int, default=0,
+                       help='Warm-up seconds excluded from statistics (default: 0)')
+    parser.add_argument('--cooldown', type=int, default=0,
+                       help='Cool-down seconds excluded from statistics (default: 0)')
+    parser.add_argument('--auto-warmup', action='store_true',
+                       help='End warm-up automatically once latency is steady (--warmup is the upper bound)')
+    parser.add_argument('--bypass-token', default=os.environ.get('RATE_LIMIT_BYPASS_TOKEN'),
+                       help='X-RateLimit-Bypass token so the load generator skips the API rate limiter')
     
     args = parser.parse_args()
     
@@ -274,7 +357,11 @@ def main():
     tester = TodoLoadTester(
         base_url=args.url,
         num_users=args.users,
-        duration=args.duration
+        duration=args.duration,
+        warmup=args.warmup,
+        cooldown=args.cooldown,
+        auto_warmup=args.auto_warmup,
+        bypass_token=args.bypass_token
     )
     
     try:
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Memory Trend - deteksi memory leak per replica API dari process.memoryUsage()
+Sample /live secara berkala (lewat nginx atau langsung ke replica), simpan
+heapUsed/rss per instance sebagai time series, lalu fit tren linear (MB/jam).
+Heap Node naik-turun karena GC, jadi yang dinilai juga "lantai" heap (minimum
+per segmen waktu = heap setelah GC): lantai yang terus naik = leak.
+
+    python memory_trend.py --duration 600 --users 10
+    python memory_trend.py --target http://localhost:3000 --target http://localhost:3001
+    python stress_test.py --memory-trend
+"""
+import argparse
+import os
+import threading
+import time
+
+import requests
+
+# /live proxied ke replica (nginx menjawab /health sendiri); /health untuk akses langsung
+MEMORY_ENDPOINTS = ("/live", "/health")
+
+MB = 1024 * 1024
+
+
+def slope_per_hour(points):
+    """Least squares slope dari (timestamp, value), dalam unit per jam"""
+    if len(points) < 2:
+        return 0.0
+    xs = [t for t, _ in points]
+    ys = [v for _, v in points]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    variance = sum((x - mean_x) ** 2 for x in xs)
+    if variance == 0:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / variance * 3600
+
+
+def instance_key(body):
+    """Replica Swarm berbagi INSTANCE_NAME; hostname (container id) dan pid membedakannya.
+    Restart = pid/container baru = series baru, supaya heap yang reset tidak merusak tren"""
+    instance = body.get("instance", "unknown")
+    if "hostname" not in body:
+        return instance
+    return f"{instance}@{body['hostname']}:{body.get('pid', '?')}"
+
+
+class MemoryTrendTracker:
+    """Time series (timestamp, heap MB, rss MB, uptime) per instance"""
+
+    def __init__(self, endpoints=MEMORY_ENDPOINTS):
+        self.endpoints = endpoints
+        self.series = {}
+        self.samples = 0
+        self.failures = 0
+        self.lock = threading.Lock()
+
+    def record(self, body, timestamp=None):
+        memory = body["memory"]
+        point = (timestamp or time.time(), memory.get("heapUsed", 0) / MB,
+                 memory.get("rss", 0) / MB, body.get("uptime"))
+        with self.lock:
+            self.series.setdefault(instance_key(body), []).append(point)
+            self.samples += 1
+
+    def sample(self, base_url, headers=None, session=None):
+        """Satu response dengan memoryUsage dari base_url, None jika semua endpoint gagal"""
+        for endpoint in self.endpoints:
+            try:
+                body = (session or requests).get(f"{base_url}{endpoint}", timeout=5, headers=headers).json()
+            except (requests.RequestException, ValueError):
+                continue
+            if isinstance(body, dict) and isinstance(body.get("memory"), dict):
+                self.record(body)
+                return body
+        with self.lock:
+            self.failures += 1
+        return None
+
+    def sample_targets(self, targets, headers=None, per_target=1, session=None):
+        """Lewat load balancer satu request hanya mengenai satu replica; per_target
+        request per tick supaya setiap replica ikut ter-sample"""
+        for base_url in targets:
+            for _ in range(per_target):
+                self.sample(base_url, headers, session)
+
+
+def monitor_memory(tracker, targets, headers, is_running, interval=10, per_target=1):
+    session = requests.Session()
+    while is_running():
+        tracker.sample_targets(targets, headers, per_target, session)
+        time.sleep(interval)
+
+
+def analyze_series(points, slope_threshold=10.0, min_growth_mb=2.0, segments=5):
+    """Tren heap/rss dan lantai heap per segmen; verdict leak/growing/stable"""
+    heap_slope = slope_per_hour([(t, heap) for t, heap, _, _ in points])
+    rss_slope = slope_per_hour([(t, rss) for t, _, rss, _ in points])
+
+    # Lantai heap: minimum per segmen waktu (sample setelah GC paling rendah)
+    segments = max(2, min(segments, len(points) // 2))
+    size = len(points) / segments
+    floors = [min(heap for _, heap, _, _ in points[int(i * size):int((i + 1) * size)] or points[-1:])
+              for i in range(segments)]
+    rising = sum(1 for a, b in zip(floors, floors[1:]) if b > a) / (len(floors) - 1)
+    floor_growth = floors[-1] - floors[0]
+
+    if len(points) < 6:
+        verdict = "insufficient data"
+    elif heap_slope > slope_threshold and floor_growth >= min_growth_mb and rising >= 0.75:
+        verdict = "LEAK SUSPECT"
+    elif heap_slope > slope_threshold:
+        verdict = "growing"
+    else:
+        verdict = "stable"
+
+    return {
+        "samples": len(points),
+        "duration": points[-1][0] - points[0][0],
+        "heap_first": points[0][1],
+        "heap_last": points[-1][1],
+        "heap_max": max(heap for _, heap, _, _ in points),
+        "heap_slope": heap_slope,
+        "rss_first": points[0][2],
+        "rss_last": points[-1][2],
+        "rss_slope": rss_slope,
+        "floors": floors,
+        "floor_growth": floor_growth,
+        "floor_rising": rising,
+        "verdict": verdict
+    }
+
+
+def print_memory_report(tracker, slope_threshold=10.0, min_growth_mb=2.0, indent=""):
+    """Laporan per instance; return daftar instance yang dicurigai leak"""
+    print(f"{indent}🧠 MEMORY TREND ({tracker.samples} samples, {tracker.failures} failed):")
+    if not tracker.series:
+        print(f"{indent}   No memoryUsage samples (is /live or /health reachable?)")
+        return []
+
+    suspects = []
+    for key, points in sorted(tracker.series.items()):
+        result = analyze_series(points, slope_threshold, min_growth_mb)
+        icon = {"LEAK SUSPECT": "🔴", "growing": "🟡", "stable": "✅"}.get(result["verdict"], "⚪")
+        print(f"{indent}   {icon} {key}: {result['verdict']} "
+              f"({result['samples']} samples over {result['duration'] / 60:.1f} min)")
+        print(f"{indent}      heap {result['heap_first']:.1f} -> {result['heap_last']:.1f}MB "
+              f"(max {result['heap_max']:.1f}MB, {result['heap_slope']:+.1f}MB/hour) | "
+              f"rss {result['rss_first']:.1f} -> {result['rss_last']:.1f}MB ({result['rss_slope']:+.1f}MB/hour)")
+        print(f"{indent}      heap floor per segment: "
+              f"{' -> '.join(f'{floor:.1f}' for floor in result['floors'])}MB "
+              f"({result['floor_growth']:+.1f}MB, rising {result['floor_rising']:.0%})")
+        if result["verdict"] == "LEAK SUSPECT":
+            suspects.append(key)
+
+    if suspects:
+        print(f"{indent}   ⚠️  Heap keeps climbing after GC on: {', '.join(suspects)}")
+        print(f"{indent}      Take a heap snapshot (node --inspect) on that replica to find what is retained")
+    return suspects
+
+
+def run_background_load(base_url, headers, users, is_running):
+    """Beban ringan (GET /todos) supaya alokasi per request ikut terlihat di heap"""
+    def user():
+        session = requests.Session()
+        while is_running():
+            try:
+                session.get(f"{base_url}/todos", timeout=10, headers=headers)
+            except requests.RequestException:
+                time.sleep(1)
+
+    threads = [threading.Thread(target=user, daemon=True) for _ in range(users)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sample API memoryUsage per replica and flag heap growth trends')
+    parser.add_argument('--url', default='http://localhost',
+                       help='Base URL through the load balancer (default: http://localhost)')
+    parser.add_argument('--target', action='append',
+                       help='Sample this replica URL directly instead, e.g. http://localhost:3000 (repeatable)')
+    parser.add_argument('--duration', type=int, default=300,
+                       help='Seconds to sample (default: 300)')
+    parser.add_argument('--interval', type=float, default=10,
+                       help='Seconds between sampling rounds (default: 10)')
+    parser.add_argument('--samples-per-tick', type=int, default=6,
+                       help='Requests per target per round, so the load balancer reaches every replica (default: 6)')
+    parser.add_argument('--users', type=int, default=0,
+                       help='Background GET /todos users while sampling (default: 0)')
+    parser.add_argument('--slope-threshold', type=float, default=10,
+                       help='Heap trend in MB/hour above which a replica counts as growing (default: 10)')
+    parser.add_argument('--min-growth', type=float, default=2,
+                       help='Minimum heap floor growth in MB for a leak suspect (default: 2)')
+    parser.add_argument('--bypass-token', default=os.environ.get('RATE_LIMIT_BYPASS_TOKEN'),
+                       help='X-RateLimit-Bypass token so sampling and load skip the API rate limiter')
+
+    args = parser.parse_args()
+
+    targets = args.target or [args.url]
+    per_target = 1 if args.target else args.samples_per_tick
+    headers = {'X-RateLimit-Bypass': args.bypass_token} if args.bypass_token else {}
+    tracker = MemoryTrendTracker()
+    end_time = time.time() + args.duration
+    running = lambda: time.time() < end_time
+
+    print(f"🧠 Memory trend: {', '.join(targets)} every {args.interval}s for {args.duration}s "
+          f"({per_target} samples per target, {args.users} background users)")
+    print("-" * 80)
+
+    if args.users:
+        run_background_load(args.url, headers, args.users, running)
+    try:
+        monitor_memory(tracker, targets, headers, running, args.interval, per_target)
+    except KeyboardInterrupt:
+        print("\nSampling interrupted by user")
+        end_time = 0
+
+    print()
+    print_memory_report(tracker, args.slope_threshold, args.min_growth)
+
+
+if __name__ == "__main__":
+    main()
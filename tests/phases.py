@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Phase Window - warm-up / steady / cool-down untuk load tester di tests/
+Request di warm-up dan cool-down dicatat dengan field 'phase' dan tidak ikut
+statistik utama. Warm-up bisa diakhiri otomatis begitu rata-rata response time
+per detik sudah stabil (coefficient of variation kecil).
+"""
+import statistics
+import threading
+import time
+
+
+class PhaseWindow:
+    """Waktu warm-up/cool-down (detik) relatif terhadap start(); duration = panjang test"""
+
+    def __init__(self, duration, warmup=0, cooldown=0, auto_warmup=False):
+        self.duration = duration
+        self.warmup = warmup
+        self.cooldown = cooldown
+        self.auto_warmup = auto_warmup
+        self.warmup_end = None if auto_warmup else warmup
+        self.start_time = None
+        self.end_time = None
+
+        # Steady-state detector: bucket 1 detik yang dibandingkan dan batas CV
+        self.steady_window = 5
+        self.steady_cv_threshold = 0.15
+
+    @property
+    def enabled(self):
+        return bool(self.warmup or self.cooldown or self.auto_warmup)
+
+    def describe(self):
+        if self.auto_warmup:
+            return f"Warm-up: auto (max {self.max_warmup():.0f}s) | Cool-down: {self.cooldown}s"
+        if self.warmup or self.cooldown:
+            return f"Warm-up: {self.warmup}s | Cool-down: {self.cooldown}s"
+        return None
+
+    def start(self, get_results=None):
+        """Mulai hitung waktu; get_results() dipakai detector auto warm-up"""
+        self.start_time = time.time()
+        if self.auto_warmup and get_results:
+            detector_thread = threading.Thread(target=self.detect_steady_state, args=(get_results,))
+            detector_thread.daemon = True
+            detector_thread.start()
+
+    def stop(self):
+        self.end_time = time.time()
+
+    def max_warmup(self):
+        return self.warmup or self.duration / 2
+
+    def get_phase(self, request_time):
+        """Tentukan phase request: warmup, steady, atau cooldown"""
+        if self.start_time is None:
+            return 'steady'
+
+        elapsed = request_time - self.start_time
+        if self.cooldown and elapsed >= self.duration - self.cooldown:
+            return 'cooldown'
+        if self.warmup_end is None or elapsed < self.warmup_end:
+            return 'warmup'
+        return 'steady'
+
+    def detect_steady_state(self, get_results):
+        """Akhiri warm-up otomatis begitu response time sudah stabil"""
+        max_warmup = self.max_warmup()
+
+        while self.warmup_end is None:
+            time.sleep(1)
+            elapsed = time.time() - self.start_time
+
+            if elapsed >= max_warmup:
+                self.warmup_end = max_warmup
+                print(f"Warm-up ended at {self.warmup_end:.1f}s (max warm-up reached)")
+                break
+
+            # Rata-rata response time per bucket 1 detik
+            buckets = {}
+            for result in list(get_results()):
+                second = int(result['timestamp'].timestamp() - self.start_time)
+                buckets.setdefault(second, []).append(result['response_time'])
+
+            current = int(elapsed)
+            window = [
+                statistics.mean(buckets[second])
+                for second in range(current - self.steady_window, current)
+                if second in buckets
+            ]
+            if len(window) < self.steady_window:
+                continue
+
+            mean = statistics.mean(window)
+            if mean > 0 and statistics.pstdev(window) / mean < self.steady_cv_threshold:
+                self.warmup_end = elapsed
+                print(f"Steady state detected, warm-up ended at {self.warmup_end:.1f}s")
+
+    def steady_duration(self):
+        """Durasi window steady state (tanpa warm-up dan cool-down)"""
+        actual_duration = (self.end_time or time.time()) - self.start_time
+        steady_start = min(self.warmup_end or 0, actual_duration)
+        steady_end = actual_duration
+        if self.cooldown:
+            steady_end = min(actual_duration, self.duration - self.cooldown)
+        if steady_end - steady_start <= 0:
+            return actual_duration
+        return steady_end - steady_start
+
+    def config(self):
+        return {
+            'warmup': self.warmup,
+            'cooldown': self.cooldown,
+            'auto_warmup': self.auto_warmup,
+            'warmup_end': self.warmup_end
+        }
+
+
+def steady_results(results):
+    """Result steady state; semua result jika warm-up/cool-down menutupi seluruh test"""
+    steady = [r for r in results if r.get('phase', 'steady') == 'steady']
+    return steady or results
+
+
+def percentile(values, pct):
+    """Percentile sederhana (nearest-rank) yang aman untuk sample kecil"""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def print_excluded_phases(window, results, errors=()):
+    """Statistik warm-up dan cool-down yang dikecualikan dari statistik utama"""
+    for phase, label in (('warmup', 'WARM-UP'), ('cooldown', 'COOL-DOWN')):
+        phase_results = [r for r in results if r.get('phase') == phase]
+        if not phase_results:
+            continue
+
+        times = [r['response_time'] for r in phase_results]
+        failed = len([r for r in phase_results if not r.get('success') and not r.get('rate_limited')])
+        failed += len([e for e in errors if e.get('phase') == phase])
+        print(f"{label} (excluded from statistics above):")
+        print(f"  Requests: {len(phase_results)} | Failed: {failed}")
+        print(f"  Average: {statistics.mean(times):.2f} ms | "
+              f"95th Percentile: {percentile(times, 95):.2f} ms")
+        if phase == 'warmup' and window.warmup_end is not None:
+            print(f"  Warm-up window: 0 - {window.warmup_end:.1f} s")
+        print()
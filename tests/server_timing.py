@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Server-Timing parser - breakdown latency per fase dari header API:
+
+    Server-Timing: cache;dur=0.61;desc="Cache lookup (Redis)", db;dur=3.07, total;dur=6.31
+
+Fase: ratelimit, reqseen, cache (Redis), pool (antrian pool), db (termasuk
+pool wait), serialize, total. Selisih client dengan total = jaringan + nginx.
+"""
+
+PHASE_ORDER = ("ratelimit", "reqseen", "cache", "pool", "db", "serialize", "total")
+
+
+def parse_server_timing(header):
+    """Return dict fase -> ms (kosong jika header tidak ada); fase yang sama dijumlahkan"""
+    phases = {}
+    if not header:
+        return phases
+    for metric in header.split(","):
+        name, *params = metric.strip().split(";")
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key == "dur":
+                try:
+                    phases[name] = phases.get(name, 0.0) + float(value)
+                except ValueError:
+                    pass
+    return phases
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def print_phase_breakdown(rows, title="SERVER-TIMING BREAKDOWN", indent="   "):
+    """rows: list of (client_ms, phases dict); tampilkan P50/P95/P99 per fase"""
+    rows = [(client_ms, phases) for client_ms, phases in rows if phases]
+    if not rows:
+        return
+
+    names = [name for name in PHASE_ORDER if any(name in phases for _, phases in rows)]
+    names += sorted({name for _, phases in rows for name in phases} - set(PHASE_ORDER))
+
+    print(f"{indent}⏱️  {title} ({len(rows)} responses with Server-Timing):")
+    print(f"{indent}   {'phase':>10} {'seen':>7} {'P50':>9} {'P95':>9} {'P99':>9}")
+    for name in names:
+        values = [phases[name] for _, phases in rows if name in phases]
+        print(f"{indent}   {name:>10} {len(values):7d} "
+              f"{percentile(values, 0.50):7.1f}ms {percentile(values, 0.95):7.1f}ms {percentile(values, 0.99):7.1f}ms")
+
+    # Waktu di luar handler API: jaringan, nginx, antrian koneksi di client
+    outside = [client_ms - phases["total"] for client_ms, phases in rows
+               if client_ms is not None and "total" in phases]
+    if outside:
+        print(f"{indent}   {'outside':>10} {len(outside):7d} "
+              f"{percentile(outside, 0.50):7.1f}ms {percentile(outside, 0.95):7.1f}ms "
+              f"{percentile(outside, 0.99):7.1f}ms  (client - server total)")
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Soak Test Recorder - agregasi per window untuk test berjam-jam
+Result tidak disimpan per request: setiap window (default 60 detik) hanya
+menyimpan counter dan histogram latency ukuran tetap. Window yang selesai
+langsung ditulis satu baris JSON ke file snapshot, sehingga Ctrl+C atau crash
+tidak menghilangkan data dan laporan bisa dibuat ulang dari file:
+
+    python soak.py soak_snapshots.jsonl
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import requests
+
+from memory_trend import instance_key, slope_per_hour
+
+# Nginx menjawab /health sendiri (static), /backend-health diteruskan ke replica API
+HEALTH_ENDPOINTS = ("/backend-health", "/health")
+
+# Batas atas bucket latency (ms), naik 25% per bucket: 1ms .. ~56 detik
+BUCKET_BOUNDS_MS = [1.25 ** i for i in range(50)]
+
+
+def bucket_index(value_ms):
+    for i, bound in enumerate(BUCKET_BOUNDS_MS):
+        if value_ms <= bound:
+            return i
+    return len(BUCKET_BOUNDS_MS)
+
+
+def histogram_percentile(buckets, count, p, max_ms):
+    """Percentile = batas atas bucket tempat percentile jatuh (bucket terakhir: max)"""
+    rank = max(1, int(count * p + 0.999999))
+    seen = 0
+    for i, bucket_count in enumerate(buckets):
+        seen += bucket_count
+        if seen >= rank:
+            return min(BUCKET_BOUNDS_MS[i], max_ms) if i < len(BUCKET_BOUNDS_MS) else max_ms
+    return max_ms
+
+
+class SoakRecorder:
+    """Agregator window untuk soak test; memory terbatas berapa pun lamanya test"""
+
+    def __init__(self, snapshot_path, window_seconds=60, max_windows=60):
+        self.snapshot_path = snapshot_path
+        self.window_seconds = window_seconds
+        # Window terakhir di memory, hanya untuk tampilan live; data lengkap ada di file
+        self.windows = deque(maxlen=max_windows)
+        self.lock = threading.Lock()
+
+        # Resume: nomor window melanjutkan file snapshot yang sudah ada
+        existing = load_snapshots(snapshot_path) if os.path.exists(snapshot_path) else []
+        self.windows.extend(existing[-max_windows:])
+        self.window_index = existing[-1]["window"] + 1 if existing else 0
+        self.current = self.new_window(time.time())
+
+    def new_window(self, start):
+        return {
+            "start": start,
+            "requests": 0,
+            "errors": 0,
+            "rate_limited": 0,
+            "latency_sum": 0.0,
+            "latency_max": 0.0,
+            "buckets": [0] * (len(BUCKET_BOUNDS_MS) + 1),
+            "endpoints": {},
+            "memory": {},
+            "containers": {}
+        }
+
+    def record(self, endpoint, response_time_ms, status=None):
+        """status None = connection error / timeout"""
+        with self.lock:
+            self.roll(time.time())
+            window = self.current
+            window["requests"] += 1
+            counts = window["endpoints"].setdefault(endpoint, [0, 0])
+            counts[0] += 1
+            if status == 429:
+                window["rate_limited"] += 1
+            elif status is None or status >= 400:
+                window["errors"] += 1
+                counts[1] += 1
+            if status is not None:
+                window["latency_sum"] += response_time_ms
+                window["latency_max"] = max(window["latency_max"], response_time_ms)
+                window["buckets"][bucket_index(response_time_ms)] += 1
+
+    def record_memory(self, instance, memory, uptime=None):
+        """Sample process.memoryUsage() dari /health; yang terakhir per instance dipakai"""
+        with self.lock:
+            self.roll(time.time())
+            self.current["memory"][instance] = {
+                "rss_mb": memory.get("rss", 0) / (1024 * 1024),
+                "heap_used_mb": memory.get("heapUsed", 0) / (1024 * 1024),
+                "uptime": uptime
+            }
+
+    def record_container(self, name, cpu_percent, memory_mb):
+        """Stats container (docker), dirata-rata per window"""
+        with self.lock:
+            self.roll(time.time())
+            stats = self.current["containers"].setdefault(name, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += cpu_percent
+            stats[2] += memory_mb
+
+    def roll(self, now):
+        """Tutup window yang sudah lewat; dipanggil dengan lock dipegang"""
+        while now >= self.current["start"] + self.window_seconds:
+            end = self.current["start"] + self.window_seconds
+            self.flush(self.current, end)
+            self.current = self.new_window(end)
+
+    def tick(self):
+        """Dipanggil berkala oleh monitor supaya window tetap ditutup walau tanpa traffic"""
+        with self.lock:
+            self.roll(time.time())
+
+    def close(self):
+        """Tulis window yang sedang berjalan (sebagian) saat test berhenti"""
+        with self.lock:
+            if self.current["requests"] or self.current["memory"] or self.current["containers"]:
+                self.flush(self.current, time.time())
+            self.current = self.new_window(time.time())
+
+    def flush(self, window, end):
+        snapshot = summarize_window(window, end, self.window_index)
+        self.window_index += 1
+        self.windows.append(snapshot)
+        with open(self.snapshot_path, "a") as f:
+            f.write(json.dumps(snapshot, separators=(",", ":")) + "\n")
+        return snapshot
+
+    def latest(self):
+        with self.lock:
+            return self.windows[-1] if self.windows else None
+
+
+def summarize_window(window, end, index):
+    """Window terbuka -> snapshot ringkas (tanpa histogram mentah)"""
+    measured = sum(window["buckets"])
+    duration = max(end - window["start"], 1e-9)
+    latency = None
+    if measured:
+        latency = {
+            "avg": window["latency_sum"] / measured,
+            "p50": histogram_percentile(window["buckets"], measured, 0.50, window["latency_max"]),
+            "p95": histogram_percentile(window["buckets"], measured, 0.95, window["latency_max"]),
+            "p99": histogram_percentile(window["buckets"], measured, 0.99, window["latency_max"]),
+            "max": window["latency_max"]
+        }
+    return {
+        "window": index,
+        "start": window["start"],
+        "end": end,
+        "requests": window["requests"],
+        "rps": window["requests"] / duration,
+        "errors": window["errors"],
+        "rate_limited": window["rate_limited"],
+        "latency": latency,
+        "endpoints": window["endpoints"],
+        "memory": window["memory"],
+        "containers": {
+            name: {"cpu_percent": cpu / samples, "memory_mb": memory / samples}
+            for name, (samples, cpu, memory) in window["containers"].items()
+        }
+    }
+
+
+def sample_health(base_url, headers=None, endpoints=HEALTH_ENDPOINTS):
+    """Response /health dari replica API (dengan memoryUsage), None jika tidak ada"""
+    for endpoint in endpoints:
+        try:
+            body = requests.get(f"{base_url}{endpoint}", timeout=5, headers=headers).json()
+        except (requests.RequestException, ValueError):
+            continue
+        if isinstance(body, dict) and "memory" in body:
+            return body
+    return None
+
+
+def monitor_soak(recorder, base_url, headers, is_running, interval=15):
+    """Sample memory API secara berkala, tutup window tepat waktu dan cetak window baru"""
+    last_printed = None
+    while is_running():
+        health = sample_health(base_url, headers)
+        if health:
+            # Replica Swarm berbagi INSTANCE_NAME: series per proses (hostname:pid)
+            recorder.record_memory(instance_key(health), health["memory"], health.get("uptime"))
+        recorder.tick()
+
+        latest = recorder.latest()
+        if latest and latest is not last_printed:
+            print(format_window_line(latest))
+            last_printed = latest
+        time.sleep(interval)
+
+
+def load_snapshots(path):
+    """Baca file snapshot; baris terakhir yang terpotong (crash saat menulis) dilewati"""
+    windows = []
+    with open(path) as f:
+        for line in f:
+            try:
+                windows.append(json.loads(line))
+            except ValueError:
+                continue
+    return windows
+
+
+def format_window_line(window):
+    latency = window["latency"] or {}
+    error_rate = window["errors"] / window["requests"] * 100 if window["requests"] else 0
+    heap = sum(m["heap_used_mb"] for m in window["memory"].values())
+    memory = f" | Heap: {heap:7.1f}MB" if window["memory"] else ""
+    return (f"[{datetime.fromtimestamp(window['start']).strftime('%m-%d %H:%M:%S')}] "
+            f"RPS: {window['rps']:7.1f} | P95: {latency.get('p95', 0):7.1f}ms | "
+            f"P99: {latency.get('p99', 0):7.1f}ms | Errors: {error_rate:5.1f}%{memory}")
+
+
+def print_soak_report(windows, title="SOAK TEST REPORT", max_rows=24):
+    if not windows:
+        print("No soak windows to report!")
+        return
+
+    duration = windows[-1]["end"] - windows[0]["start"]
+    total = sum(w["requests"] for w in windows)
+    errors = sum(w["errors"] for w in windows)
+    limited = sum(w["rate_limited"] for w in windows)
+
+    print("\n" + "=" * 80)
+    print(title)
+    print("=" * 80)
+    print(f"Windows: {len(windows)} | Duration: {duration / 3600:.2f} hours")
+    print(f"Total Requests: {total} | Errors: {errors} ({errors / total * 100 if total else 0:.2f}%) | "
+          f"Rate Limited (429): {limited}")
+    print()
+
+    # Timeline ringkas: maksimal max_rows baris, window di antaranya dilewati
+    step = max(1, len(windows) // max_rows)
+    print("TIMELINE:")
+    for window in windows[::step]:
+        print(f"  {format_window_line(window)}")
+    print()
+
+    print_drift(windows)
+    print("=" * 80)
+
+
+def print_drift(windows):
+    """Latency creep dan pertumbuhan memory sepanjang run"""
+    measured = [w for w in windows if w["latency"]]
+    print("DRIFT OVER TIME:")
+    if len(measured) >= 2:
+        # Bandingkan 10% window pertama dengan 10% terakhir (minimal satu window)
+        edge = max(1, len(measured) // 10)
+        first = sorted(w["latency"]["p95"] for w in measured[:edge])[edge // 2]
+        last = sorted(w["latency"]["p95"] for w in measured[-edge:])[edge // 2]
+        creep = (last - first) / first * 100 if first else 0
+        trend = slope_per_hour([(w["start"], w["latency"]["p95"]) for w in measured])
+        print(f"  P95 latency: {first:.1f}ms -> {last:.1f}ms ({creep:+.1f}%) | trend {trend:+.1f}ms/hour")
+        if creep > 50:
+            print("  ⚠️  Latency creep detected: P95 at the end is >50% above the start")
+
+        first_rate = sum(w["errors"] for w in measured[:edge]) / max(1, sum(w["requests"] for w in measured[:edge])) * 100
+        last_rate = sum(w["errors"] for w in measured[-edge:]) / max(1, sum(w["requests"] for w in measured[-edge:])) * 100
+        print(f"  Error rate: {first_rate:.2f}% -> {last_rate:.2f}%")
+
+    instances = sorted({name for w in windows for name in w["memory"]})
+    for instance in instances:
+        points = [(w["start"], w["memory"][instance]) for w in windows if instance in w["memory"]]
+        heap = slope_per_hour([(t, m["heap_used_mb"]) for t, m in points])
+        rss = slope_per_hour([(t, m["rss_mb"]) for t, m in points])
+        print(f"  {instance} memory: heap {points[0][1]['heap_used_mb']:.1f} -> {points[-1][1]['heap_used_mb']:.1f}MB "
+              f"({heap:+.1f}MB/hour) | rss {points[0][1]['rss_mb']:.1f} -> {points[-1][1]['rss_mb']:.1f}MB "
+              f"({rss:+.1f}MB/hour)")
+
+    containers = sorted({name for w in windows for name in w["containers"]})
+    for name in containers:
+        points = [(w["start"], w["containers"][name]) for w in windows if name in w["containers"]]
+        growth = slope_per_hour([(t, c["memory_mb"]) for t, c in points])
+        avg_cpu = sum(c["cpu_percent"] for _, c in points) / len(points)
+        print(f"  {name} container: memory {points[0][1]['memory_mb']:.1f} -> {points[-1][1]['memory_mb']:.1f}MB "
+              f"({growth:+.1f}MB/hour) | avg CPU {avg_cpu:.1f}%")
+    print()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print(f"Usage: {sys.argv[0]} <soak_snapshots.jsonl>")
+        sys.exit(1)
+    print_soak_report(load_snapshots(sys.argv[1]), f"SOAK TEST REPORT ({sys.argv[1]})")
@@ -13,10 +13,18 @@ import statistics
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
 import argparse
+import os
 import sys
 
+from fault_proxy import LatencyProxy, parse_address
+from memory_trend import MemoryTrendTracker, instance_key, monitor_memory, print_memory_report
+from phases import PhaseWindow, print_excluded_phases, steady_results
+from server_timing import parse_server_timing, print_phase_breakdown
+from soak import SoakRecorder, load_snapshots, monitor_soak, print_soak_report
+
 class TodoStressTester:
-    def __init__(self, base_url="http://localhost", max_users=100, ramp_up_time=300):
+    def __init__(self, base_url="http://localhost", max_users=100, ramp_up_time=300, bypass_token=None,
+                 warmup=0, cooldown=0, auto_warmup=False):
         self.base_url = base_url
         self.max_users = max_users
         self.ramp_up_time = ramp_up_time
@@ -26,6 +34,33 @@ class TodoStressTester:
         self.test_running = True
         self.lock = threading.Lock()
         
+        # Header bypass rate limiter (RATE_LIMIT_BYPASS_TOKEN di server)
+        self.headers = {'X-RateLimit-Bypass': bypass_token} if bypass_token else {}
+        
+        # Pool stats dari /metrics, diambil bersamaan dengan latency timeline
+        self.pool_timeline = []
+        
+        # Fault injection: fase saat ini (baseline/fault/recovery) dicatat di setiap result
+        self.phase = None
+        self.dependency_timeline = []
+        # Replica (instance@hostname:pid) yang menjawab /live lewat nginx per fase:
+        # load shedding (503) tidak boleh membuat nginx mengeluarkan replica dari pool
+        self.replicas_by_phase = {}
+        
+        # Soak mode: result diagregasi per window oleh SoakRecorder (bukan list per request)
+        self.recorder = None
+        
+        # Memory trend: heapUsed/rss per replica dari /live selama test (opsional)
+        self.memory_tracker = None
+        self.memory_targets = None
+        
+        # Beban penuh setelah ramp-up selesai (detik)
+        self.full_load_time = 120
+        
+        # Warm-up / cool-down (detik, lihat phases.py): tidak ikut statistik utama
+        # di report, tetapi tetap dipakai analisis breaking point (ramp-up dimulai dari 0 user)
+        self.phases = PhaseWindow(ramp_up_time + self.full_load_time, warmup, cooldown, auto_warmup)
+        
         # Performance thresholds
         self.response_time_threshold = 5000  # 5 seconds
         self.error_rate_threshold = 5  # 5%
@@ -37,17 +72,29 @@ class TodoStressTester:
         
         try:
             if method == "GET":
-                response = requests.get(url, timeout=30)
+                response = requests.get(url, timeout=30, headers=self.headers)
             elif method == "POST":
-                response = requests.post(url, json=data, timeout=30)
+                response = requests.post(url, json=data, timeout=30, headers=self.headers)
             elif method == "PATCH":
-                response = requests.patch(url, json=data, timeout=30)
+                response = requests.patch(url, json=data, timeout=30, headers=self.headers)
             elif method == "DELETE":
-                response = requests.delete(url, timeout=30)
+                response = requests.delete(url, timeout=30, headers=self.headers)
             
             end_time = time.time()
             response_time = (end_time - start_time) * 1000
             
+            if self.recorder:
+                self.recorder.record(f"{method} {endpoint}", response_time, response.status_code)
+                return response
+            
+            # Source (cache/database) dari endpoint yang di-cache (/todos, /stats)
+            source = None
+            if method == "GET" and response.headers.get('content-type', '').startswith('application/json'):
+                try:
+                    source = response.json().get('source')
+                except ValueError:
+                    pass
+            
             with self.lock:
                 result = {
                     'method': method,
@@ -56,7 +103,13 @@ class TodoStressTester:
                     'response_time': response_time,
                     'timestamp': datetime.now(),
                     'success': response.status_code < 400,
-                    'active_users': self.active_users
+                    # 429 = ditolak rate limiter, tidak dihitung sebagai error aplikasi
+                    'rate_limited': response.status_code == 429,
+                    'active_users': self.active_users,
+                    'source': source,
+                    'fault_phase': self.phase,
+                    'phase': self.phases.get_phase(start_time),
+                    'server_timing': parse_server_timing(response.headers.get('Server-Timing'))
                 }
                 self.results.append(result)
             
@@ -66,6 +119,10 @@ class TodoStressTester:
             end_time = time.time()
             response_time = (end_time - start_time) * 1000
             
+            if self.recorder:
+                self.recorder.record(f"{method} {endpoint}", response_time)
+                return None
+            
             with self.lock:
                 error = {
                     'method': method,
@@ -73,7 +130,9 @@ class TodoStressTester:
                     'error': str(e),
                     'response_time': response_time,
                     'timestamp': datetime.now(),
-                    'active_users': self.active_users
+                    'active_users': self.active_users,
+                    'fault_phase': self.phase,
+                    'phase': self.phases.get_phase(start_time)
                 }
                 self.errors.append(error)
             
@@ -98,7 +157,8 @@ class TodoStressTester:
                     ('GET', '/health')
                 ]
                 
-                method, endpoint, data = random.choice(actions) if len(actions[0]) == 3 else (*random.choice(actions), None)
+                # Action GET tidak punya body: lengkapi dengan None
+                method, endpoint, data = (*random.choice(actions), None)[:3]
                 self.make_request(method, endpoint, data)
                 
                 # Minimal delay for stress testing
@@ -108,6 +168,33 @@ class TodoStressTester:
             with self.lock:
                 self.active_users -= 1
     
+    def fetch_pool_stats(self):
+        """Ambil pg pool stats dari endpoint /metrics (replica mana pun yang menjawab)"""
+        try:
+            response = requests.get(f"{self.base_url}/metrics", timeout=5, headers=self.headers)
+            if response.status_code != 200:
+                return None
+            metrics = response.json()
+            return {
+                'timestamp': datetime.now(),
+                'instance': metrics.get('instance', 'unknown'),
+                'active_users': self.active_users,
+                **metrics['pool']
+            }
+        except (requests.RequestException, ValueError, KeyError):
+            return None
+    
+    def pool_interval_wait(self, pool_stats):
+        """Rata-rata acquire wait sejak sample sebelumnya dari instance yang sama
+        (counter /metrics kumulatif sejak start; instance restart = counter reset)"""
+        acquire = pool_stats['acquire']
+        previous = next((s['acquire'] for s in reversed(self.pool_timeline)
+                         if s['instance'] == pool_stats['instance']), None)
+        if previous is None or acquire['count'] < previous['count']:
+            previous = {'count': 0, 'totalWaitMs': 0}
+        count = acquire['count'] - previous['count']
+        return (acquire['totalWaitMs'] - previous['totalWaitMs']) / count if count else 0
+    
     def monitor_performance(self):
         """Monitor performance metrics during test"""
         print("Starting performance monitoring...")
@@ -125,15 +212,30 @@ class TodoStressTester:
             if recent_results:
                 # Calculate metrics
                 avg_response_time = statistics.mean([r['response_time'] for r in recent_results])
-                error_count = len([r for r in recent_results if not r['success']])
+                error_count = len([r for r in recent_results if not r['success'] and not r['rate_limited']])
                 error_rate = (error_count / len(recent_results)) * 100
+                limited_rate = len([r for r in recent_results if r['rate_limited']]) / len(recent_results) * 100
                 rps = len(recent_results) / 30
                 
+                pool_stats = self.fetch_pool_stats()
+                pool_info = ""
+                if pool_stats:
+                    acquire = pool_stats['acquire']
+                    interval_wait = self.pool_interval_wait(pool_stats)
+                    self.pool_timeline.append(pool_stats)
+                    pool_info = (f" | Pool {pool_stats['instance']}: "
+                                 f"{pool_stats['total'] - pool_stats['idle']}/{pool_stats['max']} busy, "
+                                 f"{pool_stats['waiting']} waiting, "
+                                 f"avg wait {interval_wait:.1f}ms, "
+                                 f"max wait {acquire['recentMaxWaitMs']:.0f}ms/{acquire['recentWindowSeconds']}s")
+                
                 print(f"[{datetime.now().strftime('%H:%M:%S')}] "
                       f"Users: {self.active_users:3d} | "
                       f"RPS: {rps:6.1f} | "
                       f"Avg RT: {avg_response_time:7.1f}ms | "
-                      f"Error Rate: {error_rate:5.1f}%")
+                      f"Error Rate: {error_rate:5.1f}% | "
+                      f"429: {limited_rate:5.1f}%"
+                      f"{pool_info}")
                 
                 # Check if we've hit performance limits
                 if (avg_response_time > self.response_time_threshold or 
@@ -146,6 +248,8 @@ class TodoStressTester:
         """Run stress test with gradually increasing load"""
         print(f"Starting stress test: 0 → {self.max_users} users over {self.ramp_up_time} seconds")
         print(f"Target URL: {self.base_url}")
+        if self.phases.enabled:
+            print(self.phases.describe())
         print("-" * 80)
         
         # Start performance monitoring
@@ -153,7 +257,19 @@ class TodoStressTester:
         monitor_thread.daemon = True
         monitor_thread.start()
         
+        if self.memory_tracker:
+            # Lewat load balancer: beberapa sample per tick supaya semua replica kena
+            targets = self.memory_targets or [self.base_url]
+            memory_thread = threading.Thread(
+                target=monitor_memory,
+                args=(self.memory_tracker, targets, self.headers, lambda: self.test_running,
+                      10, 1 if self.memory_targets else 6)
+            )
+            memory_thread.daemon = True
+            memory_thread.start()
+        
         start_time = time.time()
+        self.phases.start(lambda: self.results)
         users_started = 0
         
         with ThreadPoolExecutor(max_workers=self.max_users) as executor:
@@ -176,12 +292,14 @@ class TodoStressTester:
             
             print(f"\n🚀 All {self.max_users} users started! Running stress test...")
             
-            # Let the test run for additional time after ramp-up
-            additional_time = 120  # 2 minutes of full load
-            time.sleep(additional_time)
+            # Let the test run for additional time after ramp-up; cool-down
+            # dihitung dari akhir beban penuh yang sebenarnya
+            self.phases.duration = time.time() - start_time + self.full_load_time
+            time.sleep(self.full_load_time)
             
             print("\n🛑 Stopping stress test...")
             self.test_running = False
+            self.phases.stop()
             
             # Wait for all users to finish
             for future in futures:
@@ -190,6 +308,163 @@ class TodoStressTester:
                 except:
                     pass
     
+    def run_soak_test(self, recorder, duration, health_interval=15):
+        """Beban konstan max_users selama berjam-jam; memory generator tidak bertambah"""
+        self.recorder = recorder
+        print(f"Starting soak test: {self.max_users} users for {duration / 3600:.1f} hours")
+        print(f"Window: {recorder.window_seconds}s | Snapshots: {recorder.snapshot_path}")
+        if recorder.window_index:
+            print(f"Resuming after {recorder.window_index} existing windows")
+        print(f"Target URL: {self.base_url}")
+        print("-" * 80)
+        
+        monitor_thread = threading.Thread(
+            target=monitor_soak,
+            args=(recorder, self.base_url, self.headers, lambda: self.test_running, health_interval)
+        )
+        monitor_thread.daemon = True
+        monitor_thread.start()
+        
+        end_time = time.time() + duration
+        with ThreadPoolExecutor(max_workers=self.max_users) as executor:
+            futures = [executor.submit(self.user_simulation, i + 1) for i in range(self.max_users)]
+            try:
+                while time.time() < end_time:
+                    time.sleep(1)
+            finally:
+                print("\n🛑 Stopping soak test...")
+                self.test_running = False
+                for future in futures:
+                    try:
+                        future.result(timeout=30)
+                    except:
+                        pass
+                recorder.close()
+    
+    def fetch_dependency_stats(self):
+        """Counter timeout Redis dan load shedding pool dari /metrics"""
+        try:
+            response = requests.get(f"{self.base_url}/metrics", timeout=5, headers=self.headers)
+            if response.status_code != 200:
+                return None
+            metrics = response.json()
+            return {
+                'phase': self.phase,
+                'instance': metrics.get('instance', 'unknown'),
+                **metrics['dependencies']
+            }
+        except (requests.RequestException, ValueError, KeyError):
+            return None
+    
+    def monitor_replicas(self, interval=2, samples=6):
+        """Sample /live beberapa kali per tick; catat replica mana yang masih dijangkau nginx"""
+        session = requests.Session()
+        while self.test_running:
+            phase = self.phase
+            for _ in range(samples):
+                try:
+                    body = session.get(f"{self.base_url}/live", timeout=5, headers=self.headers).json()
+                except (requests.RequestException, ValueError):
+                    continue
+                if isinstance(body, dict):
+                    replicas = self.replicas_by_phase.setdefault(phase, {})
+                    key = instance_key(body)
+                    replicas[key] = replicas.get(key, 0) + 1
+            time.sleep(interval)
+    
+    def run_fault_test(self, proxy, fault_delay_ms, phase_duration=30):
+        """Beban konstan max_users dengan tiga fase: baseline, fault (proxy delay), recovery"""
+        print(f"Starting fault test: {self.max_users} users, {phase_duration}s per phase")
+        print(f"Fault: {proxy.name} +{fault_delay_ms}ms via 127.0.0.1:{proxy.listen_port} -> "
+              f"{proxy.target[0]}:{proxy.target[1]}")
+        print(f"Target URL: {self.base_url}")
+        print("-" * 80)
+        
+        monitor_thread = threading.Thread(target=self.monitor_performance)
+        monitor_thread.daemon = True
+        monitor_thread.start()
+        
+        self.phase = 'baseline'
+        replica_thread = threading.Thread(target=self.monitor_replicas)
+        replica_thread.daemon = True
+        replica_thread.start()
+        with ThreadPoolExecutor(max_workers=self.max_users) as executor:
+            futures = [executor.submit(self.user_simulation, i + 1) for i in range(self.max_users)]
+            
+            for phase, delay_ms in (('baseline', 0), ('fault', fault_delay_ms), ('recovery', 0)):
+                self.phase = phase
+                proxy.set_delay(delay_ms)
+                print(f"\n[{datetime.now().strftime('%H:%M:%S')}] ▶️  Phase {phase}: {proxy.name} delay {delay_ms}ms")
+                time.sleep(phase_duration)
+                stats = self.fetch_dependency_stats()
+                if stats:
+                    self.dependency_timeline.append(stats)
+            
+            print("\n🛑 Stopping fault test...")
+            self.test_running = False
+            for future in futures:
+                try:
+                    future.result(timeout=30)
+                except:
+                    pass
+    
+    def analyze_fault_phases(self):
+        """Tail latency dan error rate per fase fault test"""
+        print("\nFAULT INJECTION RESULTS BY PHASE:")
+        print("-" * 80)
+        for phase in ('baseline', 'fault', 'recovery'):
+            results = [r for r in self.results if r['fault_phase'] == phase]
+            errors = [e for e in self.errors if e['fault_phase'] == phase]
+            total = len(results) + len(errors)
+            if not results:
+                print(f"  {phase:>8}: no responses ({len(errors)} connection errors)")
+                continue
+            
+            times = sorted(r['response_time'] for r in results)
+            failed = len([r for r in results if not r['success'] and not r['rate_limited']]) + len(errors)
+            shed = len([r for r in results if r['status_code'] == 503])
+            from_database = len([r for r in results if r['source'] == 'database'])
+            print(f"  {phase:>8}: {total:6d} requests | "
+                  f"P50: {times[len(times) // 2]:7.1f}ms | "
+                  f"P95: {times[min(len(times) - 1, int(len(times) * 0.95))]:7.1f}ms | "
+                  f"P99: {times[min(len(times) - 1, int(len(times) * 0.99))]:7.1f}ms | "
+                  f"Errors: {failed / total * 100:5.1f}% | 503: {shed}")
+            print(f"  {'':>8}  served from database: {from_database} | max: {times[-1]:.1f}ms")
+            # Fase mana yang melambat selama fault (cache vs db vs di luar API)
+            print_phase_breakdown([(r['response_time'], r['server_timing']) for r in results],
+                                  f"{phase} server phases", indent="  ")
+        
+        # Counter di /metrics kumulatif sejak start, per replica yang menjawab
+        if self.dependency_timeline:
+            print("\nDEPENDENCY COUNTERS (from /metrics, end of each phase):")
+            for sample in self.dependency_timeline:
+                redis_stats = sample['redis']
+                print(f"  {sample['phase']:>8} ({sample['instance']}): "
+                      f"redis degraded={redis_stats['degraded']} timeouts={redis_stats['timeouts']} "
+                      f"errors={redis_stats['errors']} skipped={redis_stats['skipped']} | "
+                      f"pool shed={sample['pool']['shed']}")
+        
+        self.analyze_replica_membership()
+        print()
+    
+    def analyze_replica_membership(self):
+        """Replica yang menjawab per fase; berkurang saat fault = nginx menandai replica down"""
+        if not self.replicas_by_phase:
+            return
+        print("\nREPLICAS REACHABLE THROUGH NGINX (/live samples per phase):")
+        baseline = set(self.replicas_by_phase.get('baseline', {}))
+        for phase in ('baseline', 'fault', 'recovery'):
+            replicas = self.replicas_by_phase.get(phase, {})
+            counts = ', '.join(f"{key}={count}" for key, count in sorted(replicas.items()))
+            print(f"  {phase:>8}: {len(replicas)} replicas | {counts}")
+        
+        missing = baseline - set(self.replicas_by_phase.get('fault', {}))
+        if missing:
+            print(f"  ⚠️  Not reached during fault: {', '.join(sorted(missing))}")
+            print("     nginx may have marked them down (503 in proxy_next_upstream counts toward max_fails)")
+        elif baseline:
+            print("  ✅ Every baseline replica kept receiving traffic during the fault phase")
+    
     def analyze_breaking_point(self):
         """Analyze at what point the system started to degrade"""
         if not self.results:
@@ -214,7 +489,7 @@ class TodoStressTester:
             results = user_ranges[user_range]
             
             avg_response_time = statistics.mean([r['response_time'] for r in results])
-            error_count = len([r for r in results if not r['success']])
+            error_count = len([r for r in results if not r['success'] and not r['rate_limited']])
             error_rate = (error_count / len(results)) * 100
             
             status = "✅ Good"
@@ -230,18 +505,77 @@ class TodoStressTester:
         
         return breaking_point
     
+    def analyze_endpoints(self, results):
+        """Response time per endpoint, termasuk pembagian cache vs database"""
+        endpoint_results = {}
+        for result in results:
+            key = f"{result['method']} {result['endpoint']}"
+            endpoint_results.setdefault(key, []).append(result)
+        
+        print("RESPONSE TIME BY ENDPOINT:")
+        for endpoint in sorted(endpoint_results):
+            results = endpoint_results[endpoint]
+            times = sorted(r['response_time'] for r in results)
+            p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+            errors = len([r for r in results if not r['success'] and not r['rate_limited']])
+            limited = len([r for r in results if r['rate_limited']])
+            print(f"  {endpoint:15s}: {len(results):6d} requests | "
+                  f"Avg: {statistics.mean(times):7.1f}ms | P95: {p95:7.1f}ms | "
+                  f"Errors: {errors / len(results) * 100:5.1f}% | 429: {limited / len(results) * 100:5.1f}%")
+            
+            by_source = {}
+            for r in results:
+                if r.get('source'):
+                    by_source.setdefault(r['source'], []).append(r['response_time'])
+            for source in sorted(by_source):
+                source_times = by_source[source]
+                print(f"    {source:>10}: {len(source_times):6d} requests | "
+                      f"Avg: {statistics.mean(source_times):7.1f}ms")
+            
+            print_phase_breakdown([(r['response_time'], r['server_timing']) for r in results],
+                                  "server phases", indent="    ")
+        print()
+    
+    def analyze_pool(self):
+        """Ringkasan saturasi pg pool per instance selama test"""
+        if not self.pool_timeline:
+            return
+        
+        per_instance = {}
+        for sample in self.pool_timeline:
+            per_instance.setdefault(sample['instance'], []).append(sample)
+        
+        print("DATABASE POOL (from /metrics):")
+        for instance in sorted(per_instance):
+            samples = per_instance[instance]
+            max_waiting = max(s['waiting'] for s in samples)
+            max_busy = max(s['total'] - s['idle'] for s in samples)
+            max_wait = max(s['acquire']['maxWaitMs'] for s in samples)
+            saturated = [s for s in samples if s['waiting'] > 0]
+            print(f"  {instance}: pool max {samples[-1]['max']} | peak busy {max_busy} | "
+                  f"peak waiting {max_waiting} | max acquire wait {max_wait:.0f}ms | "
+                  f"saturated in {len(saturated)}/{len(samples)} samples")
+            if saturated:
+                print(f"    first saturation at {min(s['active_users'] for s in saturated)} users")
+        print()
+    
     def generate_report(self):
         """Generate comprehensive stress test report"""
         if not self.results:
             print("No results to report!")
             return
         
+        # Statistik utama dan per endpoint hanya dari steady state;
+        # breaking point tetap memakai semua result
+        results = steady_results(self.results)
+        
         # Basic statistics
-        total_requests = len(self.results)
-        successful_requests = [r for r in self.results if r['success']]
-        failed_requests = [r for r in self.results if not r['success']]
+        total_requests = len(results)
+        successful_requests = [r for r in results if r['success']]
+        failed_requests = [r for r in results if not r['success'] and not r['rate_limited']]
+        rate_limited_requests = [r for r in results if r['rate_limited']]
         
-        response_times = [r['response_time'] for r in self.results]
+        response_times = [r['response_time'] for r in results]
         avg_response_time = statistics.mean(response_times)
         max_response_time = max(response_times)
         p95_response_time = statistics.quantiles(response_times, n=20)[18]
@@ -256,6 +590,8 @@ class TodoStressTester:
         print(f"Ramp-up Time: {self.ramp_up_time} seconds")
         print(f"Total Requests: {total_requests}")
         print(f"Success Rate: {success_rate:.2f}%")
+        print(f"Failed (errors): {len(failed_requests)} ({len(failed_requests) / total_requests * 100:.2f}%)")
+        print(f"Rate Limited (429): {len(rate_limited_requests)} ({len(rate_limited_requests) / total_requests * 100:.2f}%)")
         print()
         
         print("RESPONSE TIME ANALYSIS:")
@@ -265,6 +601,14 @@ class TodoStressTester:
         print(f"  99th Percentile: {p99_response_time:.2f} ms")
         print()
         
+        print_excluded_phases(self.phases, self.results, self.errors)
+        
+        self.analyze_endpoints(results)
+        self.analyze_pool()
+        if self.memory_tracker:
+            print_memory_report(self.memory_tracker)
+            print()
+        
         # Analyze breaking point
         breaking_point = self.analyze_breaking_point()
         
@@ -299,14 +643,68 @@ def main():
                        help='Maximum number of concurrent users')
     parser.add_argument('--ramp-up', type=int, default=300,
                        help='Ramp-up time in seconds')
+    parser.add_argument('--warmup', type=int, default=0,
+                       help='Warm-up seconds excluded from statistics (default: 0)')
+    parser.add_argument('--cooldown', type=int, default=0,
+                       help='Cool-down seconds at the end of full load excluded from statistics (default: 0)')
+    parser.add_argument('--auto-warmup', action='store_true',
+                       help='End warm-up automatically once latency is steady (--warmup is the upper bound)')
+    parser.add_argument('--bypass-token', default=os.environ.get('RATE_LIMIT_BYPASS_TOKEN'),
+                       help='X-RateLimit-Bypass token so the load generator skips the API rate limiter')
+    parser.add_argument('--fault', choices=['redis', 'postgres'],
+                       help='Run the fault test instead: constant load with latency injected into this dependency')
+    parser.add_argument('--fault-listen', type=int,
+                       help='Proxy port the API connects to (default: 16379 redis, 15432 postgres)')
+    parser.add_argument('--fault-target',
+                       help='Real server as HOST:PORT (default: 127.0.0.1:6379 redis, 127.0.0.1:5432 postgres)')
+    parser.add_argument('--fault-delay-ms', type=float, default=500,
+                       help='Latency added during the fault phase (default: 500)')
+    parser.add_argument('--phase-duration', type=int, default=30,
+                       help='Seconds per fault test phase: baseline, fault, recovery (default: 30)')
+    parser.add_argument('--soak', type=float, metavar='HOURS',
+                       help='Run a soak test instead: constant load for this many hours, aggregated per window')
+    parser.add_argument('--window', type=int, default=60,
+                       help='Soak window length in seconds (default: 60)')
+    parser.add_argument('--snapshot-file', default='soak_snapshots.jsonl',
+                       help='Soak snapshot file; an existing file is resumed (default: soak_snapshots.jsonl)')
+    parser.add_argument('--report-from', metavar='SNAPSHOT_FILE',
+                       help='Only print the soak report from an existing snapshot file')
+    parser.add_argument('--memory-trend', action='store_true',
+                       help='Sample memoryUsage from /live during the stress test and flag replicas whose heap keeps growing')
+    parser.add_argument('--memory-target', action='append',
+                       help='Sample this replica URL directly for --memory-trend, e.g. http://localhost:3000 (repeatable)')
     
     args = parser.parse_args()
     
     tester = TodoStressTester(
         base_url=args.url,
         max_users=args.max_users,
-        ramp_up_time=args.ramp_up
+        ramp_up_time=args.ramp_up,
+        bypass_token=args.bypass_token,
+        warmup=args.warmup,
+        cooldown=args.cooldown,
+        auto_warmup=args.auto_warmup
     )
+    if args.memory_trend or args.memory_target:
+        tester.memory_tracker = MemoryTrendTracker()
+        tester.memory_targets = args.memory_target
+    
+    if args.report_from:
+        print_soak_report(load_snapshots(args.report_from), f"SOAK TEST REPORT ({args.report_from})")
+        return
+    
+    if args.fault:
+        run_fault_mode(tester, args)
+        return
+    
+    if args.soak:
+        recorder = SoakRecorder(args.snapshot_file, window_seconds=args.window)
+        try:
+            tester.run_soak_test(recorder, args.soak * 3600)
+        except KeyboardInterrupt:
+            print("\nSoak test interrupted by user, snapshots are kept")
+        print_soak_report(load_snapshots(args.snapshot_file), f"SOAK TEST REPORT ({args.snapshot_file})")
+        return
     
     try:
         tester.run_stress_test()
@@ -318,5 +716,23 @@ def main():
         if tester.results:
             tester.generate_report()
 
+def run_fault_mode(tester, args):
+    """API harus sudah berjalan dengan REDIS_PORT/DB_PORT mengarah ke port proxy"""
+    defaults = {'redis': (16379, '127.0.0.1:6379'), 'postgres': (15432, '127.0.0.1:5432')}
+    listen_port, target = defaults[args.fault]
+    target_host, target_port = parse_address(args.fault_target or target)
+    proxy = LatencyProxy(args.fault_listen or listen_port, target_host, target_port, name=args.fault)
+    
+    with proxy:
+        try:
+            tester.run_fault_test(proxy, args.fault_delay_ms, args.phase_duration)
+        except KeyboardInterrupt:
+            print("\nFault test interrupted by user")
+            tester.test_running = False
+    
+    if tester.results:
+        tester.generate_report()
+        tester.analyze_fault_phases()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file